@@ -7,12 +7,21 @@ setup(
     package_dir={"": "src"},
     install_requires=["azure-data-tables>=12.4.0", "azure-core>=1.26.0"],
     extras_require={
+        "aio": ["aiohttp>=3.8.0"],
+        "fast": ["orjson>=3.8.0"],
+        "zstd": ["zstandard>=0.21.0"],
+        "parquet": ["pyarrow>=10.0.0"],
         "dev": [
             "pytest>=7.0.0",
             "pytest-asyncio>=0.18.0",
             "pytest-cov>=3.0.0",
         ],
     },
+    entry_points={
+        "console_scripts": [
+            "azure-table-logs-export=masterzdran_azure_tablestorage_logging.export:main",
+        ],
+    },
     python_requires=">=3.8",
     author="Nuno Cancelo",
     author_email="nuno.cancelo@gmail.com",
@@ -2,7 +2,65 @@
 Azure Table Storage logging module initialization.
 """
 
-from .logger import AzureLogger, LogLevel
+from .async_storage import AsyncAzureTableStorage
+from .batching import BatchingStorage
+from .cache import CachingStorage
+from .coalesce import CoalescingStorage
+from .codec import MetadataCodec
+from .context import get_trace_id, log_context, with_context
+from .exceptions import CircuitOpenError, StorageError
+from .handler import AzureTableHandler, AzureTableListener
+from .ingestion import IngestionQueue, OverflowPolicy
+from .levels import LogLevel
+from .logger import AzureLogger
+from .memory import InMemoryTableService, InMemoryTableStorage
+from .metrics import Metrics
+from .models import LogEntry
+from .partitioning import (
+    LoggerNamePartitionStrategy,
+    PartitionStrategy,
+    TimeBucketPartitionStrategy,
+)
+from .query import Field, Predicate, TimeRange
+from .resilience import CircuitBreaker, Resilience, RetryPolicy
+from .rotation import RotatingTableStorage
+from .sampling import Sampler
+from .spool import DiskSpool, SpoolingStorage
 from .storage import AzureTableStorage
 
-__all__ = ["AzureLogger", "LogLevel", "AzureTableStorage"]
+__all__ = [
+    "AzureLogger",
+    "LogLevel",
+    "AzureTableStorage",
+    "AsyncAzureTableStorage",
+    "BatchingStorage",
+    "IngestionQueue",
+    "AzureTableHandler",
+    "AzureTableListener",
+    "OverflowPolicy",
+    "PartitionStrategy",
+    "LoggerNamePartitionStrategy",
+    "TimeBucketPartitionStrategy",
+    "DiskSpool",
+    "SpoolingStorage",
+    "StorageError",
+    "CircuitOpenError",
+    "Resilience",
+    "RetryPolicy",
+    "CircuitBreaker",
+    "MetadataCodec",
+    "LogEntry",
+    "Field",
+    "Predicate",
+    "TimeRange",
+    "CachingStorage",
+    "InMemoryTableService",
+    "InMemoryTableStorage",
+    "Metrics",
+    "RotatingTableStorage",
+    "Sampler",
+    "CoalescingStorage",
+    "log_context",
+    "get_trace_id",
+    "with_context",
+]
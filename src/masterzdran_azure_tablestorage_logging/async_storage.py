@@ -0,0 +1,260 @@
+"""
+Asynchronous Azure Table Storage logging module.
+Provides a non-blocking storage backend built on azure.data.tables.aio.
+"""
+
+import asyncio
+from typing import Any, Dict, List, Optional, Tuple
+
+from azure.core.exceptions import ResourceExistsError
+from azure.data.tables.aio import TableServiceClient
+
+from .exceptions import StorageError
+from .storage_base import (
+    TRACE_INDEX_SUFFIX,
+    TableStorageBase,
+)
+from .transactions import LogTuple
+
+
+# The clients and their locks are created in open(), on the running event loop.
+# pylint: disable-next=too-many-instance-attributes
+class AsyncAzureTableStorage(TableStorageBase):
+    """
+    AsyncAzureTableStorage implements the StorageInterface on the asynchronous
+    Azure Tables client, so storage round trips never block the event loop.
+
+    All requests share one aiohttp connection pool, and at most max_concurrency
+    requests are in flight at once. The clients are created on first use inside
+    the running event loop; use the instance as an async context manager or call
+    aclose() to release the connection pool.
+    """
+
+    def __init__(
+        self,
+        connection_string: str,
+        table_name: str,
+        pool_size: int = 100,
+        max_concurrency: int = 50,
+        session: Optional[Any] = None,
+        **options: Any,
+    ):
+        """
+        Initialize the AsyncAzureTableStorage instance.
+
+        :param connection_string: The connection string to the Azure Storage account.
+        :param table_name: The name of the table to store logs.
+        :param pool_size: The maximum number of pooled HTTP connections.
+        :param max_concurrency: The maximum number of concurrent storage requests.
+        :param session: An aiohttp.ClientSession to share with other clients. It is
+                        not closed by aclose(); pool_size is ignored when given.
+        :param options: The table storage options: descending_row_keys,
+                        partition_strategy, resilience, metadata_codec, trace_index
+                        and metrics (see TableStorageBase).
+        :raises ValueError: If connection_string or table_name is empty, or
+                            pool_size or max_concurrency is not positive.
+        """
+        if not connection_string:
+            raise ValueError("Connection string cannot be empty")
+        if pool_size <= 0:
+            raise ValueError("Pool size must be positive")
+        if max_concurrency <= 0:
+            raise ValueError("Max concurrency must be positive")
+        super().__init__(table_name, **options)
+
+        self.connection_string = connection_string
+        self.pool_size = pool_size
+        self.max_concurrency = max_concurrency
+        self.session = session
+        self.table_service_client = None
+        self.table_client = None
+        self.index_client = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._open_lock: Optional[asyncio.Lock] = None
+
+    async def __aenter__(self) -> "AsyncAzureTableStorage":
+        await self.open()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+    def _create_transport(self):
+        """
+        Create the aiohttp transport backing the shared connection pool.
+
+        :return: An AioHttpTransport instance.
+        """
+        # Imported here so the module imports without aiohttp installed.
+        import aiohttp  # pylint: disable=import-outside-toplevel
+
+        # AioHttpTransport is resolved lazily by the package, out of pylint's sight.
+        # pylint: disable-next=no-name-in-module
+        from azure.core.pipeline.transport import (  # pylint: disable=import-outside-toplevel
+            AioHttpTransport,
+        )
+
+        if self.session is not None:
+            return AioHttpTransport(session=self.session, session_owner=False)
+        connector = aiohttp.TCPConnector(limit=self.pool_size)
+        return AioHttpTransport(
+            session=aiohttp.ClientSession(connector=connector), session_owner=True
+        )
+
+    def _create_service_client(self):
+        """
+        Create the table service client on the shared connection pool.
+
+        :return: A TableServiceClient instance.
+        """
+        return TableServiceClient.from_connection_string(
+            self.connection_string, transport=self._create_transport()
+        )
+
+    async def open(self):
+        """
+        Create the clients and the table if it does not already exist.
+        Called automatically by the first storage operation.
+        """
+        if self.table_client is not None:
+            return
+        if self._open_lock is None:
+            self._open_lock = asyncio.Lock()
+        async with self._open_lock:
+            if self.table_client is not None:
+                return
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            service_client = self._create_service_client()
+            table_names = [self.table_name]
+            if self.trace_index:
+                table_names.append(self.table_name + TRACE_INDEX_SUFFIX)
+            for table_name in table_names:
+                try:
+                    await service_client.create_table(table_name)
+                except ResourceExistsError:
+                    pass
+            if self.trace_index:
+                self.index_client = service_client.get_table_client(
+                    table_name=table_names[1]
+                )
+            self.table_service_client = service_client
+            self.table_client = service_client.get_table_client(
+                table_name=self.table_name
+            )
+
+    async def aclose(self):
+        """
+        Close the clients and the connection pool.
+        """
+        if self.table_client is None:
+            return
+        await self.table_client.close()
+        if self.index_client is not None:
+            await self.index_client.close()
+        await self.table_service_client.close()
+        self.table_client = None
+        self.index_client = None
+        self.table_service_client = None
+
+    async def list_tables(self, prefix: str = "") -> List[str]:
+        """
+        List the tables of the storage account.
+
+        :param prefix: Only list the tables whose names start with prefix.
+        :return: The sorted table names.
+        """
+        await self.open()
+        return sorted(
+            [
+                table.name
+                async for table in self.table_service_client.list_tables()
+                if table.name.startswith(prefix)
+            ]
+        )
+
+    async def drop_table(self):
+        """
+        Delete the table and its trace index table, then close the clients.
+        """
+        await self.open()
+        await self.table_service_client.delete_table(self.table_name)
+        if self.index_client is not None:
+            await self.table_service_client.delete_table(
+                self.table_name + TRACE_INDEX_SUFFIX
+            )
+        await self.aclose()
+
+    async def _create_entity(self, entity: Dict[str, Any]):
+        """
+        Insert one entity into the table.
+
+        :param entity: The entity.
+        """
+        async with self._semaphore:
+            await self.table_client.create_entity(entity=entity)
+
+    async def _submit_transaction(self, operations: List[Tuple[str, Dict[str, Any]]]):
+        """
+        Submit one entity group transaction to the table.
+
+        :param operations: The operations of one partition.
+        """
+        async with self._semaphore:
+            await self.table_client.submit_transaction(operations)
+
+    async def _get_entity(self, partition_key: str, row_key: str) -> Dict[str, Any]:
+        """
+        Read one entity of the table.
+
+        :param partition_key: The partition key of the entity.
+        :param row_key: The row key of the entity.
+        :return: The entity.
+        :raises ResourceNotFoundError: If the entity does not exist.
+        """
+        async with self._semaphore:
+            return await self.table_client.get_entity(
+                partition_key=partition_key, row_key=row_key
+            )
+
+    async def _write_transactions(self, transactions: List[List[LogTuple]]):
+        """
+        Submit the transactions of store_logs concurrently, within the
+        max_concurrency limit.
+
+        :param transactions: The entries of every transaction.
+        :raises CircuitOpenError: If the circuit breaker is open and there is no
+                                  fallback storage.
+        :raises StorageError: If submitting a transaction fails.
+        """
+        results = await asyncio.gather(
+            *(self._write_transaction(transaction) for transaction in transactions),
+            return_exceptions=True,
+        )
+        for result in results:
+            if isinstance(result, StorageError):
+                raise result
+            if isinstance(result, Exception):
+                raise StorageError(f"Failed to store logs: {str(result)}") from result
+
+    async def _first_page(
+        self, pages: Any
+    ) -> Tuple[List[Dict[str, Any]], Optional[Dict[str, str]]]:
+        """
+        Read the first page of a paged query.
+
+        :param pages: The pages returned by the client's query_entities().by_page().
+        :return: The entities and the service continuation token of the next page.
+        """
+        async with self._semaphore:
+            async for page in pages:
+                return [dict(entity) async for entity in page], pages.continuation_token
+            return [], None
+
+    async def _submit_index(self, operations: List[Tuple[str, Dict[str, Any]]]):
+        """
+        Submit one transaction to the trace index table.
+
+        :param operations: The upsert operations of one index partition.
+        """
+        async with self._semaphore:
+            await self.index_client.submit_transaction(operations)
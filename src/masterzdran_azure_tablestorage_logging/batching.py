@@ -0,0 +1,183 @@
+"""
+Buffered storage for Azure Table Storage logging module.
+Queues log entries in memory and writes them in batches from a background task.
+"""
+
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from .ingestion import IngestionQueue, PeriodicTask, QueuedEntry
+from .interfaces import StorageInterface, StorageWrapper
+from .metrics import Metrics
+from .transactions import validate_log
+
+
+class BatchingStorage(StorageWrapper):
+    """
+    BatchingStorage wraps another storage and buffers log entries in a bounded
+    IngestionQueue. A background task hands the queued entries to the wrapped
+    storage's store_logs when max_batch_size entries are queued or flush_interval
+    elapses. Reads go to the wrapped storage and do not include buffered entries.
+
+    A batch the wrapped storage fails to store is put back at the head of the
+    queue and retried by the next flush, so a transient error loses nothing;
+    only a batch rejected with ValueError, which cannot succeed, is dropped.
+    """
+
+    def __init__(
+        self,
+        storage: StorageInterface,
+        max_batch_size: int = 100,
+        flush_interval: float = 1.0,
+        on_error: Optional[Callable[[Exception, List[QueuedEntry]], None]] = None,
+        *,
+        queue: Optional[IngestionQueue] = None,
+        metrics: Optional[Metrics] = None,
+    ):
+        """
+        Initialize the BatchingStorage instance.
+
+        :param storage: The storage the buffered entries are written to.
+        :param max_batch_size: The number of buffered entries that triggers a flush,
+                               at most the capacity of the queue.
+        :param flush_interval: The maximum number of seconds an entry stays buffered.
+        :param on_error: Called with the error and the entries of a failed
+                         write. The entries are retried by the next flush.
+        :param queue: The queue buffering the entries, which sets the capacity and
+                      overflow policy; defaults to IngestionQueue().
+        :param metrics: Records the queue depth, dropped entries and batch sizes;
+                        None records nothing.
+        :raises ValueError: If max_batch_size or flush_interval is not positive.
+        """
+        if max_batch_size <= 0:
+            raise ValueError("Max batch size must be positive")
+        if flush_interval <= 0:
+            raise ValueError("Flush interval must be positive")
+
+        super().__init__(storage)
+        self.queue = queue if queue is not None else IngestionQueue()
+        # A full queue cannot hold a larger batch, so it triggers the flush.
+        self.max_batch_size = min(max_batch_size, self.queue.max_entries)
+        self.on_error = on_error
+        self.failed_entries = 0
+        self.metrics = metrics
+        self._flusher = PeriodicTask(
+            lambda: self._write_buffer(raise_errors=False), flush_interval
+        )
+
+    @property
+    def flush_interval(self) -> float:
+        """
+        The maximum number of seconds an entry stays buffered.
+        """
+        return self._flusher.interval
+
+    async def _write_buffer(self, raise_errors: bool = True):
+        """
+        Hand the buffered entries to the wrapped storage in max_batch_size chunks.
+
+        :param raise_errors: Raise the error of a failed chunk. The background
+                             flush only reports it through on_error. Either
+                             way the chunk is requeued and the remaining
+                             entries wait for the next flush.
+        :raises Exception: If the wrapped storage fails to store a chunk and
+                           raise_errors is set.
+        """
+        async with self._flusher.lock:
+            while True:
+                batch = self.queue.get_batch(self.max_batch_size)
+                if not batch:
+                    break
+                if self.metrics is not None:
+                    self.metrics.observe("batch_entries", len(batch))
+                    self.metrics.set_gauge("queue_depth", len(self.queue))
+                try:
+                    await self.storage.store_logs(batch)
+                except Exception as e:  # pylint: disable=broad-except
+                    self.failed_entries += len(batch)
+                    if self.metrics is not None:
+                        self.metrics.increment("failed_entries_total", len(batch))
+                    if not isinstance(e, ValueError):
+                        self.queue.requeue(batch)
+                    if self.on_error is not None:
+                        self.on_error(e, batch)
+                    if raise_errors:
+                        raise
+                    return
+
+    async def store_log(self, partition_key: str, row_key: str, data: Dict[str, Any]):
+        """
+        Queue a log entry for the next batch.
+
+        When the queue is full the queue's overflow policy applies: the call waits
+        for room or an entry is dropped and counted.
+
+        :param partition_key: The partition key for the log entry.
+        :param row_key: The row key for the log entry.
+        :param data: A dictionary containing the log data.
+        :raises ValueError: If partition_key, row_key, or data is invalid,
+                            or the storage has been closed.
+        """
+        if self._flusher.closed:
+            raise ValueError("Storage is closed")
+        validate_log(partition_key, row_key, data)
+
+        self._flusher.start()
+        if len(self.queue) + 1 >= self.max_batch_size:
+            self._flusher.wake()
+        if self.metrics is None:
+            await self.queue.put((partition_key, row_key, data))
+            return
+        dropped = self.queue.dropped_entries
+        await self.queue.put((partition_key, row_key, data))
+        if self.queue.dropped_entries > dropped:
+            self.metrics.increment(
+                "dropped_entries_total", self.queue.dropped_entries - dropped
+            )
+        self.metrics.set_gauge("queue_depth", len(self.queue))
+
+    async def store_logs(self, entries: Sequence[QueuedEntry]):
+        """
+        Queue several log entries for the next batch.
+
+        :param entries: A sequence of (partition_key, row_key, data) tuples.
+        :raises ValueError: If any of the entries is invalid, or the storage has
+                            been closed.
+        """
+        for partition_key, row_key, data in entries:
+            await self.store_log(partition_key, row_key, data)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get the ingestion counters.
+
+        :return: The queue counters and the number of entries in failed writes.
+        """
+        return {**self.queue.stats(), "failed_entries": self.failed_entries}
+
+    async def flush(self):
+        """
+        Write all buffered log entries to the wrapped storage.
+
+        :raises Exception: If the wrapped storage fails to store the entries.
+        """
+        if not self._flusher.started:
+            return
+        await self._write_buffer()
+        await self.storage.flush()
+
+    async def aclose(self):
+        """
+        Stop the background task, flush pending entries and close the wrapped storage.
+
+        The wrapped storage is closed even if the last flush fails. The failed
+        entries stay queued, and calling aclose() again retries them.
+
+        :raises Exception: If the wrapped storage fails to store the entries.
+        """
+        if self._flusher.closed and not self.queue:
+            return
+        await self._flusher.stop()
+        try:
+            await self._write_buffer()
+        finally:
+            await self.storage.aclose()
@@ -0,0 +1,203 @@
+"""
+Benchmark for Azure Table Storage logging module.
+Drives an AzureLogger against the in-memory Table Storage and reports throughput,
+log call latency, memory and storage requests per entry.
+
+Run it with: python -m masterzdran_azure_tablestorage_logging.benchmark --help
+"""
+
+import argparse
+import asyncio
+import json
+import time
+import tracemalloc
+from typing import Any, Dict, List, Optional, Sequence
+
+from .batching import BatchingStorage
+from .interfaces import StorageInterface
+from .logger import AzureLogger
+from .memory import InMemoryTableService, InMemoryTableStorage
+
+
+def percentile(values: Sequence[float], fraction: float) -> float:
+    """
+    Get a nearest-rank percentile.
+
+    :param values: The sorted values.
+    :param fraction: The percentile as a fraction, e.g. 0.99.
+    :return: The percentile, or 0.0 if there are no values.
+    """
+    if not values:
+        return 0.0
+    index = min(len(values) - 1, max(0, int(round(fraction * len(values))) - 1))
+    return values[index]
+
+
+async def _measure(
+    logger: AzureLogger,
+    entries: int,
+    concurrency: int,
+    *,
+    rate: Optional[float],
+    message: str,
+    metadata: Dict[str, Any],
+    trace_memory: bool,
+) -> Dict[str, Any]:
+    """
+    Log entries from concurrent tasks, close the logger and measure the run.
+
+    :param logger: The logger, which is closed once every entry is logged.
+    :param entries: The number of entries to log.
+    :param concurrency: The number of tasks logging at once.
+    :param rate: The target number of entries per second, or None.
+    :param message: The message of each entry.
+    :param metadata: The metadata of each entry.
+    :param trace_memory: Whether to measure the peak memory with tracemalloc.
+    :return: The timing and memory measurements.
+    """
+    latencies: List[float] = [0.0] * entries
+
+    if trace_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+
+    async def worker(first: int):
+        for index in range(first, entries, concurrency):
+            if rate is not None:
+                delay = start + index / rate - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            call_start = time.perf_counter()
+            await logger.info(
+                message, trace_id=f"trace-{index % 100}", metadata=metadata
+            )
+            latencies[index] = time.perf_counter() - call_start
+
+    try:
+        await asyncio.gather(*(worker(first) for first in range(concurrency)))
+        await logger.aclose()
+        elapsed = time.perf_counter() - start
+        peak_memory = tracemalloc.get_traced_memory()[1] if trace_memory else 0
+    finally:
+        if trace_memory:
+            tracemalloc.stop()
+
+    latencies.sort()
+    return {
+        "entries": entries,
+        "elapsed_seconds": elapsed,
+        "entries_per_second": entries / elapsed if elapsed > 0 else 0.0,
+        "p50_latency_ms": percentile(latencies, 0.50) * 1000,
+        "p99_latency_ms": percentile(latencies, 0.99) * 1000,
+        "max_latency_ms": latencies[-1] * 1000,
+        "peak_memory_bytes": peak_memory,
+    }
+
+
+async def run_benchmark(
+    *,
+    entries: int = 10000,
+    concurrency: int = 8,
+    rate: Optional[float] = None,
+    batching: bool = True,
+    latency: float = 0.0,
+    message_size: int = 64,
+    metadata_keys: int = 4,
+    capture_location: bool = True,
+    trace_memory: bool = True,
+    service: Optional[InMemoryTableService] = None,
+    storage: Optional[StorageInterface] = None,
+) -> Dict[str, Any]:
+    """
+    Log entries from concurrent tasks and measure the logging pipeline.
+
+    Entries are spread over concurrency tasks; with a rate, the n-th entry is
+    logged no earlier than n / rate seconds after the start. The run ends once
+    the storage has been flushed and closed, so the throughput includes the
+    writes.
+
+    :param entries: The number of entries to log.
+    :param concurrency: The number of tasks logging at once.
+    :param rate: The target number of entries per second, or None for as fast
+                 as possible.
+    :param batching: Whether to write through a BatchingStorage.
+    :param latency: The simulated latency of each storage request, in seconds.
+    :param message_size: The length of each message.
+    :param metadata_keys: The number of metadata entries of each log entry.
+    :param capture_location: Whether the logger records caller locations.
+    :param trace_memory: Whether to measure the peak memory with tracemalloc,
+                         which slows the run down.
+    :param service: The in-memory service to write to; defaults to a new one.
+    :param storage: The storage to write to; defaults to an InMemoryTableStorage
+                    on service. Requests are only counted on the in-memory service.
+    :return: The measurements.
+    :raises ValueError: If entries, concurrency or rate is not positive.
+    """
+    if entries <= 0:
+        raise ValueError("Entries must be positive")
+    if concurrency <= 0:
+        raise ValueError("Concurrency must be positive")
+    if rate is not None and rate <= 0:
+        raise ValueError("Rate must be positive")
+
+    if service is None:
+        service = InMemoryTableService(latency=latency)
+    if storage is None:
+        storage = InMemoryTableStorage(service=service)
+    if batching:
+        storage = BatchingStorage(storage)
+    logger = AzureLogger(storage, "benchmark", capture_location=capture_location)
+    requests_before = service.requests
+    result = await _measure(
+        logger,
+        entries,
+        concurrency,
+        rate=rate,
+        message="x" * message_size,
+        metadata={f"key{index}": index for index in range(metadata_keys)},
+        trace_memory=trace_memory,
+    )
+    requests = service.requests - requests_before
+    result["requests"] = requests
+    result["requests_per_entry"] = requests / entries
+    return result
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    """
+    Run the benchmark from the command line and print the measurements as JSON.
+
+    :param argv: The command line arguments; defaults to sys.argv.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--entries", type=int, default=10000)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--rate", type=float, default=None)
+    parser.add_argument("--no-batching", dest="batching", action="store_false")
+    parser.add_argument(
+        "--latency", type=float, default=0.0, help="seconds per storage request"
+    )
+    parser.add_argument("--message-size", type=int, default=64)
+    parser.add_argument("--metadata-keys", type=int, default=4)
+    parser.add_argument("--no-location", dest="capture_location", action="store_false")
+    parser.add_argument("--no-memory", dest="trace_memory", action="store_false")
+    args = parser.parse_args(argv)
+
+    result = asyncio.run(
+        run_benchmark(
+            entries=args.entries,
+            concurrency=args.concurrency,
+            rate=args.rate,
+            batching=args.batching,
+            latency=args.latency,
+            message_size=args.message_size,
+            metadata_keys=args.metadata_keys,
+            capture_location=args.capture_location,
+            trace_memory=args.trace_memory,
+        )
+    )
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,310 @@
+"""
+Read-through cache for Azure Table Storage logging module.
+Keeps recently read log entries and query pages in memory, bounded in size and age.
+"""
+
+import copy
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Hashable,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+from .interfaces import StorageInterface, StorageWrapper
+from .models import LogEntry
+from .query import Filters, compile_filters
+
+_MISSING = object()
+
+
+def _copy(value: Any) -> Any:
+    """
+    Copy a cached log so callers cannot modify the cached one.
+
+    :param value: A log dictionary, LogEntry or None.
+    :return: A copy of a dictionary or LogEntry, with its metadata dictionary
+             copied too, or None.
+    """
+    if isinstance(value, LogEntry):
+        value = copy.copy(value)
+        if isinstance(value.metadata, dict):
+            value.metadata = dict(value.metadata)
+    elif isinstance(value, dict):
+        value = dict(value)
+        if isinstance(value.get("Metadata"), dict):
+            value["Metadata"] = dict(value["Metadata"])
+    return value
+
+
+class LRUCache:
+    """
+    LRUCache is a least-recently-used mapping bounded by entry count, whose
+    entries expire ttl seconds after they were stored.
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        ttl: float,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Initialize the LRUCache instance.
+
+        :param max_entries: The maximum number of cached entries.
+        :param ttl: The number of seconds an entry stays valid.
+        :param clock: Returns the current time in seconds.
+        :raises ValueError: If max_entries or ttl is not positive.
+        """
+        if max_entries <= 0:
+            raise ValueError("Max entries must be positive")
+        if ttl <= 0:
+            raise ValueError("TTL must be positive")
+
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Any:
+        """
+        Look up a key, counting the hit or miss.
+
+        :param key: The cache key.
+        :return: The cached value, or _MISSING if it is absent or expired.
+        """
+        item = self._entries.get(key)
+        if item is not None:
+            expires, value = item
+            if expires > self.clock():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            del self._entries[key]
+        self.misses += 1
+        return _MISSING
+
+    def put(self, key: Hashable, value: Any):
+        """
+        Store a value, evicting the least recently used entries beyond max_entries.
+
+        :param key: The cache key.
+        :param value: The value to cache.
+        """
+        self._entries[key] = (self.clock() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def pop(self, key: Hashable):
+        """
+        Remove a key if it is cached.
+
+        :param key: The cache key.
+        """
+        self._entries.pop(key, None)
+
+    def clear(self):
+        """
+        Remove every entry.
+        """
+        self._entries.clear()
+
+
+class CachingStorage(StorageWrapper):
+    """
+    CachingStorage wraps another storage and serves repeated reads from memory.
+
+    Point reads are cached by (PartitionKey, RowKey) and get_logs pages by their
+    normalized query and continuation token, each in an LRU bounded by entry
+    count and TTL. Writes through this instance drop the written entries from the
+    point-read cache and drop every cached page, since any page may now include
+    them. Writes made by other processes are seen once the cached data expires.
+    Scans, merged queries and trace lookups are forwarded and not cached.
+    """
+
+    def __init__(
+        self,
+        storage: StorageInterface,
+        max_entries: int = 1024,
+        ttl: float = 60.0,
+        *,
+        max_pages: int = 128,
+        page_ttl: float = 10.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Initialize the CachingStorage instance.
+
+        :param storage: The storage reads and writes are forwarded to.
+        :param max_entries: The maximum number of cached point reads.
+        :param ttl: The number of seconds a point read stays cached.
+        :param max_pages: The maximum number of cached query pages.
+        :param page_ttl: The number of seconds a query page stays cached.
+        :param clock: Returns the current time in seconds.
+        :raises ValueError: If a size or TTL is not positive.
+        """
+        super().__init__(storage)
+        self.entries = LRUCache(max_entries, ttl, clock)
+        self.pages = LRUCache(max_pages, page_ttl, clock)
+
+    def _invalidate(self, keys: Sequence[Tuple[str, str]]):
+        """
+        Drop written entries from the point-read cache and every cached page.
+
+        :param keys: The (partition_key, row_key) pairs written.
+        """
+        for key in keys:
+            self.entries.pop(key)
+        self.pages.clear()
+
+    def invalidate(self):
+        """
+        Drop every cached entry and page.
+        """
+        self.entries.clear()
+        self.pages.clear()
+
+    async def store_log(self, partition_key: str, row_key: str, data: Dict[str, Any]):
+        """
+        Store a log entry in the wrapped storage and invalidate the cached reads
+        it affects.
+
+        :param partition_key: The partition key for the log entry.
+        :param row_key: The row key for the log entry.
+        :param data: A dictionary containing the log data.
+        """
+        try:
+            await self.storage.store_log(partition_key, row_key, data)
+        finally:
+            self._invalidate([(partition_key, row_key)])
+
+    async def store_logs(self, entries: Sequence[Tuple[str, str, Dict[str, Any]]]):
+        """
+        Store several log entries in the wrapped storage and invalidate the cached
+        reads they affect.
+
+        :param entries: A sequence of (partition_key, row_key, data) tuples.
+        """
+        try:
+            await self.storage.store_logs(entries)
+        finally:
+            self._invalidate([(entry[0], entry[1]) for entry in entries])
+
+    async def aclose(self):
+        """
+        Drop the cache and close the wrapped storage.
+        """
+        self.invalidate()
+        await self.storage.aclose()
+
+    async def get_log_entry(
+        self, partition_key: str, row_key: str
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Retrieve a single log entry, from the cache if it was read recently.
+        Entries that were not found are cached too.
+
+        :param partition_key: The partition key of the log entry.
+        :param row_key: The row key of the log entry.
+        :return: A dictionary containing the log entry or None if not found.
+        """
+        key = (partition_key, row_key)
+        log = self.entries.get(key)
+        if log is _MISSING:
+            log = await self.storage.get_log_entry(partition_key, row_key)
+            self.entries.put(key, log)
+        return _copy(log)
+
+    def _page_key(self, query: Dict[str, Any]) -> Hashable:
+        """
+        Build the cache key of a query page.
+
+        Filters are normalized to their compiled filter string, with dictionary
+        filters sorted by field, so equivalent queries share a key.
+
+        :param query: The get_logs arguments, by name.
+        :return: The cache key.
+        :raises ValueError: If the filters are invalid.
+        """
+        filters = query["filters"]
+        if isinstance(filters, dict):
+            filters = dict(sorted(filters.items()))
+        compiled = compile_filters(filters, self.descending_row_keys)
+        return tuple({**query, "filters": compiled}.values())
+
+    async def get_logs(
+        self,
+        page_size: int = 50,
+        continuation_token: Optional[str] = None,
+        order_by: str = "Timestamp",
+        ascending: bool = False,
+        filters: Optional[Filters] = None,
+        *,
+        logger_name: Optional[str] = None,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None,
+        as_entries: bool = False,
+    ) -> Tuple[List[Any], Optional[str]]:
+        """
+        Retrieve a page of logs, from the cache if the same page was read recently.
+
+        :param page_size: The number of logs to retrieve per page.
+        :param continuation_token: The token to continue retrieving logs from where the
+                                    last query left off.
+        :param order_by: The field to order the logs by.
+        :param ascending: Whether to order the logs in ascending order.
+        :param filters: A dictionary of property values, or a query Predicate.
+        :param logger_name: Only read the partitions of this logger.
+        :param start_time: Only return entries logged at or after this UTC time.
+        :param end_time: Only return entries logged at or before this UTC time.
+        :param as_entries: Return LogEntry records instead of dictionaries.
+        :return: A tuple containing a list of logs and an optional continuation token.
+        :raises ValueError: If the filters are invalid.
+        """
+        query = {
+            "page_size": page_size,
+            "continuation_token": continuation_token,
+            "order_by": order_by,
+            "ascending": ascending,
+            "filters": filters,
+            "logger_name": logger_name,
+            "start_time": start_time,
+            "end_time": end_time,
+            "as_entries": as_entries,
+        }
+        key = self._page_key(query)
+        page = self.pages.get(key)
+        if page is _MISSING:
+            page = await self.storage.get_logs(**query)
+            self.pages.put(key, page)
+        logs, token = page
+        return [_copy(log) for log in logs], token
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get the cache counters.
+
+        :return: The hits, misses and sizes of the entry and page caches.
+        """
+        return {
+            "entry_hits": self.entries.hits,
+            "entry_misses": self.entries.misses,
+            "cached_entries": len(self.entries),
+            "page_hits": self.pages.hits,
+            "page_misses": self.pages.misses,
+            "cached_pages": len(self.pages),
+        }
@@ -0,0 +1,272 @@
+"""
+Coalescing storage for Azure Table Storage logging module.
+Collapses repeated log lines written within a time window into a single entity.
+"""
+
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from .ingestion import PeriodicTask
+from .interfaces import StorageInterface, StorageWrapper
+from .models import LogEntry
+from .transactions import LogTuple, validate_log
+
+# The metadata key of the occurrence summary of a coalesced entry.
+COALESCED_KEY = "coalesced"
+
+# PartitionKey, level, logger name, location and message of a log line.
+CoalescingKey = Tuple[Any, ...]
+
+
+class _Group:
+    """
+    The repeats of one log line within the current window.
+    """
+
+    __slots__ = ("entry", "deadline", "count", "last_timestamp", "samples")
+
+    def __init__(self, entry: LogTuple, deadline: float, metadata: Any):
+        self.entry = entry
+        self.deadline = deadline
+        self.count = 1
+        self.last_timestamp = entry[2].get("Timestamp")
+        self.samples = [dict(metadata)] if metadata else []
+
+
+# Three settings, the error callback and clock, the coalesced counter, the open
+# groups and the task writing them.
+# pylint: disable-next=too-many-instance-attributes
+class CoalescingStorage(StorageWrapper):
+    """
+    CoalescingStorage wraps another storage and collapses log lines repeated
+    within window seconds (same PartitionKey, level, logger, location and
+    message) into the entity of the first occurrence.
+
+    An entry written alone is stored unchanged. An entry with repeats carries a
+    "coalesced" metadata object with the occurrence count, the first and last
+    timestamps and up to max_samples distinct metadata values of the repeats;
+    its TraceId is the first occurrence's. A background task writes each group
+    when its window closes; groups are also written when
+    max_groups is exceeded (oldest first) and on flush() or aclose(). Reads are
+    forwarded to the wrapped storage and do not include open groups.
+    """
+
+    def __init__(
+        self,
+        storage: StorageInterface,
+        window: float = 5.0,
+        max_samples: int = 5,
+        max_groups: int = 10000,
+        *,
+        on_error: Optional[Callable[[Exception, List[LogTuple]], None]] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Initialize the CoalescingStorage instance.
+
+        :param storage: The storage the coalesced entries are written to.
+        :param window: The number of seconds repeats of a line are collapsed for,
+                       counted from its first occurrence.
+        :param max_samples: The maximum number of distinct metadata values kept.
+        :param max_groups: The maximum number of lines collapsed at once.
+        :param on_error: Called with the error and the entries of a failed
+                         background write. Failed entries are dropped.
+        :param clock: Returns a monotonic time in seconds.
+        :raises ValueError: If window or max_groups is not positive, or
+                            max_samples is negative.
+        """
+        if window <= 0:
+            raise ValueError("Window must be positive")
+        if max_samples < 0:
+            raise ValueError("Max samples must not be negative")
+        if max_groups <= 0:
+            raise ValueError("Max groups must be positive")
+
+        super().__init__(storage)
+        self.max_samples = max_samples
+        self.max_groups = max_groups
+        self.on_error = on_error
+        self.clock = clock
+        self.coalesced_entries = 0
+        self._groups: Dict[CoalescingKey, _Group] = {}
+        # Writes the groups whose window has closed, waking at the next deadline.
+        self._flusher = PeriodicTask(self._write_closed_groups, window)
+
+    @property
+    def window(self) -> float:
+        """
+        The number of seconds repeats of a line are collapsed for.
+        """
+        return self._flusher.interval
+
+    def _build_entry(self, group: _Group) -> LogTuple:
+        """
+        Build the entry written for a group.
+
+        :param group: The group.
+        :return: The first occurrence, with the occurrence summary if repeated.
+        """
+        partition_key, row_key, data = group.entry
+        if group.count == 1:
+            return group.entry
+        metadata = dict(data.get("Metadata") or {})
+        metadata[COALESCED_KEY] = {
+            "count": group.count,
+            "first_timestamp": data.get("Timestamp"),
+            "last_timestamp": group.last_timestamp,
+            "metadata_samples": group.samples,
+        }
+        entry = LogEntry(
+            partition_key,
+            row_key,
+            data.get("LogLevel"),
+            data.get("Message"),
+            timestamp=data.get("Timestamp"),
+            trace_id=data.get("TraceId"),
+            logger_name=data.get("LoggerName"),
+            location=data.get("Location"),
+            metadata=metadata,
+        )
+        return partition_key, row_key, entry
+
+    async def _write_groups(
+        self, before: Optional[float] = None, raise_errors: bool = True
+    ):
+        """
+        Write the groups whose window closed before a time.
+
+        :param before: The time; None writes every group.
+        :param raise_errors: Raise the error of a failed write. The background
+                             task only reports it through on_error.
+        :raises Exception: If the wrapped storage fails to store the entries and
+                           raise_errors is set.
+        """
+        groups = []
+        for key, group in list(self._groups.items()):
+            if before is None or group.deadline <= before:
+                groups.append(group)
+                del self._groups[key]
+        if groups:
+            await self._store(
+                [self._build_entry(group) for group in groups], raise_errors
+            )
+
+    async def _write_closed_groups(self) -> float:
+        """
+        Write the groups whose window has closed, reporting failures to on_error.
+
+        :return: The number of seconds until the window of the oldest open group
+                 closes, or the window if no group is open.
+        """
+        await self._write_groups(self.clock(), raise_errors=False)
+        if not self._groups:
+            return self.window
+        # Groups are opened in deadline order.
+        deadline = next(iter(self._groups.values())).deadline
+        return max(deadline - self.clock(), 0.0)
+
+    async def _store(self, entries: List[LogTuple], raise_errors: bool = True):
+        """
+        Hand entries to the wrapped storage, reporting failures to on_error.
+
+        :param entries: The entries.
+        :param raise_errors: Raise the error after reporting it.
+        :raises Exception: If the wrapped storage fails to store the entries and
+                           raise_errors is set.
+        """
+        try:
+            await self.storage.store_logs(entries)
+        except Exception as e:  # pylint: disable=broad-except
+            if self.on_error is not None:
+                self.on_error(e, entries)
+            if raise_errors:
+                raise
+
+    async def store_log(self, partition_key: str, row_key: str, data: Dict[str, Any]):
+        """
+        Record a log entry, collapsing it into an earlier occurrence of the same
+        line within the window.
+
+        :param partition_key: The partition key for the log entry.
+        :param row_key: The row key for the log entry.
+        :param data: A dictionary containing the log data.
+        :raises ValueError: If partition_key, row_key, or data is invalid,
+                            or the storage has been closed.
+        """
+        if self._flusher.closed:
+            raise ValueError("Storage is closed")
+        validate_log(partition_key, row_key, data)
+
+        key = (
+            partition_key,
+            data.get("LogLevel"),
+            data.get("LoggerName"),
+            data.get("Location"),
+            data.get("Message"),
+        )
+        metadata = data.get("Metadata")
+        group = self._groups.get(key)
+        if group is not None:
+            group.count += 1
+            group.last_timestamp = data.get("Timestamp")
+            if (
+                metadata
+                and len(group.samples) < self.max_samples
+                and metadata not in group.samples
+            ):
+                group.samples.append(dict(metadata))
+            self.coalesced_entries += 1
+            return
+
+        self._flusher.start()
+        if len(self._groups) >= self.max_groups:
+            oldest = next(iter(self._groups))
+            await self._store([self._build_entry(self._groups.pop(oldest))])
+        if not self._groups:
+            # The background task is not waiting for a deadline: set one.
+            self._flusher.wake()
+        self._groups[key] = _Group(
+            (partition_key, row_key, data),
+            self.clock() + self.window,
+            metadata if self.max_samples else None,
+        )
+
+    async def store_logs(self, entries: Sequence[LogTuple]):
+        """
+        Record several log entries.
+
+        :param entries: A sequence of (partition_key, row_key, data) tuples.
+        """
+        for partition_key, row_key, data in entries:
+            await self.store_log(partition_key, row_key, data)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get the coalescing counters.
+
+        :return: The number of open groups and of entries collapsed into others.
+        """
+        return {
+            "groups": len(self._groups),
+            "coalesced_entries": self.coalesced_entries,
+        }
+
+    async def flush(self):
+        """
+        Write every open group and flush the wrapped storage.
+
+        :raises Exception: If the wrapped storage fails to store the entries.
+        """
+        await self._write_groups()
+        await self.storage.flush()
+
+    async def aclose(self):
+        """
+        Stop the background task, write every open group and close the wrapped
+        storage.
+        """
+        if self._flusher.closed:
+            return
+        await self._flusher.stop()
+        await self._write_groups()
+        await self.storage.aclose()
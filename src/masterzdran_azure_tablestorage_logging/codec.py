@@ -0,0 +1,229 @@
+"""
+Metadata encoding for Azure Table Storage logging module.
+Serializes the Metadata column compactly, optionally compressed, and splits
+payloads larger than a table property across several properties.
+"""
+
+import json
+import zlib
+from typing import Any, Callable, Dict, List, Optional, Union
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+# Azure Tables limits string properties to 64 KiB of UTF-16 (32K code units) and
+# binary properties to 64 KiB; chunks stay a little below both.
+MAX_STRING_UNITS = 32000
+MAX_BINARY_CHUNK = 64000
+# Metadata, Metadata_1 ... Metadata_14 keep the entity under its 1 MiB limit.
+MAX_METADATA_PARTS = 15
+
+METADATA_PROPERTY = "Metadata"
+ENCODING_PROPERTY = "MetadataEncoding"
+PARTS_PROPERTY = "MetadataParts"
+
+_EXTRA_PART_PROPERTIES = [
+    f"{METADATA_PROPERTY}_{index}" for index in range(1, MAX_METADATA_PARTS)
+]
+
+# Every property the codec may write, for query projections.
+METADATA_PROPERTIES = [
+    METADATA_PROPERTY,
+    ENCODING_PROPERTY,
+    PARTS_PROPERTY,
+] + _EXTRA_PART_PROPERTIES
+
+
+def dumps(value: Any) -> str:
+    """
+    Serialize a value to compact JSON, with orjson when it is installed.
+
+    :param value: The value to serialize.
+    :return: The JSON text.
+    :raises TypeError: If the value is not JSON serializable.
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(value).decode("utf-8")
+        except TypeError:
+            # orjson rejects some values json accepts, such as non-str keys.
+            pass
+    return json.dumps(value, separators=(",", ":"))
+
+
+def loads(text: Union[str, bytes]) -> Any:
+    """
+    Parse JSON text, with orjson when it is installed.
+
+    :param text: The JSON text.
+    :return: The parsed value.
+    """
+    if orjson is not None:
+        return orjson.loads(text)
+    return json.loads(text)
+
+
+def _split_text(text: str, max_units: int) -> List[str]:
+    """
+    Split a string into chunks of at most max_units UTF-16 code units, without
+    separating surrogate pairs.
+
+    :param text: The string to split.
+    :param max_units: The maximum number of UTF-16 code units per chunk.
+    :return: The chunks.
+    """
+    if text.isascii():
+        return [text[i : i + max_units] for i in range(0, len(text), max_units)]
+
+    encoded = text.encode("utf-16-le")
+    chunks = []
+    start = 0
+    while start < len(encoded):
+        end = min(start + max_units * 2, len(encoded))
+        if end < len(encoded) and 0xD8 <= encoded[end - 1] <= 0xDB:
+            # Do not end a chunk on a high surrogate.
+            end -= 2
+        chunks.append(encoded[start:end].decode("utf-16-le"))
+        start = end
+    return chunks
+
+
+def _zstd_compressor(level: int) -> Callable[[bytes], bytes]:
+    """
+    Get a zstd compression function.
+
+    :param level: The compression level.
+    :return: A function compressing a payload.
+    :raises ImportError: If zstandard is not installed.
+    """
+    if zstandard is None:
+        raise ImportError("zstd compression requires the zstandard package")
+    return zstandard.ZstdCompressor(level=level).compress
+
+
+def _zstd_decompress(payload: bytes) -> bytes:
+    """
+    Decompress a zstd payload.
+
+    :param payload: The compressed payload.
+    :return: The decompressed payload.
+    :raises ImportError: If zstandard is not installed.
+    """
+    if zstandard is None:
+        raise ImportError("zstd decompression requires the zstandard package")
+    return zstandard.ZstdDecompressor().decompress(payload)
+
+
+class MetadataCodec:
+    """
+    MetadataCodec turns the Metadata of a log entry into table properties and back.
+
+    Metadata is stored as JSON text in the Metadata property, as in 1.0.x. With a
+    compression ("zlib" or "zstd"), payloads of at least compress_threshold
+    characters are stored compressed as a binary property instead, marked by
+    MetadataEncoding. Payloads larger than a property are split across Metadata,
+    Metadata_1, ... with their count in MetadataParts.
+    """
+
+    _compressions = {None, "zlib", "zstd"}
+
+    def __init__(
+        self,
+        compression: Optional[str] = None,
+        compress_threshold: int = 1024,
+        level: Optional[int] = None,
+    ):
+        """
+        Initialize the MetadataCodec instance.
+
+        :param compression: None, "zlib" or "zstd" (requires the zstandard package).
+        :param compress_threshold: The length of the shortest JSON text that is compressed.
+        :param level: The compression level; defaults to 6 for zlib and 3 for zstd.
+        :raises ValueError: If compression or compress_threshold is invalid.
+        :raises ImportError: If zstd is requested and zstandard is not installed.
+        """
+        if compression not in self._compressions:
+            raise ValueError(
+                f"Invalid compression. Must be one of {self._compressions}"
+            )
+        if compress_threshold < 0:
+            raise ValueError("Compress threshold must not be negative")
+
+        self.compression = compression
+        self.compress_threshold = compress_threshold
+        self._compress: Optional[Callable[[bytes], bytes]] = None
+        if compression == "zlib":
+            zlib_level = 6 if level is None else level
+            self._compress = lambda payload: zlib.compress(payload, zlib_level)
+        elif compression == "zstd":
+            self._compress = _zstd_compressor(3 if level is None else level)
+
+    def encode(self, metadata: Any) -> Dict[str, Any]:
+        """
+        Encode metadata as table properties.
+
+        :param metadata: The JSON-serializable metadata of a log entry.
+        :return: The properties to add to the entity.
+        :raises ValueError: If the encoded metadata does not fit in the entity.
+        """
+        # Metadata that caches its JSON text, such as BoundFields, reuses it.
+        to_json = getattr(metadata, "to_json", None)
+        text = to_json() if to_json is not None else dumps(metadata)
+        properties: Dict[str, Any] = {}
+
+        if self._compress is not None and len(text) >= self.compress_threshold:
+            payload = self._compress(text.encode("utf-8"))
+            properties[ENCODING_PROPERTY] = self.compression
+            parts: List[Any] = [
+                payload[i : i + MAX_BINARY_CHUNK]
+                for i in range(0, len(payload), MAX_BINARY_CHUNK)
+            ]
+        elif len(text) <= MAX_STRING_UNITS // 2:
+            # Short enough to fit even if every character needs a surrogate pair.
+            properties[METADATA_PROPERTY] = text
+            return properties
+        else:
+            parts = _split_text(text, MAX_STRING_UNITS)
+
+        if len(parts) > MAX_METADATA_PARTS:
+            raise ValueError("Metadata is too large to store in a table entity")
+        properties[METADATA_PROPERTY] = parts[0]
+        if len(parts) > 1:
+            for index, part in enumerate(parts[1:], start=1):
+                properties[f"{METADATA_PROPERTY}_{index}"] = part
+            properties[PARTS_PROPERTY] = len(parts)
+        return properties
+
+    @staticmethod
+    def decode(entity: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Reassemble the Metadata of a stored entity in place.
+
+        Split and compressed payloads are joined and decompressed, so Metadata
+        holds the JSON text whichever codec wrote the entity; the codec's own
+        properties are removed.
+
+        :param entity: The entity as read from the table.
+        :return: The same entity.
+        """
+        parts = entity.pop(PARTS_PROPERTY, None)
+        encoding = entity.pop(ENCODING_PROPERTY, None)
+        value = entity.get(METADATA_PROPERTY)
+        extra = [entity.pop(name, None) for name in _EXTRA_PART_PROPERTIES]
+        if parts:
+            separator = b"" if isinstance(value, bytes) else ""
+            value = separator.join([value] + extra[: parts - 1])
+        if encoding == "zlib":
+            value = zlib.decompress(value).decode("utf-8")
+        elif encoding == "zstd":
+            value = _zstd_decompress(value).decode("utf-8")
+        if value is not None:
+            entity[METADATA_PROPERTY] = value
+        return entity
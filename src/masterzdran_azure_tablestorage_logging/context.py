@@ -0,0 +1,212 @@
+"""
+Logging context for Azure Table Storage logging module.
+Propagates the trace ID and metadata fields of the current request through
+asyncio tasks and threads with contextvars.
+"""
+
+import contextvars
+import functools
+from collections.abc import Mapping
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional, TypeVar
+
+from .codec import dumps
+
+T = TypeVar("T")
+
+
+class BoundFields(dict):
+    """
+    BoundFields is an immutable dictionary of metadata fields that are attached
+    to many log entries, serialized to JSON once and reused by every entry.
+
+    extend() returns new fields; when no field is overridden, their JSON text is
+    spliced from the cached text and the added fields. layer() gives the
+    metadata of a single log call as a LayeredFields view, without copying the
+    bound fields. Modifying the fields in place raises TypeError, so entries
+    can share them safely.
+    """
+
+    __slots__ = ("_text",)
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self._text: Optional[str] = None
+
+    def _read_only(self, *args: Any, **kwargs: Any):
+        """
+        Refuse to modify the fields.
+
+        :raises TypeError: Always.
+        """
+        raise TypeError("BoundFields cannot be modified; use extend()")
+
+    __setitem__ = __delitem__ = __ior__ = _read_only
+    clear = pop = popitem = setdefault = update = _read_only
+
+    def __reduce__(self):
+        return type(self), (dict(self),)
+
+    @classmethod
+    def _with_text(cls, fields: Dict[str, Any], text: str) -> "BoundFields":
+        """
+        Create fields whose JSON text is already known.
+
+        :param fields: The fields.
+        :param text: Their JSON object text.
+        :return: The fields.
+        """
+        bound = cls(fields)
+        bound._text = text
+        return bound
+
+    def to_json(self) -> str:
+        """
+        Get the JSON text of the fields, serializing them on first use.
+
+        :return: The JSON object text.
+        """
+        if self._text is None:
+            self._text = dumps(dict(self))
+        return self._text
+
+    def extend(self, fields: Dict[str, Any]) -> "BoundFields":
+        """
+        Get these fields with more fields added.
+
+        :param fields: The added fields, overriding fields of the same name.
+        :return: The combined fields, or these fields if none are added.
+        """
+        if not fields:
+            return self
+        combined = {**self, **fields}
+        if not self or any(name in self for name in fields):
+            # Overridden fields are serialized again rather than repeated.
+            return BoundFields(combined)
+        base = self.to_json()
+        text = dumps(fields)
+        return BoundFields._with_text(combined, f"{base[:-1]},{text[1:]}")
+
+    def layer(self, fields: Optional[Dict[str, Any]]) -> Any:
+        """
+        Get the metadata of a log call: its fields over these, without copying
+        these, so the cost does not depend on how many fields are bound.
+
+        :param fields: The fields of the call, overriding fields of the same name.
+        :return: A LayeredFields view, or the fields alone if either is empty.
+        """
+        if not fields:
+            return self
+        if not self:
+            return fields
+        return LayeredFields(self, fields)
+
+
+class LayeredFields(Mapping):
+    """
+    LayeredFields is the read-only metadata of one log call: the call's own
+    fields over shared BoundFields, which are referenced rather than copied.
+
+    Overrides are resolved when a field is read. The JSON text splices the
+    cached text of the bound fields with the call's fields; only a call that
+    overrides a bound field serializes the combination.
+    """
+
+    __slots__ = ("base", "fields")
+
+    def __init__(self, base: BoundFields, fields: Dict[str, Any]):
+        self.base = base
+        self.fields = fields
+
+    def __getitem__(self, key: str) -> Any:
+        if key in self.fields:
+            return self.fields[key]
+        return self.base[key]
+
+    def __iter__(self) -> Iterator[str]:
+        yield from self.base
+        for key in self.fields:
+            if key not in self.base:
+                yield key
+
+    def __len__(self) -> int:
+        return len(self.base) + sum(1 for key in self.fields if key not in self.base)
+
+    def __repr__(self) -> str:
+        return f"LayeredFields({dict(self)!r})"
+
+    def to_json(self) -> str:
+        """
+        Get the JSON text of the combined fields.
+
+        :return: The JSON object text.
+        """
+        if any(key in self.base for key in self.fields):
+            # Overridden fields are serialized again rather than repeated.
+            return dumps({**self.base, **self.fields})
+        return f"{self.base.to_json()[:-1]},{dumps(self.fields)[1:]}"
+
+
+# The fields of a logger or context without any bound fields.
+EMPTY_FIELDS = BoundFields()
+
+_trace_id: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar(
+    "azure_table_logging_trace_id", default=None
+)
+_fields: contextvars.ContextVar[BoundFields] = contextvars.ContextVar(
+    "azure_table_logging_fields", default=EMPTY_FIELDS
+)
+
+
+def get_trace_id() -> Optional[str]:
+    """
+    Get the trace ID of the current context.
+
+    :return: The trace ID, or None if none is set.
+    """
+    return _trace_id.get()
+
+
+def get_context_fields() -> BoundFields:
+    """
+    Get the metadata fields of the current context.
+
+    :return: The fields, empty if none are set.
+    """
+    return _fields.get()
+
+
+@contextmanager
+def log_context(trace_id: Optional[str] = None, **fields: Any) -> Iterator[None]:
+    """
+    Set the trace ID and add metadata fields for the log entries of a block.
+
+    Loggers use the trace ID when a call passes none, and add the fields to the
+    metadata of every entry, below their own bound fields and the call's
+    metadata. The fields are serialized once, when the block is entered. Tasks
+    created inside the block inherit the context; use with_context to carry it
+    to executor threads.
+
+    :param trace_id: The trace ID, or None to keep the current one.
+    :param fields: Metadata fields added to the current ones.
+    """
+    trace_token = _trace_id.set(trace_id) if trace_id is not None else None
+    fields_token = _fields.set(_fields.get().extend(fields)) if fields else None
+    try:
+        yield
+    finally:
+        if fields_token is not None:
+            _fields.reset(fields_token)
+        if trace_token is not None:
+            _trace_id.reset(trace_token)
+
+
+def with_context(function: Callable[..., T]) -> Callable[..., T]:
+    """
+    Bind a function to a copy of the current context, for thread pools that do
+    not propagate it, such as loop.run_in_executor.
+
+    :param function: The function.
+    :return: A callable running the function in the copied context.
+    """
+    return functools.partial(contextvars.copy_context().run, function)
@@ -0,0 +1,16 @@
+"""
+Exceptions for Azure Table Storage logging module.
+"""
+
+
+class StorageError(Exception):
+    """
+    Raised when a storage operation fails. The underlying error is chained as
+    __cause__.
+    """
+
+
+class CircuitOpenError(StorageError):
+    """
+    Raised when a storage operation is refused because its circuit breaker is open.
+    """
@@ -0,0 +1,520 @@
+"""
+Bulk export for Azure Table Storage logging module.
+Streams the logs of partitions or a time range to compressed, chunked files
+for offline analysis: Parquet when pyarrow is installed, gzip NDJSON otherwise.
+
+Run it with: azure-table-logs-export --help
+"""
+
+import argparse
+import asyncio
+import base64
+import gzip
+import importlib.util
+import json
+import os
+import re
+from datetime import datetime
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from .codec import METADATA_PROPERTIES
+from .query import Filters, quote
+from .storage import AzureTableStorage
+from .storage_base import MAX_QUERY_PAGE_SIZE, TableStorageBase
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # pragma: no cover - optional dependency
+    pyarrow = None
+
+# The columns of an exported log entry.
+EXPORT_COLUMNS = [
+    field
+    for field in TableStorageBase.select_fields
+    if field not in METADATA_PROPERTIES
+] + ["Metadata"]
+
+CHECKPOINT_FILE = "_checkpoint.json"
+
+_UNSAFE_FILE_CHARACTERS = re.compile(r"[^A-Za-z0-9_.-]")
+
+
+def _cell(value: Any) -> Any:
+    """
+    Convert a property value to a JSON value.
+
+    :param value: The property value.
+    :return: The value, with datetimes as ISO 8601 text and bytes as base64.
+    """
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, (bytes, bytearray)):
+        return base64.b64encode(value).decode("ascii")
+    return value
+
+
+class _NdjsonChunk:
+    """
+    A gzip-compressed newline-delimited JSON chunk file, written as rows arrive.
+    """
+
+    extension = ".ndjson.gz"
+
+    def __init__(self, path: str, columns: List[str]):
+        self.columns = columns
+        self._file = gzip.open(path, "wt", encoding="utf-8")
+
+    def write(self, rows: List[Dict[str, Any]]):
+        """
+        Append rows to the file, one JSON object per line.
+
+        :param rows: The decoded entities.
+        """
+        for row in rows:
+            record = {column: _cell(row.get(column)) for column in self.columns}
+            self._file.write(json.dumps(record, separators=(",", ":")) + "\n")
+
+    def close(self):
+        """
+        Flush and close the file.
+        """
+        self._file.close()
+
+
+class _ParquetChunk:
+    """
+    A Parquet chunk file, one row group per service page. Columns are strings,
+    except non-string values are written as their JSON text.
+    """
+
+    extension = ".parquet"
+
+    def __init__(self, path: str, columns: List[str]):
+        self.columns = columns
+        self._schema = pyarrow.schema(
+            [(column, pyarrow.string()) for column in columns]
+        )
+        self._writer = pyarrow.parquet.ParquetWriter(
+            path, self._schema, compression="zstd"
+        )
+
+    def write(self, rows: List[Dict[str, Any]]):
+        """
+        Append rows to the file as one row group.
+
+        :param rows: The decoded entities.
+        """
+        data = {
+            column: [self._text(row.get(column)) for row in rows]
+            for column in self.columns
+        }
+        self._writer.write_table(pyarrow.table(data, schema=self._schema))
+
+    @staticmethod
+    def _text(value: Any) -> Optional[str]:
+        """
+        Convert a property value to the text of a string column.
+
+        :param value: The property value.
+        :return: The text, or None for a missing value.
+        """
+        value = _cell(value)
+        if value is None or isinstance(value, str):
+            return value
+        return json.dumps(value)
+
+    def close(self):
+        """
+        Write the Parquet footer and close the file.
+        """
+        self._writer.close()
+
+
+class _Checkpoint:
+    """
+    The progress of an export, saved atomically after every finished chunk.
+    """
+
+    def __init__(self, directory: str, query: Dict[str, Any]):
+        """
+        Load the checkpoint of the directory, or start a new one.
+
+        :param directory: The export directory.
+        :param query: The export parameters; resuming needs the same ones.
+        :raises ValueError: If the directory holds the checkpoint of another export.
+        """
+        self.path = os.path.join(directory, CHECKPOINT_FILE)
+        self.scopes: Dict[str, Dict[str, Any]] = {}
+        if os.path.exists(self.path):
+            with open(self.path, "r", encoding="utf-8") as file:
+                saved = json.load(file)
+            if saved.get("query") != query:
+                raise ValueError("The directory holds the checkpoint of another export")
+            self.scopes = saved["scopes"]
+        self.query = query
+
+    def save(self):
+        """
+        Write the checkpoint to a temporary file and rename it over the previous
+        one, so an interrupted save keeps the previous checkpoint.
+        """
+        temporary = f"{self.path}.tmp"
+        with open(temporary, "w", encoding="utf-8") as file:
+            json.dump({"query": self.query, "scopes": self.scopes}, file)
+        os.replace(temporary, self.path)
+
+
+class _ExportPlan(NamedTuple):
+    """
+    The settings shared by the partition readers of an export.
+    """
+
+    storage: TableStorageBase
+    directory: str
+    base_filter: str
+    columns: List[str]
+    file_format: str
+    chunk_entries: int
+    page_size: int
+
+    @property
+    def chunk_type(self) -> Any:
+        """
+        The class of the chunk files.
+        """
+        return _ParquetChunk if self.file_format == "parquet" else _NdjsonChunk
+
+    @property
+    def fields(self) -> List[str]:
+        """
+        The fetched columns. The keys are always fetched: the checkpoint resumes
+        after the last one.
+        """
+        return ["PartitionKey", "RowKey"] + self.columns
+
+    def chunk_path(self, scope: str, number: int) -> str:
+        """
+        Get the path of a chunk file.
+
+        :param scope: The name of the scope the chunk belongs to.
+        :param number: The position of the chunk in its scope.
+        :return: The path.
+        """
+        prefix = _UNSAFE_FILE_CHARACTERS.sub("_", scope)
+        return os.path.join(
+            self.directory, f"{prefix}-{number:05d}{self.chunk_type.extension}"
+        )
+
+
+async def export_logs(
+    storage: TableStorageBase,
+    directory: str,
+    *,
+    logger_names: Optional[Sequence[str]] = None,
+    partition_keys: Optional[Sequence[str]] = None,
+    start_time: Optional[datetime] = None,
+    end_time: Optional[datetime] = None,
+    filters: Optional[Filters] = None,
+    select: Optional[Sequence[str]] = None,
+    file_format: str = "auto",
+    chunk_entries: int = 100000,
+    page_size: int = 1000,
+    max_concurrency: int = 4,
+) -> Dict[str, Any]:
+    """
+    Export logs to chunked files in a directory.
+
+    Every partition is streamed by its own reader, at most max_concurrency at a
+    time, into files of at most chunk_entries entries named
+    <partition>-<chunk>.ndjson.gz or .parquet. Each reader holds one service
+    page in memory. A chunk is written to a temporary file and renamed when
+    complete, and the checkpoint then records the last key exported; running
+    the same export into the same directory again resumes after it.
+
+    :param storage: The table storage to read.
+    :param directory: The directory of the files, created if missing.
+    :param logger_names: Export the partitions of these loggers.
+    :param partition_keys: Export these partitions; with neither, the whole
+                           table is read by one reader.
+    :param start_time: Only export entries logged at or after this UTC time.
+    :param end_time: Only export entries logged at or before this UTC time.
+    :param filters: A dictionary of property values, or a query Predicate.
+    :param select: Only export these columns.
+    :param file_format: "parquet", "ndjson", or "auto" for Parquet when pyarrow
+                        is installed.
+    :param chunk_entries: The maximum number of entries per file.
+    :param page_size: The number of entities per service page, at most 1000.
+    :param max_concurrency: The maximum number of concurrent partition readers.
+    :return: The number of entries and the files written by this run.
+    :raises ValueError: If an argument is invalid, or the directory holds the
+                        checkpoint of another export.
+    """
+    if file_format == "auto":
+        file_format = "parquet" if pyarrow is not None else "ndjson"
+    if file_format not in ("parquet", "ndjson"):
+        raise ValueError("Invalid file format. Must be one of {'parquet', 'ndjson'}")
+    if file_format == "parquet" and pyarrow is None:
+        raise ValueError("Parquet export needs pyarrow installed")
+    if chunk_entries <= 0:
+        raise ValueError("Chunk entries must be positive")
+    if max_concurrency <= 0:
+        raise ValueError("Max concurrency must be positive")
+    if page_size <= 0:
+        raise ValueError("Page size must be positive")
+    if page_size > MAX_QUERY_PAGE_SIZE:
+        raise ValueError(f"Page size must be at most {MAX_QUERY_PAGE_SIZE}")
+
+    plan = _ExportPlan(
+        storage,
+        directory,
+        storage.query_filter(filters, start_time, end_time),
+        list(select) if select is not None else EXPORT_COLUMNS,
+        file_format,
+        chunk_entries,
+        page_size,
+    )
+    scopes = _scopes(storage, logger_names, partition_keys, start_time, end_time)
+    return await _export_scopes(plan, scopes, max_concurrency)
+
+
+def _scopes(
+    storage: TableStorageBase,
+    logger_names: Optional[Sequence[str]],
+    partition_keys: Optional[Sequence[str]],
+    start_time: Optional[datetime],
+    end_time: Optional[datetime],
+) -> List[Tuple[str, str]]:
+    """
+    Get the name and PartitionKey condition of every reader of an export.
+
+    :return: The scopes; an empty condition reads every partition.
+    """
+    if partition_keys is not None:
+        return [(key, f"PartitionKey eq {quote(key)}") for key in partition_keys]
+    if logger_names is None:
+        return [("table", "")]
+    scopes = []
+    for logger_name in logger_names:
+        keys = storage.partition_strategy.partition_keys_for_range(
+            logger_name, start_time, end_time
+        )
+        if keys is None:
+            condition = storage.partition_filters(logger_name, start_time, end_time)
+            scopes.append((logger_name, condition[0]))
+        else:
+            scopes.extend((key, f"PartitionKey eq {quote(key)}") for key in keys)
+    return scopes
+
+
+async def _export_scopes(
+    plan: _ExportPlan, scopes: List[Tuple[str, str]], max_concurrency: int
+) -> Dict[str, Any]:
+    """
+    Stream every scope into chunk files, at most max_concurrency at a time.
+
+    :param plan: The export settings.
+    :param scopes: The name and PartitionKey condition of every scope.
+    :param max_concurrency: The maximum number of concurrent scope readers.
+    :return: The number of entries and the files written by this run.
+    :raises ValueError: If the directory holds the checkpoint of another export.
+    """
+    os.makedirs(plan.directory, exist_ok=True)
+    checkpoint = _Checkpoint(
+        plan.directory,
+        {
+            "table": getattr(plan.storage, "table_name", None),
+            "filter": plan.base_filter,
+            "scopes": [name for name, _ in scopes],
+            "columns": plan.columns,
+            "format": plan.file_format,
+            "chunk_entries": plan.chunk_entries,
+        },
+    )
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def export_scope(name: str, condition: str) -> List[Tuple[str, int]]:
+        progress = checkpoint.scopes.setdefault(
+            name, {"chunks": 0, "after": None, "entries": 0, "done": False}
+        )
+        if progress["done"]:
+            return []
+        async with semaphore:
+            return await _export_scope(plan, checkpoint, name, condition)
+
+    written = await asyncio.gather(
+        *(export_scope(name, condition) for name, condition in scopes)
+    )
+    chunks = [chunk for scope in written for chunk in scope]
+    return {
+        "entries": sum(entries for _, entries in chunks),
+        "files": sorted(path for path, _ in chunks),
+        "format": plan.file_format,
+    }
+
+
+def _resume_filter(condition: str, base_filter: str, after: Optional[List[str]]) -> str:
+    """
+    Build the query filter of a scope, resuming after its last exported key.
+
+    :param condition: The PartitionKey condition of the scope.
+    :param base_filter: The filter of the export.
+    :param after: The PartitionKey and RowKey of the last exported entry, or None.
+    :return: The query filter.
+    """
+    conditions = [c for c in (condition, base_filter) if c]
+    if after is not None:
+        partition_key, row_key = after
+        conditions.append(
+            f"((PartitionKey eq {quote(partition_key)} and RowKey gt {quote(row_key)})"
+            f" or PartitionKey gt {quote(partition_key)})"
+        )
+    return " and ".join(conditions)
+
+
+async def _export_scope(
+    plan: _ExportPlan, checkpoint: _Checkpoint, name: str, condition: str
+) -> List[Tuple[str, int]]:
+    """
+    Stream one scope into chunk files, resuming after its checkpoint.
+
+    :param plan: The export settings.
+    :param checkpoint: The checkpoint, saved after every finished chunk.
+    :param name: The name of the scope.
+    :param condition: The PartitionKey condition of the scope.
+    :return: The path and number of entries of every chunk written.
+    """
+    progress = checkpoint.scopes[name]
+    query_filter = _resume_filter(condition, plan.base_filter, progress["after"])
+    written: List[Tuple[str, int]] = []
+
+    chunk = None
+    chunk_rows = 0
+    last: Optional[Tuple[str, str]] = None
+
+    def finish_chunk():
+        chunk.close()
+        path = plan.chunk_path(name, progress["chunks"])
+        os.replace(path + ".tmp", path)
+        written.append((path, chunk_rows))
+        progress["chunks"] += 1
+        progress["entries"] += chunk_rows
+        progress["after"] = list(last)
+        checkpoint.save()
+
+    continuation = None
+    try:
+        while True:
+            rows, continuation = await plan.storage.scan_page(
+                query_filter, plan.page_size, continuation, plan.fields
+            )
+            while rows:
+                if chunk is None:
+                    chunk = plan.chunk_type(
+                        plan.chunk_path(name, progress["chunks"]) + ".tmp",
+                        plan.columns,
+                    )
+                    chunk_rows = 0
+                taken = rows[: plan.chunk_entries - chunk_rows]
+                rows = rows[len(taken) :]
+                chunk.write(taken)
+                chunk_rows += len(taken)
+                last = (taken[-1]["PartitionKey"], taken[-1]["RowKey"])
+                if chunk_rows == plan.chunk_entries:
+                    finish_chunk()
+                    chunk = None
+            if continuation is None:
+                break
+        if chunk is not None:
+            finish_chunk()
+            chunk = None
+    finally:
+        if chunk is not None:
+            chunk.close()
+    progress["done"] = True
+    checkpoint.save()
+    return written
+
+
+def _parse_time(text: str) -> datetime:
+    """
+    Parse a time argument of the command line.
+
+    :param text: An ISO 8601 time.
+    :return: The time.
+    """
+    return datetime.fromisoformat(text)
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    """
+    Run an export from the command line and print the result as JSON.
+
+    :param argv: The command line arguments; defaults to sys.argv.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--connection-string",
+        default=os.environ.get("AZURE_STORAGE_CONNECTION_STRING"),
+        help="defaults to $AZURE_STORAGE_CONNECTION_STRING",
+    )
+    parser.add_argument("--table", required=True)
+    parser.add_argument("--output", required=True, help="the export directory")
+    parser.add_argument("--logger", action="append", dest="logger_names")
+    parser.add_argument("--partition", action="append", dest="partition_keys")
+    parser.add_argument("--start", type=_parse_time, help="ISO 8601 UTC time")
+    parser.add_argument("--end", type=_parse_time, help="ISO 8601 UTC time")
+    parser.add_argument(
+        "--format", choices=["auto", "parquet", "ndjson"], default="auto"
+    )
+    parser.add_argument("--chunk-entries", type=int, default=100000)
+    parser.add_argument("--page-size", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument(
+        "--ascending-row-keys", dest="descending_row_keys", action="store_false"
+    )
+    args = parser.parse_args(argv)
+    if not args.connection_string:
+        parser.error(
+            "--connection-string or $AZURE_STORAGE_CONNECTION_STRING is required"
+        )
+
+    async def run():
+        # Partition readers only overlap on the asynchronous client.
+        if importlib.util.find_spec("aiohttp") is not None:
+            from .async_storage import (  # pylint: disable=import-outside-toplevel
+                AsyncAzureTableStorage,
+            )
+
+            storage = AsyncAzureTableStorage(
+                args.connection_string,
+                args.table,
+                descending_row_keys=args.descending_row_keys,
+            )
+        else:
+            storage = AzureTableStorage(
+                args.connection_string,
+                args.table,
+                descending_row_keys=args.descending_row_keys,
+            )
+        try:
+            return await export_logs(
+                storage,
+                args.output,
+                logger_names=args.logger_names,
+                partition_keys=args.partition_keys,
+                start_time=args.start,
+                end_time=args.end,
+                file_format=args.format,
+                chunk_entries=args.chunk_entries,
+                page_size=args.page_size,
+                max_concurrency=args.concurrency,
+            )
+        finally:
+            await storage.aclose()
+
+    print(json.dumps(asyncio.run(run()), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+"""
+Fan-out queries for Azure Table Storage logging module.
+Reads several partitions concurrently and merges their time-ordered pages into
+one globally ordered page.
+"""
+
+import asyncio
+import heapq
+from collections import deque
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Deque,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+from .paging import decode_token, encode_token
+
+# Fetches one service page of a partition:
+# (partition index, last RowKey returned, service continuation, page size)
+# -> (entities, service continuation of the next page).
+PageFetcher = Callable[
+    [int, Optional[str], Optional[Dict[str, str]], int],
+    Awaitable[Tuple[List[Dict[str, Any]], Optional[Dict[str, str]]]],
+]
+
+# Position of a partition in a merged query: (last RowKey returned, exhausted).
+PartitionPosition = Tuple[Optional[str], bool]
+
+
+class _PartitionStream:
+    """
+    The fetched but not yet returned entities of one partition.
+    """
+
+    __slots__ = ("index", "after", "buffer", "continuation", "exhausted", "last")
+
+    def __init__(self, index: int, after: Optional[str]):
+        self.index = index
+        self.after = after
+        self.buffer: Deque[Dict[str, Any]] = deque()
+        self.continuation: Optional[Dict[str, str]] = None
+        self.exhausted = False
+        self.last = after
+
+
+class FanOutMerge:
+    """
+    FanOutMerge builds one page from several partitions that each return their
+    entities in RowKey order. Every partition is fetched concurrently, within
+    max_concurrency, and the streams are merged with a heap: the page holds the
+    page_size entities with the lowest RowKeys across all partitions, which is
+    the global time order of the RowKey layout.
+
+    A partition whose buffered entities run out is refilled before the merge
+    goes on, so the page is exact. The position of every partition is the last
+    RowKey it returned, so resuming reads each partition from just after it.
+    """
+
+    def __init__(
+        self, fetch: PageFetcher, partition_count: int, max_concurrency: int = 8
+    ):
+        """
+        Initialize the FanOutMerge instance.
+
+        :param fetch: Fetches one service page of a partition.
+        :param partition_count: The number of partitions merged.
+        :param max_concurrency: The maximum number of concurrent fetches.
+        :raises ValueError: If partition_count or max_concurrency is not positive.
+        """
+        if partition_count <= 0:
+            raise ValueError("At least one partition is required")
+        if max_concurrency <= 0:
+            raise ValueError("Max concurrency must be positive")
+
+        self.fetch = fetch
+        self.partition_count = partition_count
+        self.max_concurrency = max_concurrency
+
+    async def _refill(
+        self, stream: _PartitionStream, page_size: int, semaphore: asyncio.Semaphore
+    ):
+        """
+        Fetch pages of a partition until it has buffered entities or is exhausted.
+
+        :param stream: The partition stream.
+        :param page_size: The maximum number of entities to fetch.
+        :param semaphore: Limits the concurrent fetches.
+        """
+        while not stream.buffer and not stream.exhausted:
+            async with semaphore:
+                page, continuation = await self.fetch(
+                    stream.index, stream.after, stream.continuation, page_size
+                )
+            stream.buffer.extend(page)
+            stream.continuation = continuation
+            stream.exhausted = continuation is None
+
+    async def page(
+        self,
+        page_size: int,
+        positions: Optional[Sequence[PartitionPosition]] = None,
+    ) -> Tuple[List[Dict[str, Any]], Optional[List[PartitionPosition]]]:
+        """
+        Build the next merged page.
+
+        :param page_size: The maximum number of entities in the page.
+        :param positions: The partition positions returned with the previous page,
+                          or None to start from the beginning.
+        :return: The entities in RowKey order, and the positions to resume from,
+                 or None when every partition is exhausted.
+        :raises ValueError: If positions does not match the partitions.
+        """
+        if positions is None:
+            positions = [(None, False)] * self.partition_count
+        if len(positions) != self.partition_count:
+            raise ValueError("Invalid continuation token")
+
+        streams = [
+            _PartitionStream(index, after)
+            for index, (after, done) in enumerate(positions)
+            if not done
+        ]
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        await asyncio.gather(
+            *(self._refill(stream, page_size, semaphore) for stream in streams)
+        )
+
+        heap = [
+            (stream.buffer[0]["RowKey"], stream.index, stream)
+            for stream in streams
+            if stream.buffer
+        ]
+        heapq.heapify(heap)
+        logs: List[Dict[str, Any]] = []
+        while heap and len(logs) < page_size:
+            _, index, stream = heapq.heappop(heap)
+            entity = stream.buffer.popleft()
+            logs.append(entity)
+            stream.last = entity["RowKey"]
+            if len(logs) >= page_size:
+                break
+            if not stream.buffer:
+                await self._refill(stream, page_size - len(logs), semaphore)
+            if stream.buffer:
+                heapq.heappush(heap, (stream.buffer[0]["RowKey"], index, stream))
+
+        remaining = {stream.index: stream for stream in streams}
+        next_positions: List[PartitionPosition] = []
+        for index, (after, _) in enumerate(positions):
+            stream = remaining.get(index)
+            if stream is None or (stream.exhausted and not stream.buffer):
+                next_positions.append((after if stream is None else stream.last, True))
+            else:
+                next_positions.append((stream.last, False))
+        if all(done for _, done in next_positions):
+            return logs, None
+        return logs, next_positions
+
+    async def page_from_token(
+        self, page_size: int, continuation_token: Optional[str] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Build the next merged page, resuming from an opaque continuation token.
+
+        :param page_size: The maximum number of entities in the page.
+        :param continuation_token: The token returned with the previous page, or
+                                   None to start from the beginning.
+        :return: The entities in RowKey order, and the token of the next page, or
+                 None when every partition is exhausted.
+        :raises ValueError: If the continuation token is invalid.
+        """
+        position = decode_token(continuation_token)
+        try:
+            positions = None if position is None else [tuple(p) for p in position["m"]]
+        except (KeyError, TypeError) as e:
+            raise ValueError("Invalid continuation token") from e
+        logs, next_positions = await self.page(page_size, positions)
+        if next_positions is None:
+            return logs, None
+        return logs, encode_token({"m": next_positions})
@@ -0,0 +1,310 @@
+"""
+Standard library logging integration for Azure Table Storage logging module.
+Routes logging.LogRecord objects through a queue to a listener thread that
+writes them to a StorageInterface in batches.
+"""
+
+import asyncio
+import contextlib
+import logging
+import logging.handlers
+import queue
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from .context import get_context_fields, get_trace_id
+from .interfaces import StorageInterface
+from .keys import EPOCH_TICKS, get_row_key_generator, ticks_to_datetime
+from .models import LogEntry
+
+# LogRecord attributes that are not user-supplied extras.
+_RECORD_ATTRIBUTES = frozenset(
+    vars(logging.LogRecord("", 0, "", 0, "", (), None)).keys()
+) | {"message", "asctime", "trace_id", "taskName"}
+
+_JSON_TYPES = (str, int, float, bool, type(None), list, dict)
+
+
+def record_to_entry(
+    record: logging.LogRecord,
+    storage: StorageInterface,
+    default_trace_id: Optional[str] = None,
+) -> Tuple[str, str, Dict[str, Any]]:
+    """
+    Map a LogRecord onto the log entry schema of the storage.
+
+    levelname, name and pathname:lineno become LogLevel, LoggerName and
+    Location; a trace_id extra becomes the TraceId and the other extras become
+    the Metadata. Extras that are not JSON types are stored as strings.
+
+    :param record: The log record, already prepared by the handler.
+    :param storage: The storage whose RowKey layout and partition strategy apply.
+    :param default_trace_id: The trace ID for records without a trace_id extra.
+    :return: A (partition_key, row_key, data) tuple, data being a LogEntry.
+    """
+    ticks, row_key = get_row_key_generator(storage.descending_row_keys).next_key(
+        int(record.created * 10_000_000) + EPOCH_TICKS
+    )
+    timestamp = ticks_to_datetime(ticks)
+    metadata = {
+        key: value if isinstance(value, _JSON_TYPES) else str(value)
+        for key, value in vars(record).items()
+        if key not in _RECORD_ATTRIBUTES
+    }
+    partition_key = storage.partition_strategy.partition_key(
+        record.name, timestamp, row_key
+    )
+    data = LogEntry(
+        partition_key,
+        row_key,
+        record.levelname,
+        record.getMessage(),
+        timestamp=timestamp.isoformat(),
+        trace_id=getattr(record, "trace_id", None) or default_trace_id,
+        logger_name=record.name,
+        location=f"{record.pathname}:{record.lineno}",
+        metadata=metadata,
+    )
+    return partition_key, row_key, data
+
+
+# Queue marker asking the listener to stop.
+_STOP = object()
+
+
+class _FlushRequest:
+    """
+    Queue marker asking the listener to write everything queued before it.
+    """
+
+    def __init__(self):
+        self.done = threading.Event()
+
+
+class AzureTableListener:
+    """
+    AzureTableListener drains a queue of LogRecords on a dedicated thread running
+    its own event loop, and writes the records to the storage with store_logs in
+    batches of up to max_batch_size, at least every flush_interval seconds.
+    """
+
+    def __init__(
+        self,
+        record_queue: "queue.Queue[Any]",
+        storage: StorageInterface,
+        max_batch_size: int = 100,
+        flush_interval: float = 1.0,
+        default_trace_id: Optional[str] = None,
+    ):
+        """
+        Initialize the AzureTableListener instance.
+
+        :param record_queue: The queue the records are read from.
+        :param storage: The storage the records are written to. It is only used
+                        from the listener thread and is closed by stop().
+        :param max_batch_size: The maximum number of records per store_logs call.
+        :param flush_interval: The maximum number of seconds a record waits.
+        :param default_trace_id: The trace ID for records without a trace_id extra.
+        :raises ValueError: If max_batch_size or flush_interval is not positive.
+        """
+        if max_batch_size <= 0:
+            raise ValueError("Max batch size must be positive")
+        if flush_interval <= 0:
+            raise ValueError("Flush interval must be positive")
+
+        self.queue = record_queue
+        self.storage = storage
+        self.max_batch_size = max_batch_size
+        self.flush_interval = flush_interval
+        self.default_trace_id = default_trace_id
+        self.failed_records = 0
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """
+        Start the listener thread.
+        """
+        self._thread = threading.Thread(
+            target=self._run, name="AzureTableListener", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        """
+        Write the remaining records, close the storage and stop the thread.
+        """
+        if self._thread is None:
+            return
+        self.queue.put(_STOP)
+        self._thread.join()
+        self._thread = None
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until every record queued so far has been handed to the storage,
+        and the storage has been flushed.
+
+        :param timeout: The maximum number of seconds to wait, or None.
+        :return: False if the timeout elapsed first.
+        """
+        if self._thread is None:
+            return True
+        request = _FlushRequest()
+        self.queue.put(request)
+        return request.done.wait(timeout)
+
+    def _next_batch(self) -> Tuple[List[logging.LogRecord], Any]:
+        """
+        Collect records until the batch is full, the flush interval elapses, or
+        a control marker arrives.
+
+        :return: The records and the control marker received, or None.
+        """
+        records: List[logging.LogRecord] = []
+        item = self.queue.get()
+        if not isinstance(item, logging.LogRecord):
+            return records, item
+        records.append(item)
+
+        deadline = time.monotonic() + self.flush_interval
+        while len(records) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self.queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if not isinstance(item, logging.LogRecord):
+                return records, item
+            records.append(item)
+        return records, None
+
+    def _run(self):
+        """
+        Listener thread body.
+        """
+        loop = asyncio.new_event_loop()
+        try:
+            while True:
+                records, marker = self._next_batch()
+                if records:
+                    self._write(loop, records)
+                if marker is _STOP:
+                    break
+                if marker is not None:
+                    # Buffering storages keep or report the entries they fail
+                    # to write; the flush request completes either way.
+                    with contextlib.suppress(Exception):
+                        loop.run_until_complete(self.storage.flush())
+                    marker.done.set()
+            loop.run_until_complete(self.storage.aclose())
+        finally:
+            loop.close()
+
+    def _write(self, loop: asyncio.AbstractEventLoop, records: List[logging.LogRecord]):
+        """
+        Map a batch of records and store it, counting records that fail.
+
+        :param loop: The listener's event loop.
+        :param records: The records to store.
+        """
+        try:
+            entries = [
+                record_to_entry(record, self.storage, self.default_trace_id)
+                for record in records
+            ]
+            loop.run_until_complete(self.storage.store_logs(entries))
+        except Exception:  # pylint: disable=broad-except
+            self.failed_records += len(records)
+
+
+class AzureTableHandler(logging.handlers.QueueHandler):
+    """
+    AzureTableHandler is a logging.Handler that stores records in Azure Table
+    Storage without blocking the logging thread.
+
+    emit() only formats the record and puts it on a bounded queue, which is safe
+    from any thread. An AzureTableListener thread batches the queued records into
+    the storage. Records that do not fit in the queue are dropped and counted.
+    """
+
+    def __init__(
+        self,
+        storage: StorageInterface,
+        level: int = logging.NOTSET,
+        *,
+        max_queue_size: int = 10000,
+        max_batch_size: int = 100,
+        flush_interval: float = 1.0,
+        default_trace_id: Optional[str] = None,
+    ):
+        """
+        Initialize the AzureTableHandler instance and start its listener thread.
+
+        :param storage: The storage the records are written to, e.g. an
+                        AsyncAzureTableStorage. The handler owns it from now on.
+        :param level: The minimum level of the records handled.
+        :param max_queue_size: The maximum number of queued records.
+        :param max_batch_size: The maximum number of records per store_logs call.
+        :param flush_interval: The maximum number of seconds a record waits.
+        :param default_trace_id: The trace ID for records without a trace_id extra.
+        :raises ValueError: If an argument is invalid.
+        """
+        if max_queue_size <= 0:
+            raise ValueError("Max queue size must be positive")
+
+        super().__init__(queue.Queue(max_queue_size))
+        self.setLevel(level)
+        self.dropped_records = 0
+        self.listener = AzureTableListener(
+            self.queue,
+            storage,
+            max_batch_size=max_batch_size,
+            flush_interval=flush_interval,
+            default_trace_id=default_trace_id,
+        )
+        self.listener.start()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """
+        Format the record and capture the log_context of the logging thread,
+        which the listener thread cannot see.
+
+        :param record: The log record.
+        :return: The prepared record.
+        """
+        record = super().prepare(record)
+        if getattr(record, "trace_id", None) is None:
+            trace_id = get_trace_id()
+            if trace_id is not None:
+                record.trace_id = trace_id
+        for key, value in get_context_fields().items():
+            if key not in record.__dict__:
+                setattr(record, key, value)
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        """
+        Queue a record, dropping it if the queue is full.
+
+        :param record: The prepared log record.
+        """
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped_records += 1
+
+    def flush(self):
+        """
+        Wait until the records queued so far have been written.
+        """
+        self.listener.flush()
+
+    def close(self):
+        """
+        Write the remaining records, close the storage and stop the listener.
+        """
+        self.listener.stop()
+        super().close()
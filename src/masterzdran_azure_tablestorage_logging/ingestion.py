@@ -0,0 +1,371 @@
+"""
+Bounded ingestion queue for Azure Table Storage logging module.
+Limits how many log entries can wait for storage and decides what happens on overflow.
+"""
+
+import asyncio
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple, Union
+
+from .levels import LogLevel
+
+QueuedEntry = Tuple[str, str, Dict[str, Any]]
+
+_LEVEL_ORDER = {level.name: int(level) for level in LogLevel}
+
+
+async def wait_for_wakeup(wakeup: asyncio.Event, timeout: float):
+    """
+    Wait until an event is set or a timeout elapses, then clear the event.
+    Background flushers use it to run every timeout seconds or when woken early.
+
+    :param wakeup: The event that wakes the waiter early.
+    :param timeout: The maximum number of seconds to wait.
+    """
+    timer = asyncio.get_running_loop().call_later(timeout, wakeup.set)
+    try:
+        await wakeup.wait()
+    finally:
+        timer.cancel()
+    wakeup.clear()
+
+
+class PeriodicTask:
+    """
+    PeriodicTask calls a coroutine function from a background task every
+    interval seconds, or as soon as it is woken, until it is stopped. The
+    function may return the number of seconds until its next call instead. While
+    the function keeps failing, the delay doubles up to max_backoff.
+    """
+
+    def __init__(
+        self,
+        run: Callable[[], Awaitable[Any]],
+        interval: float,
+        max_backoff: Optional[float] = None,
+    ):
+        """
+        Initialize the PeriodicTask instance. The background task is created by
+        start(), on the running event loop.
+
+        :param run: The coroutine function called on every wakeup. It returns
+                    the delay before the next call, or None for the interval.
+        :param interval: The number of seconds between calls.
+        :param max_backoff: The maximum number of seconds between calls while run
+                            fails; None retries every interval.
+        """
+        self.interval = interval
+        self.max_backoff = interval if max_backoff is None else max_backoff
+        self.closed = False
+        self._run = run
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional["asyncio.Task[None]"] = None
+        self._lock: Optional[asyncio.Lock] = None
+
+    @property
+    def started(self) -> bool:
+        """
+        Whether the background task has been started.
+        """
+        return self._task is not None
+
+    @property
+    def lock(self) -> asyncio.Lock:
+        """
+        The lock the owner holds while writing, so calls from the background task
+        and explicit flushes do not interleave.
+        """
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        return self._lock
+
+    def start(self):
+        """
+        Start the background task on the running event loop, unless it is started.
+        """
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.get_running_loop().create_task(self._loop())
+
+    def wake(self):
+        """
+        Call run as soon as possible instead of at the end of the interval.
+        """
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _loop(self):
+        """
+        Call run every interval, backing off after failures, until stopped.
+        """
+        delay = self.interval
+        while True:
+            await wait_for_wakeup(self._wakeup, delay)
+            if self.closed:
+                return
+            try:
+                next_delay = await self._run()
+                delay = self.interval if next_delay is None else next_delay
+            except Exception:  # pylint: disable=broad-except
+                delay = min(delay * 2, self.max_backoff)
+
+    async def stop(self):
+        """
+        Stop the background task, waiting for a call in progress to finish.
+        """
+        self.closed = True
+        if self._task is not None:
+            self._wakeup.set()
+            await self._task
+
+
+class OverflowPolicy:
+    """
+    What an IngestionQueue does with a new entry when it is full.
+    """
+
+    # Wait for the flusher to make room (up to block_timeout).
+    BLOCK = "block"
+    # Evict the oldest queued entry.
+    DROP_OLDEST = "drop_oldest"
+    # Discard the new entry.
+    DROP_NEWEST = "drop_newest"
+    # Discard entries below protected_level first: the new entry if it is below,
+    # otherwise the oldest queued entry below it (or the oldest entry).
+    DROP_BELOW_LEVEL = "drop_below_level"
+
+
+def estimate_entry_size(data: Dict[str, Any]) -> int:
+    """
+    Estimate the in-memory payload size of a log entry in characters.
+
+    :param data: A dictionary containing the log data.
+    :return: The approximate size of the entry's strings and metadata.
+    """
+    size = 0
+    for value in data.values():
+        if isinstance(value, str):
+            size += len(value)
+        elif value:
+            size += len(str(value))
+    return size
+
+
+# Five settings, three counters, and the entries with their waiter event.
+# pylint: disable-next=too-many-instance-attributes
+class IngestionQueue:
+    """
+    IngestionQueue is a bounded FIFO of log entries waiting to be stored.
+    Capacity is limited by entry count and, optionally, by estimated payload size.
+    """
+
+    _policies = {
+        OverflowPolicy.BLOCK,
+        OverflowPolicy.DROP_OLDEST,
+        OverflowPolicy.DROP_NEWEST,
+        OverflowPolicy.DROP_BELOW_LEVEL,
+    }
+
+    def __init__(
+        self,
+        max_entries: int = 10000,
+        max_bytes: Optional[int] = None,
+        policy: str = OverflowPolicy.BLOCK,
+        protected_level: Union[LogLevel, int, str] = LogLevel.WARNING,
+        block_timeout: Optional[float] = None,
+    ):
+        """
+        Initialize the IngestionQueue instance.
+
+        :param max_entries: The maximum number of queued entries.
+        :param max_bytes: The maximum estimated size of the queued entries, or None.
+        :param policy: The OverflowPolicy applied when the queue is full.
+        :param protected_level: The lowest level DROP_BELOW_LEVEL tries to keep.
+        :param block_timeout: How long BLOCK waits for room before dropping the new
+                              entry; None waits indefinitely.
+        :raises ValueError: If an argument is invalid.
+        """
+        protected_level = LogLevel.parse(protected_level)
+        if max_entries <= 0:
+            raise ValueError("Max entries must be positive")
+        if max_bytes is not None and max_bytes <= 0:
+            raise ValueError("Max bytes must be positive")
+        if policy not in self._policies:
+            raise ValueError(
+                f"Invalid overflow policy. Must be one of {self._policies}"
+            )
+
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.policy = policy
+        self.protected_level = protected_level
+        self.block_timeout = block_timeout
+        self.queued_entries = 0
+        self.dropped_entries = 0
+        self.queued_bytes = 0
+        self._entries: Deque[Tuple[QueuedEntry, int]] = deque()
+        self._not_full: Optional[asyncio.Event] = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _is_full(self, size: int) -> bool:
+        """
+        Check whether an entry of the given size fits in the queue.
+
+        :param size: The estimated size of the entry.
+        :return: True if the queue has no room for the entry.
+        """
+        if len(self._entries) >= self.max_entries:
+            return True
+        # An entry larger than max_bytes is still accepted into an empty queue.
+        return (
+            self.max_bytes is not None
+            and bool(self._entries)
+            and self.queued_bytes + size > self.max_bytes
+        )
+
+    def _evict(self, index: int = 0):
+        """
+        Drop a queued entry.
+
+        :param index: The position of the entry to drop, 0 being the oldest.
+        """
+        if index == 0:
+            _, size = self._entries.popleft()
+        else:
+            _, size = self._entries[index]
+            del self._entries[index]
+        self.queued_bytes -= size
+        self.dropped_entries += 1
+
+    def _is_protected(self, data: Dict[str, Any]) -> bool:
+        """
+        Check whether an entry is at or above the protected level.
+
+        :param data: A dictionary containing the log data.
+        :return: True if DROP_BELOW_LEVEL should keep the entry.
+        """
+        return _LEVEL_ORDER.get(data.get("LogLevel"), 0) >= self.protected_level
+
+    def _make_room(self, data: Dict[str, Any], size: int) -> bool:
+        """
+        Apply a dropping policy to fit a new entry into a full queue.
+
+        :param data: A dictionary containing the new log data.
+        :param size: The estimated size of the new entry.
+        :return: True if the new entry should be queued.
+        """
+        if self.policy == OverflowPolicy.DROP_NEWEST:
+            return False
+        if self.policy == OverflowPolicy.DROP_BELOW_LEVEL:
+            if not self._is_protected(data):
+                return False
+            while self._is_full(size):
+                index = next(
+                    (
+                        i
+                        for i, ((_, _, queued), _) in enumerate(self._entries)
+                        if not self._is_protected(queued)
+                    ),
+                    0,
+                )
+                self._evict(index)
+            return True
+        while self._is_full(size):
+            self._evict()
+        return True
+
+    async def put(self, entry: QueuedEntry) -> bool:
+        """
+        Add an entry to the queue, applying the overflow policy when it is full.
+
+        :param entry: A (partition_key, row_key, data) tuple.
+        :return: True if the entry was queued, False if it was dropped.
+        """
+        data = entry[2]
+        size = estimate_entry_size(data) if self.max_bytes is not None else 0
+
+        if self._is_full(size):
+            if self.policy == OverflowPolicy.BLOCK:
+                if not await self._wait_for_room(size):
+                    self.dropped_entries += 1
+                    return False
+            elif not self._make_room(data, size):
+                self.dropped_entries += 1
+                return False
+
+        self._entries.append((entry, size))
+        self.queued_bytes += size
+        self.queued_entries += 1
+        return True
+
+    async def _wait_for_room(self, size: int) -> bool:
+        """
+        Wait until get_batch makes room for an entry.
+
+        :param size: The estimated size of the entry.
+        :return: False if block_timeout elapsed first.
+        """
+        if self._not_full is None:
+            self._not_full = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        deadline = None
+        if self.block_timeout is not None:
+            deadline = loop.time() + self.block_timeout
+        while self._is_full(size):
+            self._not_full.clear()
+            if deadline is None:
+                await self._not_full.wait()
+                continue
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return False
+            timer = loop.call_later(remaining, self._not_full.set)
+            try:
+                await self._not_full.wait()
+            finally:
+                timer.cancel()
+        return True
+
+    def get_batch(self, max_entries: int) -> List[QueuedEntry]:
+        """
+        Remove and return up to max_entries of the oldest queued entries.
+
+        :param max_entries: The maximum number of entries to return.
+        :return: The entries in the order they were queued.
+        """
+        batch = []
+        while self._entries and len(batch) < max_entries:
+            entry, size = self._entries.popleft()
+            self.queued_bytes -= size
+            batch.append(entry)
+        if batch and self._not_full is not None:
+            self._not_full.set()
+        return batch
+
+    def requeue(self, batch: List[QueuedEntry]):
+        """
+        Put entries returned by get_batch back at the head of the queue, in
+        order, for example after they failed to be stored. They are not counted
+        as queued again, and are kept even if the queue is full.
+
+        :param batch: The entries, in the order get_batch returned them.
+        """
+        for entry in reversed(batch):
+            size = estimate_entry_size(entry[2]) if self.max_bytes is not None else 0
+            self._entries.appendleft((entry, size))
+            self.queued_bytes += size
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get the queue counters.
+
+        :return: The current depth and size, and the totals of queued and dropped entries.
+        """
+        return {
+            "depth": len(self._entries),
+            "queued_bytes": self.queued_bytes,
+            "queued_entries": self.queued_entries,
+            "dropped_entries": self.dropped_entries,
+        }
@@ -3,7 +3,13 @@ Interfaces for Azure Table Storage logging module.
 """
 
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List, Optional, Tuple
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple
+
+from .fanout import FanOutMerge, PageFetcher
+from .models import LogEntry
+from .partitioning import LoggerNamePartitionStrategy, PartitionStrategy
+from .query import And, Field, Filters, to_predicate
 
 
 class StorageInterface(ABC):
@@ -11,6 +17,14 @@ class StorageInterface(ABC):
     Abstract base class for storage interfaces.
     """
 
+    # Whether RowKeys sort newest first (inverted ticks). Loggers generate
+    # RowKeys in this layout so get_logs can page in time order server-side.
+    descending_row_keys = True
+
+    # How loggers pick the PartitionKey of their entries. get_logs uses the same
+    # strategy to read only the partitions that overlap a time range.
+    partition_strategy: PartitionStrategy = LoggerNamePartitionStrategy()
+
     @abstractmethod
     async def store_log(self, partition_key: str, row_key: str, data: Dict[str, Any]):
         """
@@ -22,6 +36,29 @@ class StorageInterface(ABC):
         """
         raise NotImplementedError
 
+    async def store_logs(self, entries: Sequence[Tuple[str, str, Dict[str, Any]]]):
+        """
+        Store several log entries in the storage.
+
+        The default implementation stores the entries one by one; backends that
+        support batched writes should override it.
+
+        :param entries: A sequence of (partition_key, row_key, data) tuples.
+        """
+        for partition_key, row_key, data in entries:
+            await self.store_log(partition_key, row_key, data)
+
+    async def flush(self):
+        """
+        Write out any buffered log entries. No-op for unbuffered storages.
+        """
+
+    async def aclose(self):
+        """
+        Flush pending log entries and release the resources held by the storage.
+        """
+        await self.flush()
+
     @abstractmethod
     async def get_logs(
         self,
@@ -29,17 +66,29 @@ class StorageInterface(ABC):
         continuation_token: Optional[str] = None,
         order_by: str = "Timestamp",
         ascending: bool = False,
-        filters: Optional[Dict[str, Any]] = None,
-    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        filters: Optional[Filters] = None,
+        *,
+        logger_name: Optional[str] = None,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None,
+        as_entries: bool = False,
+    ) -> Tuple[List[Any], Optional[str]]:
         """
         Retrieve logs from the storage.
 
-        :param page_size: The number of logs to retrieve per page.
+        Entries are returned in PartitionKey order and, within a partition, in the
+        RowKey layout's time order.
+
+        :param page_size: The maximum number of logs to retrieve per page.
         :param continuation_token: The token to continue retrieving logs from where the
                                     last query left off.
         :param order_by: The field to order the logs by.
         :param ascending: Whether to order the logs in ascending order.
-        :param filters: A dictionary of filters to apply to the query.
+        :param filters: A dictionary of property values, or a query Predicate.
+        :param logger_name: Only read the partitions of this logger.
+        :param start_time: Only return entries logged at or after this UTC time.
+        :param end_time: Only return entries logged at or before this UTC time.
+        :param as_entries: Return LogEntry records instead of dictionaries.
         :return: A tuple containing a list of logs and an optional continuation token.
         """
         raise NotImplementedError
@@ -56,3 +105,386 @@ class StorageInterface(ABC):
         :return: A dictionary containing the log entry or None if not found.
         """
         raise NotImplementedError
+
+    async def iter_logs(
+        self,
+        page_size: int = 1000,
+        filters: Optional[Filters] = None,
+        *,
+        logger_name: Optional[str] = None,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None,
+        select: Optional[Sequence[str]] = None,
+        limit: Optional[int] = None,
+        prefetch: bool = True,  # pylint: disable=unused-argument
+        as_entries: bool = False,
+    ) -> AsyncIterator[Any]:
+        """
+        Iterate over the matching logs in time order, one page at a time.
+
+        The default implementation pages through get_logs and projects select
+        client-side; it does not prefetch.
+
+        :param page_size: The number of logs fetched per page.
+        :param filters: A dictionary of property values, or a query Predicate.
+        :param logger_name: Only read the partitions of this logger.
+        :param start_time: Only return entries logged at or after this UTC time.
+        :param end_time: Only return entries logged at or before this UTC time.
+        :param select: Only return these columns.
+        :param limit: Stop after this many logs, or None.
+        :param prefetch: Fetch the next page while the current one is consumed,
+                         where supported.
+        :param as_entries: Yield LogEntry records instead of dictionaries.
+        :return: An async iterator of logs.
+        :raises ValueError: If an argument is invalid.
+        """
+        if limit is not None and limit <= 0:
+            raise ValueError("Limit must be positive")
+        count = 0
+        token = None
+        while True:
+            logs, token = await self.get_logs(
+                page_size=page_size,
+                continuation_token=token,
+                ascending=not self.descending_row_keys,
+                filters=filters,
+                logger_name=logger_name,
+                start_time=start_time,
+                end_time=end_time,
+                as_entries=as_entries,
+            )
+            for log in logs:
+                if select is not None and not as_entries:
+                    log = {field: log.get(field) for field in select}
+                yield log
+                count += 1
+                if count == limit:
+                    return
+            if not token:
+                return
+
+    def _partition_fetcher(
+        self,
+        partition_keys: Sequence[str],
+        filters: Optional[Filters],
+        start_time: Optional[datetime],
+        end_time: Optional[datetime],
+    ) -> PageFetcher:
+        """
+        Build the function get_logs_merged reads one partition page with.
+
+        The default fetcher reads the partition with get_logs.
+
+        :param partition_keys: The partitions, in fetcher index order.
+        :param filters: A dictionary of property values, or a query Predicate.
+        :param start_time: Only return entries logged at or after this UTC time.
+        :param end_time: Only return entries logged at or before this UTC time.
+        :return: The page fetcher of a FanOutMerge over the partitions.
+        """
+        predicate = to_predicate(filters)
+
+        async def fetch(index, after, continuation, size):
+            conditions = [Field("PartitionKey").eq(partition_keys[index])]
+            if after is not None:
+                conditions.append(Field("RowKey").gt(after))
+            if predicate is not None:
+                conditions.append(predicate)
+            logs, token = await self.get_logs(
+                page_size=size,
+                continuation_token=None if continuation is None else continuation["t"],
+                ascending=not self.descending_row_keys,
+                filters=And(*conditions),
+                start_time=start_time,
+                end_time=end_time,
+            )
+            return logs, None if token is None else {"t": token}
+
+        return fetch
+
+    async def get_logs_merged(
+        self,
+        logger_names: Sequence[str],
+        page_size: int = 50,
+        continuation_token: Optional[str] = None,
+        filters: Optional[Filters] = None,
+        *,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None,
+        max_concurrency: int = 8,
+        as_entries: bool = False,
+    ) -> Tuple[List[Any], Optional[str]]:
+        """
+        Retrieve one page of the logs of several loggers in global time order.
+
+        Every partition of the loggers is read concurrently, within
+        max_concurrency, and the partition pages are merged by RowKey. The
+        default fetcher reads a partition with get_logs, which must return the
+        RowKey of each log. The continuation token is only valid for the same
+        loggers and time range.
+
+        :param logger_names: The loggers whose partitions are read.
+        :param page_size: The maximum number of logs to retrieve per page.
+        :param continuation_token: The token returned with the previous page.
+        :param filters: A dictionary of property values, or a query Predicate.
+        :param start_time: Only return entries logged at or after this UTC time.
+        :param end_time: Only return entries logged at or before this UTC time.
+        :param max_concurrency: The maximum number of concurrent partition queries.
+        :param as_entries: Return LogEntry records instead of dictionaries.
+        :return: A tuple containing a list of logs and an optional continuation token.
+        :raises ValueError: If an argument or the continuation token is invalid, or
+                            the partition strategy cannot enumerate the partitions
+                            of the loggers without a time range.
+        """
+        if page_size <= 0:
+            raise ValueError("Page size must be positive")
+        partition_keys = self.partition_strategy.partition_keys_for_loggers(
+            logger_names, start_time, end_time
+        )
+        fetch = self._partition_fetcher(partition_keys, filters, start_time, end_time)
+        merge = FanOutMerge(fetch, len(partition_keys), max_concurrency)
+        logs, token = await merge.page_from_token(page_size, continuation_token)
+        if as_entries:
+            logs = [LogEntry.from_entity(entity) for entity in logs]
+        return logs, token
+
+    async def get_logs_by_trace(
+        self,
+        trace_id: str,
+        as_entries: bool = False,
+        max_concurrency: int = 16,  # pylint: disable=unused-argument
+    ) -> List[Any]:
+        """
+        Retrieve every log of a trace.
+
+        The default implementation scans the storage with a TraceId filter;
+        storages that keep a trace index read it instead.
+
+        :param trace_id: The TraceId of the logs.
+        :param as_entries: Return LogEntry records instead of dictionaries.
+        :param max_concurrency: The maximum number of concurrent point reads, where
+                                an index is read.
+        :return: The logs of the trace.
+        """
+        return [
+            log
+            async for log in self.iter_logs(
+                filters={"TraceId": trace_id}, as_entries=as_entries
+            )
+        ]
+
+
+class StorageWrapper(StorageInterface):
+    """
+    Base class of storages that wrap another storage. Every call is forwarded
+    to the wrapped storage; subclasses override the calls they change, typically
+    the writes.
+    """
+
+    def __init__(self, storage: StorageInterface):
+        """
+        Initialize the StorageWrapper instance.
+
+        :param storage: The storage calls are forwarded to.
+        """
+        self.storage = storage
+
+    @property
+    def descending_row_keys(self) -> bool:
+        """
+        The RowKey layout of the wrapped storage.
+        """
+        return self.storage.descending_row_keys
+
+    @property
+    def partition_strategy(self) -> PartitionStrategy:
+        """
+        The partition strategy of the wrapped storage.
+        """
+        return self.storage.partition_strategy
+
+    async def __aenter__(self) -> "StorageWrapper":
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+    async def store_log(self, partition_key: str, row_key: str, data: Dict[str, Any]):
+        """
+        Store a log entry in the wrapped storage.
+
+        :param partition_key: The partition key for the log entry.
+        :param row_key: The row key for the log entry.
+        :param data: A dictionary containing the log data.
+        """
+        await self.storage.store_log(partition_key, row_key, data)
+
+    async def store_logs(self, entries: Sequence[Tuple[str, str, Dict[str, Any]]]):
+        """
+        Store several log entries in the wrapped storage.
+
+        :param entries: A sequence of (partition_key, row_key, data) tuples.
+        """
+        await self.storage.store_logs(entries)
+
+    async def flush(self):
+        """
+        Flush the wrapped storage.
+        """
+        await self.storage.flush()
+
+    async def aclose(self):
+        """
+        Close the wrapped storage.
+        """
+        await self.storage.aclose()
+
+    async def get_logs(
+        self,
+        page_size: int = 50,
+        continuation_token: Optional[str] = None,
+        order_by: str = "Timestamp",
+        ascending: bool = False,
+        filters: Optional[Filters] = None,
+        *,
+        logger_name: Optional[str] = None,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None,
+        as_entries: bool = False,
+    ) -> Tuple[List[Any], Optional[str]]:
+        """
+        Retrieve logs from the wrapped storage.
+
+        :param page_size: The maximum number of logs to retrieve per page.
+        :param continuation_token: The token to continue retrieving logs from where the
+                                    last query left off.
+        :param order_by: The field to order the logs by.
+        :param ascending: Whether to order the logs in ascending order.
+        :param filters: A dictionary of property values, or a query Predicate.
+        :param logger_name: Only read the partitions of this logger.
+        :param start_time: Only return entries logged at or after this UTC time.
+        :param end_time: Only return entries logged at or before this UTC time.
+        :param as_entries: Return LogEntry records instead of dictionaries.
+        :return: A tuple containing a list of logs and an optional continuation token.
+        """
+        return await self.storage.get_logs(
+            page_size=page_size,
+            continuation_token=continuation_token,
+            order_by=order_by,
+            ascending=ascending,
+            filters=filters,
+            logger_name=logger_name,
+            start_time=start_time,
+            end_time=end_time,
+            as_entries=as_entries,
+        )
+
+    async def get_log_entry(
+        self, partition_key: str, row_key: str
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Retrieve a single log entry from the wrapped storage.
+
+        :param partition_key: The partition key of the log entry.
+        :param row_key: The row key of the log entry.
+        :return: A dictionary containing the log entry or None if not found.
+        """
+        return await self.storage.get_log_entry(partition_key, row_key)
+
+    async def iter_logs(
+        self,
+        page_size: int = 1000,
+        filters: Optional[Filters] = None,
+        *,
+        logger_name: Optional[str] = None,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None,
+        select: Optional[Sequence[str]] = None,
+        limit: Optional[int] = None,
+        prefetch: bool = True,
+        as_entries: bool = False,
+    ) -> AsyncIterator[Any]:
+        """
+        Iterate over the logs of the wrapped storage.
+
+        :param page_size: The number of logs fetched per page.
+        :param filters: A dictionary of property values, or a query Predicate.
+        :param logger_name: Only read the partitions of this logger.
+        :param start_time: Only return entries logged at or after this UTC time.
+        :param end_time: Only return entries logged at or before this UTC time.
+        :param select: Only return these columns.
+        :param limit: Stop after this many logs, or None.
+        :param prefetch: Fetch the next page while the current one is consumed,
+                         where supported.
+        :param as_entries: Yield LogEntry records instead of dictionaries.
+        :return: An async iterator of logs.
+        """
+        logs = self.storage.iter_logs(
+            page_size=page_size,
+            filters=filters,
+            logger_name=logger_name,
+            start_time=start_time,
+            end_time=end_time,
+            select=select,
+            limit=limit,
+            prefetch=prefetch,
+            as_entries=as_entries,
+        )
+        try:
+            async for log in logs:
+                yield log
+        finally:
+            # Stops the wrapped iterator's prefetch when iteration ends early.
+            close = getattr(logs, "aclose", None)
+            if close is not None:
+                await close()
+
+    async def get_logs_merged(
+        self,
+        logger_names: Sequence[str],
+        page_size: int = 50,
+        continuation_token: Optional[str] = None,
+        filters: Optional[Filters] = None,
+        *,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None,
+        max_concurrency: int = 8,
+        as_entries: bool = False,
+    ) -> Tuple[List[Any], Optional[str]]:
+        """
+        Retrieve a merged page of several loggers from the wrapped storage.
+
+        :param logger_names: The loggers whose partitions are read.
+        :param page_size: The maximum number of logs to retrieve per page.
+        :param continuation_token: The token returned with the previous page.
+        :param filters: A dictionary of property values, or a query Predicate.
+        :param start_time: Only return entries logged at or after this UTC time.
+        :param end_time: Only return entries logged at or before this UTC time.
+        :param max_concurrency: The maximum number of concurrent partition queries.
+        :param as_entries: Return LogEntry records instead of dictionaries.
+        :return: A tuple containing a list of logs and an optional continuation token.
+        """
+        return await self.storage.get_logs_merged(
+            logger_names,
+            page_size=page_size,
+            continuation_token=continuation_token,
+            filters=filters,
+            start_time=start_time,
+            end_time=end_time,
+            max_concurrency=max_concurrency,
+            as_entries=as_entries,
+        )
+
+    async def get_logs_by_trace(
+        self, trace_id: str, as_entries: bool = False, max_concurrency: int = 16
+    ) -> List[Any]:
+        """
+        Retrieve every log of a trace from the wrapped storage.
+
+        :param trace_id: The TraceId of the logs.
+        :param as_entries: Return LogEntry records instead of dictionaries.
+        :param max_concurrency: The maximum number of concurrent point reads.
+        :return: The logs of the trace.
+        """
+        return await self.storage.get_logs_by_trace(
+            trace_id, as_entries=as_entries, max_concurrency=max_concurrency
+        )
@@ -0,0 +1,233 @@
+"""
+RowKey layout for Azure Table Storage logging module.
+Builds fixed-width tick RowKeys so the service returns entities in time order.
+"""
+
+import os
+import re
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional, Tuple
+
+# .NET ticks (100 ns intervals since 0001-01-01) at the Unix epoch.
+EPOCH_TICKS = 621355968000000000
+
+# .NET DateTime.MaxValue.Ticks, the base of inverted-tick RowKeys.
+MAX_TICKS = 3155378975999999999
+
+# Number of digits of a tick RowKey prefix.
+TICKS_WIDTH = 19
+
+# Number of hex digits of the node id suffix of generated RowKeys.
+NODE_ID_WIDTH = 8
+
+# Characters Azure Tables does not accept in PartitionKey and RowKey values.
+_INVALID_KEY_CHARACTERS = re.compile(r"[/\\#?\x00-\x1f\x7f-\x9f]")
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_NAIVE_EPOCH = datetime(1970, 1, 1)
+
+
+def _new_node_id() -> str:
+    """
+    Generate a random node id for this process.
+
+    :return: NODE_ID_WIDTH hex digits.
+    """
+    return os.urandom(NODE_ID_WIDTH // 2).hex()
+
+
+_process_node_id = _new_node_id()
+
+
+def _reset_process_node_id():
+    """
+    Give a forked child process its own node id.
+    """
+    global _process_node_id  # pylint: disable=global-statement
+    _process_node_id = _new_node_id()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_process_node_id)
+
+
+def is_valid_key(value: str) -> bool:
+    """
+    Check whether a value can be used as a PartitionKey or RowKey.
+
+    :param value: The key value.
+    :return: True if the value is a valid key.
+    """
+    return 0 < len(value) <= 512 and not _INVALID_KEY_CHARACTERS.search(value)
+
+
+def to_ticks(timestamp: datetime) -> int:
+    """
+    Convert a datetime to .NET ticks. Naive datetimes are taken as UTC.
+
+    :param timestamp: The datetime to convert.
+    :return: The number of 100 ns intervals since 0001-01-01.
+    """
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    delta = timestamp - _EPOCH
+    return (
+        EPOCH_TICKS
+        + (delta.days * 86400 + delta.seconds) * 10_000_000
+        + delta.microseconds * 10
+    )
+
+
+def ticks_to_datetime(ticks: int) -> datetime:
+    """
+    Convert .NET ticks to a naive UTC datetime, truncated to microseconds.
+
+    :param ticks: The number of 100 ns intervals since 0001-01-01.
+    :return: The naive UTC datetime.
+    """
+    return _NAIVE_EPOCH + timedelta(microseconds=(ticks - EPOCH_TICKS) // 10)
+
+
+def ticks_to_row_key(ticks: int, descending: bool = True) -> str:
+    """
+    Format ticks as a fixed-width RowKey.
+
+    Table Storage returns entities in ascending RowKey order within a partition,
+    so descending (inverted-tick) RowKeys make the newest entries come first.
+
+    :param ticks: The .NET ticks of the log entry.
+    :param descending: Whether newer entries get smaller RowKeys.
+    :return: The zero-padded RowKey.
+    """
+    return f"{MAX_TICKS - ticks if descending else ticks:0{TICKS_WIDTH}d}"
+
+
+def row_key_for(timestamp: datetime, descending: bool = True) -> str:
+    """
+    Build the RowKey for a log entry written at the given time.
+
+    :param timestamp: The time of the log entry.
+    :param descending: Whether newer entries get smaller RowKeys.
+    :return: The RowKey.
+    """
+    return ticks_to_row_key(to_ticks(timestamp), descending)
+
+
+def row_key_time(row_key: str, descending: bool = True) -> Optional[datetime]:
+    """
+    Get the time a tick RowKey was generated for.
+
+    :param row_key: The RowKey.
+    :param descending: Whether newer entries get smaller RowKeys.
+    :return: The naive UTC time, or None if the RowKey has no tick prefix.
+    """
+    prefix = row_key[:TICKS_WIDTH]
+    if len(prefix) != TICKS_WIDTH or not prefix.isdigit():
+        return None
+    ticks = int(prefix)
+    if ticks > MAX_TICKS:
+        return None
+    return ticks_to_datetime(MAX_TICKS - ticks if descending else ticks)
+
+
+def row_key_range(
+    start_time: Optional[datetime],
+    end_time: Optional[datetime],
+    descending: bool = True,
+) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Get the RowKey bounds of the entries written in a time range.
+
+    The range is inclusive at microsecond precision. RowKeys may carry a suffix
+    after the tick prefix, so the upper bound is the exclusive prefix following
+    the last tick in range.
+
+    :param start_time: The inclusive start of the range, or None.
+    :param end_time: The inclusive end of the range, or None.
+    :param descending: Whether newer entries get smaller RowKeys.
+    :return: The inclusive lower and exclusive upper RowKey bounds; None where
+             the range is open.
+    """
+    first = to_ticks(start_time) if start_time is not None else None
+    # Ticks have 100 ns precision; include every tick of the end microsecond.
+    last = to_ticks(end_time) + 9 if end_time is not None else None
+    if descending:
+        first, last = (
+            MAX_TICKS - last if last is not None else None,
+            MAX_TICKS - first if first is not None else None,
+        )
+    lower = ticks_to_row_key(first, False) if first is not None else None
+    upper = ticks_to_row_key(last + 1, False) if last is not None else None
+    return lower, upper
+
+
+class RowKeyGenerator:
+    """
+    RowKeyGenerator produces unique, sortable RowKeys: the fixed-width (optionally
+    inverted) tick timestamp followed by a node id.
+
+    Ticks are strictly increasing per generator: when the clock has not advanced
+    since the previous key, the previous tick plus one is used, so keys from
+    concurrent callers never collide. The node id keeps keys from different
+    processes and hosts apart. No date formatting happens per key.
+    """
+
+    def __init__(self, descending: bool = True, node_id: Optional[str] = None):
+        """
+        Initialize the RowKeyGenerator instance.
+
+        :param descending: Whether newer entries get smaller RowKeys.
+        :param node_id: A fixed node id; defaults to a random id per process.
+        :raises ValueError: If node_id is empty or contains characters not allowed
+                            in a RowKey.
+        """
+        if node_id is not None and (
+            not node_id or any(char in node_id for char in "/\\#?")
+        ):
+            raise ValueError("Invalid node id")
+
+        self.descending = descending
+        self.node_id = node_id
+        self._last_ticks = 0
+        self._lock = threading.Lock()
+
+    def next_key(self, ticks: Optional[int] = None) -> Tuple[int, str]:
+        """
+        Generate the next RowKey.
+
+        :param ticks: The time of the entry in .NET ticks; defaults to now.
+        :return: The ticks the key was generated for and the RowKey.
+        """
+        if ticks is None:
+            ticks = time.time_ns() // 100 + EPOCH_TICKS
+        with self._lock:
+            if ticks <= self._last_ticks:
+                ticks = self._last_ticks + 1
+            self._last_ticks = ticks
+        if self.descending:
+            prefix = MAX_TICKS - ticks
+        else:
+            prefix = ticks
+        return ticks, f"{prefix:0{TICKS_WIDTH}d}{self.node_id or _process_node_id}"
+
+
+_default_generators: Dict[bool, RowKeyGenerator] = {}
+
+
+def get_row_key_generator(descending: bool = True) -> RowKeyGenerator:
+    """
+    Get the process-wide RowKey generator for a RowKey layout.
+
+    Loggers share these generators, so keys stay unique across loggers.
+
+    :param descending: Whether newer entries get smaller RowKeys.
+    :return: The shared RowKeyGenerator.
+    """
+    generator = _default_generators.get(descending)
+    if generator is None:
+        generator = _default_generators.setdefault(
+            descending, RowKeyGenerator(descending)
+        )
+    return generator
@@ -0,0 +1,42 @@
+"""
+Log levels for Azure Table Storage logging module.
+"""
+
+from enum import IntEnum
+from typing import Union
+
+
+class LogLevel(IntEnum):
+    """
+    Log levels for the logger, ordered by severity.
+    The values match the standard library logging levels.
+    """
+
+    DEBUG = 10
+    INFO = 20
+    WARNING = 30
+    ERROR = 40
+    CRITICAL = 50
+
+    @classmethod
+    def parse(cls, level: Union["LogLevel", int, str]) -> "LogLevel":
+        """
+        Convert a level name or number to a LogLevel.
+
+        Numbers between the defined levels, such as custom standard library
+        levels, map to the closest level below them; numbers below DEBUG map to
+        DEBUG.
+
+        :param level: A LogLevel, a level number or a level name such as "INFO".
+        :return: The LogLevel.
+        :raises ValueError: If the level name is unknown.
+        """
+        if isinstance(level, str):
+            try:
+                return cls[level.upper()]
+            except KeyError as e:
+                raise ValueError(f"Invalid log level {level}") from e
+        try:
+            return cls(level)
+        except ValueError:
+            return cls(max(cls.DEBUG, min(cls.CRITICAL, level // 10 * 10)))
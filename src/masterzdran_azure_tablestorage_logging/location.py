@@ -0,0 +1,45 @@
+"""
+Caller location lookup for Azure Table Storage logging module.
+Resolves "module:lineno" strings with a direct frame walk and caches them per call site.
+"""
+
+import sys
+from types import CodeType
+from typing import Dict, Tuple
+
+# Upper bound on cached call sites; the cache is reset when it is exceeded so
+# dynamically generated code cannot grow it without limit.
+MAX_CACHED_LOCATIONS = 8192
+
+_location_cache: Dict[Tuple[CodeType, int], str] = {}
+
+
+def get_caller_location(depth: int = 1) -> str:
+    """
+    Get the "module:lineno" location of a frame on the current call stack.
+
+    Unlike inspect.stack(), this only touches the requested frame and never reads
+    source files. Formatted strings are cached per code object and line number.
+
+    :param depth: How many frames above the caller of this function to look,
+                  1 being the caller's caller.
+    :return: The location string of the frame.
+    """
+    # pylint: disable=protected-access
+    frame = sys._getframe(depth + 1)
+    lineno = frame.f_lineno
+    key = (frame.f_code, lineno)
+    location = _location_cache.get(key)
+    if location is None:
+        if len(_location_cache) >= MAX_CACHED_LOCATIONS:
+            _location_cache.clear()
+        location = f"{frame.f_globals.get('__name__', '<unknown>')}:{lineno}"
+        _location_cache[key] = location
+    return location
+
+
+def clear_location_cache():
+    """
+    Remove all cached location strings.
+    """
+    _location_cache.clear()
@@ -2,25 +2,37 @@
 Logger for Azure Table Storage logging module.
 """
 
-import inspect
-from datetime import datetime
-from typing import Any, Dict, Optional
+import copy
+import random
+import time
+from typing import Any, Callable, Dict, Optional, Tuple, Union
 
-from .storage import AzureTableStorage
+from .context import EMPTY_FIELDS, BoundFields, _fields, _trace_id
+from .interfaces import StorageInterface
+from .keys import get_row_key_generator, ticks_to_datetime
+from .levels import LogLevel
+from .location import get_caller_location
+from .metrics import Metrics
+from .models import LogEntry
+from .sampling import SUPPRESSED_KEY, Sampler
 
+# Frames between AzureLogger._log and the code that called the logging method.
+_CALLER_DEPTH = 2
 
-class LogLevel:
-    """
-    Log levels for the logger.
-    """
+# Plain int copies of the levels, so disabled calls cost a single int comparison.
+_DEBUG = int(LogLevel.DEBUG)
+_INFO = int(LogLevel.INFO)
+_WARNING = int(LogLevel.WARNING)
+_ERROR = int(LogLevel.ERROR)
+_CRITICAL = int(LogLevel.CRITICAL)
 
-    DEBUG = "DEBUG"
-    INFO = "INFO"
-    WARNING = "WARNING"
-    ERROR = "ERROR"
-    CRITICAL = "CRITICAL"
+# A message string, or a callable building it only when the level is enabled.
+Message = Union[str, Callable[[], str]]
 
 
+# The settings, the level and its int threshold, and the bound and layered
+# fields are all read on the hot path, so they stay plain attributes.
+# pylint: disable-next=too-many-instance-attributes
 class AzureLogger:
     """
     AzureLogger is a class that provides logging functionality using Azure Table Storage.
@@ -28,132 +40,329 @@ class AzureLogger:
 
     def __init__(
         self,
-        storage: AzureTableStorage,
+        storage: StorageInterface,
         logger_name: str,
         default_trace_id: Optional[str] = None,
+        *,
+        capture_location: bool = True,
+        location_sample_rate: float = 1.0,
+        level: Union[LogLevel, int, str] = LogLevel.DEBUG,
+        metrics: Optional[Metrics] = None,
+        sampler: Optional[Sampler] = None,
     ):
         """
         Initialize the AzureLogger instance.
 
-        :param storage: An instance of AzureTableStorage.
+        :param storage: The storage backend, e.g. an AzureTableStorage instance.
         :param logger_name: The name of the logger.
-        :param default_trace_id: The default trace ID to use for log entries.
+        :param default_trace_id: The trace ID of entries when neither the call nor
+                                 the log_context sets one.
+        :param capture_location: Whether to record the caller's "module:lineno".
+        :param location_sample_rate: The fraction of log entries, between 0 and 1,
+                                     that record the caller location.
+        :param level: The minimum level of the entries that are logged.
+        :param metrics: Records the logged entries and the time spent handing them
+                        to the storage; None records nothing.
+        :param sampler: Thins out repeated calls per level and message template
+                        before they are formatted; None keeps every call.
+        :raises ValueError: If location_sample_rate is not between 0 and 1, or the
+                            level is unknown.
         """
+        if not 0.0 <= location_sample_rate <= 1.0:
+            raise ValueError("Location sample rate must be between 0 and 1")
+
         self.storage = storage
         self.logger_name = logger_name
         self.default_trace_id = default_trace_id
+        self.capture_location = capture_location and location_sample_rate > 0.0
+        self.location_sample_rate = location_sample_rate
+        self._row_keys = get_row_key_generator(storage.descending_row_keys)
+        self.level = LogLevel.parse(level)
+        self._threshold = level if isinstance(level, int) else int(self.level)
+        self.metrics = metrics
+        self.sampler = sampler
+        # The metadata fields added to every entry, set by bind().
+        self.bound_fields = EMPTY_FIELDS
+        # The last context and bound fields seen and their combination, so a
+        # context is combined once rather than on every call.
+        self._layered: Tuple[BoundFields, BoundFields, BoundFields] = (
+            EMPTY_FIELDS,
+            EMPTY_FIELDS,
+            EMPTY_FIELDS,
+        )
+
+    def bind(self, trace_id: Optional[str] = None, **fields: Any) -> "AzureLogger":
+        """
+        Get a child logger that adds metadata fields to every entry.
+
+        The child shares the storage, sampler and metrics of this logger. Its
+        fields are serialized once, here, so the cost of a log call does not
+        depend on how many fields are bound.
+
+        :param trace_id: The default trace ID of the child, or None to keep this
+                         logger's.
+        :param fields: Metadata fields added to this logger's bound fields.
+        :return: The child logger.
+        """
+        child = copy.copy(self)
+        child.bound_fields = self.bound_fields.extend(fields)
+        if trace_id is not None:
+            child.default_trace_id = trace_id
+        return child
+
+    def set_level(self, level: Union[LogLevel, int, str]):
+        """
+        Set the minimum level of the entries that are logged.
+
+        :param level: A LogLevel, a level number or a level name such as "INFO".
+                      A number between the defined levels filters at that number.
+        :raises ValueError: If the level name is unknown.
+        """
+        self.level = LogLevel.parse(level)
+        self._threshold = level if isinstance(level, int) else int(self.level)
+
+    def is_enabled_for(self, level: Union[LogLevel, int]) -> bool:
+        """
+        Check whether entries of a level are logged.
+
+        :param level: The log level.
+        :return: True if the level is at or above the logger's level.
+        """
+        return level >= self._threshold
+
+    def _layer_fields(self, metadata: Optional[Dict[str, Any]]) -> Any:
+        """
+        Add the log_context fields and the bound fields to the metadata of a call.
+
+        :param metadata: The metadata of the call, or None.
+        :return: A view of the call's metadata over the fields, or the call's
+                 metadata if there are no fields to add.
+        """
+        base = self.bound_fields
+        context_fields = _fields.get()
+        if context_fields:
+            layered = self._layered
+            if layered[0] is not context_fields or layered[1] is not base:
+                layered = (context_fields, base, context_fields.extend(base))
+                self._layered = layered
+            base = layered[2]
+        if base:
+            return base.layer(metadata)
+        return metadata
 
     async def _log(
         self,
-        level: str,
-        message: str,
+        level: LogLevel,
+        message: Message,
         trace_id: Optional[str] = None,
         metadata: Optional[Dict[str, Any]] = None,
+        args: Optional[Tuple[Any, ...]] = None,
     ):
         """
         Log a message with the specified level.
 
         :param level: The log level.
-        :param message: The log message.
+        :param message: The log message, a %-style template formatted with args, or
+                        a callable returning the message.
         :param trace_id: The trace ID for the log entry.
         :param metadata: Additional metadata for the log entry.
+        :param args: The arguments of the message template.
         """
+        if self.sampler is not None and level < self.sampler.exempt_threshold:
+            suppressed = self.sampler.check(self.logger_name, level, message)
+            if suppressed is None:
+                if self.metrics is not None:
+                    self.metrics.increment("suppressed_entries_total", level=level.name)
+                return
+            if suppressed:
+                metadata = dict(metadata or {})
+                metadata[SUPPRESSED_KEY] = suppressed
+
+        if args:
+            message = message % args
+        elif callable(message):
+            message = message()
+
         if trace_id is None:
-            trace_id = self.default_trace_id
+            trace_id = _trace_id.get()
+            if trace_id is None:
+                trace_id = self.default_trace_id
 
-        caller_frame = inspect.stack()[2]
-        caller_module = inspect.getmodule(caller_frame[0])
-        caller_location = f"{caller_module.__name__}:{caller_frame.lineno}"
+        metadata = self._layer_fields(metadata)
 
-        log_entry = {
-            "LogLevel": level,
-            "Message": message,
-            "Timestamp": datetime.utcnow().isoformat(),
-            "TraceId": trace_id,
-            "LoggerName": self.logger_name,
-            "Location": caller_location,
-            "Metadata": metadata or {},
-        }
+        caller_location = None
+        if self.capture_location and (
+            self.location_sample_rate >= 1.0
+            or random.random() < self.location_sample_rate  # nosec B311
+        ):
+            caller_location = get_caller_location(_CALLER_DEPTH)
 
-        partition_key = self.logger_name
-        row_key = datetime.utcnow().strftime("%Y%m%d%H%M%S%f")
+        ticks, row_key = self._row_keys.next_key()
+        now = ticks_to_datetime(ticks)
+        partition_key = self.storage.partition_strategy.partition_key(
+            self.logger_name, now, row_key
+        )
+        entry = LogEntry(
+            partition_key,
+            row_key,
+            level.name,
+            message,
+            timestamp=now.isoformat(),
+            trace_id=trace_id,
+            logger_name=self.logger_name,
+            location=caller_location,
+            metadata=metadata or {},
+        )
 
-        await self.storage.store_log(partition_key, row_key, log_entry)
+        if self.metrics is None:
+            await self.storage.store_log(partition_key, row_key, entry)
+            return
+        start = time.perf_counter()
+        await self.storage.store_log(partition_key, row_key, entry)
+        self.metrics.observe("enqueue_seconds", time.perf_counter() - start)
+        self.metrics.increment("log_entries_total", level=level.name)
+
+    async def log(
+        self,
+        level: Union[LogLevel, int],
+        message: Message,
+        trace_id: Optional[str] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+        *,
+        args: Optional[Tuple[Any, ...]] = None,
+    ):
+        """
+        Log a message with the given level.
+
+        :param level: The log level. A number between the defined levels, such as
+                      a custom standard library level, is stored under the
+                      closest level below it.
+        :param message: The log message, a %-style template formatted with args, or
+                        a callable returning the message.
+        :param trace_id: The trace ID for the log entry.
+        :param metadata: Additional metadata for the log entry.
+        :param args: The arguments of the message template.
+        """
+        if level < self._threshold:
+            return
+        await self._log(LogLevel.parse(level), message, trace_id, metadata, args)
 
     async def debug(
         self,
-        message: str,
+        message: Message,
         trace_id: Optional[str] = None,
         metadata: Optional[Dict[str, Any]] = None,
+        *,
+        args: Optional[Tuple[Any, ...]] = None,
     ):
         """
         Log a debug message.
 
-        :param message: The log message.
+        :param message: The log message, a %-style template formatted with args, or
+                        a callable returning the message.
         :param trace_id: The trace ID for the log entry.
         :param metadata: Additional metadata for the log entry.
+        :param args: The arguments of the message template.
         """
-        await self._log(LogLevel.DEBUG, message, trace_id, metadata)
+        if _DEBUG < self._threshold:
+            return
+        await self._log(LogLevel.DEBUG, message, trace_id, metadata, args)
 
     async def info(
         self,
-        message: str,
+        message: Message,
         trace_id: Optional[str] = None,
         metadata: Optional[Dict[str, Any]] = None,
+        *,
+        args: Optional[Tuple[Any, ...]] = None,
     ):
         """
         Log an info message.
 
-        :param message: The log message.
+        :param message: The log message, a %-style template formatted with args, or
+                        a callable returning the message.
         :param trace_id: The trace ID for the log entry.
         :param metadata: Additional metadata for the log entry.
+        :param args: The arguments of the message template.
         """
-        await self._log(LogLevel.INFO, message, trace_id, metadata)
+        if _INFO < self._threshold:
+            return
+        await self._log(LogLevel.INFO, message, trace_id, metadata, args)
 
     async def warning(
         self,
-        message: str,
+        message: Message,
         trace_id: Optional[str] = None,
         metadata: Optional[Dict[str, Any]] = None,
+        *,
+        args: Optional[Tuple[Any, ...]] = None,
     ):
         """
         Log a warning message.
 
-        :param message: The log message.
+        :param message: The log message, a %-style template formatted with args, or
+                        a callable returning the message.
         :param trace_id: The trace ID for the log entry.
         :param metadata: Additional metadata for the log entry.
+        :param args: The arguments of the message template.
         """
-        await self._log(LogLevel.WARNING, message, trace_id, metadata)
+        if _WARNING < self._threshold:
+            return
+        await self._log(LogLevel.WARNING, message, trace_id, metadata, args)
 
     async def error(
         self,
-        message: str,
+        message: Message,
         trace_id: Optional[str] = None,
         metadata: Optional[Dict[str, Any]] = None,
+        *,
+        args: Optional[Tuple[Any, ...]] = None,
     ):
         """
         Log an error message.
 
-        :param message: The log message.
+        :param message: The log message, a %-style template formatted with args, or
+                        a callable returning the message.
         :param trace_id: The trace ID for the log entry.
         :param metadata: Additional metadata for the log entry.
+        :param args: The arguments of the message template.
         """
-        await self._log(LogLevel.ERROR, message, trace_id, metadata)
+        if _ERROR < self._threshold:
+            return
+        await self._log(LogLevel.ERROR, message, trace_id, metadata, args)
 
     async def critical(
         self,
-        message: str,
+        message: Message,
         trace_id: Optional[str] = None,
         metadata: Optional[Dict[str, Any]] = None,
+        *,
+        args: Optional[Tuple[Any, ...]] = None,
     ):
         """
         Log a critical message.
 
-        :param message: The log message.
+        :param message: The log message, a %-style template formatted with args, or
+                        a callable returning the message.
         :param trace_id: The trace ID for the log entry.
         :param metadata: Additional metadata for the log entry.
+        :param args: The arguments of the message template.
+        """
+        if _CRITICAL < self._threshold:
+            return
+        await self._log(LogLevel.CRITICAL, message, trace_id, metadata, args)
+
+    async def flush(self):
+        """
+        Write out log entries buffered by the storage backend.
+        """
+        await self.storage.flush()
+
+    async def aclose(self):
+        """
+        Flush pending log entries and close the storage backend.
         """
-        await self._log(LogLevel.CRITICAL, message, trace_id, metadata)
+        await self.storage.aclose()
 
     def get_logger_name(self) -> str:
         """
@@ -0,0 +1,577 @@
+"""
+In-memory Table Storage for Azure Table Storage logging module.
+Stands in for the Azure Tables service in tests and benchmarks, with injectable
+latency, throttling and failures.
+"""
+
+import asyncio
+import functools
+import random
+import re
+import uuid
+from datetime import datetime
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+from azure.core.exceptions import (
+    HttpResponseError,
+    ResourceExistsError,
+    ResourceNotFoundError,
+    ServiceRequestError,
+)
+
+from .async_storage import AsyncAzureTableStorage
+from .transactions import MAX_TRANSACTION_SIZE
+
+EntityKey = Tuple[str, str]
+EntityFilter = Callable[[Dict[str, Any]], bool]
+
+
+class TableItem(NamedTuple):
+    """
+    A table listed by InMemoryTableService.list_tables.
+    """
+
+    name: str
+
+
+_TOKEN = re.compile(
+    r"\s*(?:"
+    r"(?P<typed>(?:datetime|guid)'[^']*')"
+    r"|(?P<string>'(?:[^']|'')*')"
+    r"|(?P<number>-?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?L?)"
+    r"|(?P<name>[A-Za-z_][A-Za-z0-9_]*)"
+    r"|(?P<paren>[()])"
+    r")"
+)
+
+_COMPARISONS = {
+    "eq": lambda a, b: a == b,
+    "ne": lambda a, b: a != b,
+    "gt": lambda a, b: a > b,
+    "ge": lambda a, b: a >= b,
+    "lt": lambda a, b: a < b,
+    "le": lambda a, b: a <= b,
+}
+
+
+def _tokenize(query_filter: str) -> List[Tuple[str, str]]:
+    """
+    Split an OData filter into (kind, text) tokens.
+
+    :param query_filter: The filter string.
+    :return: The tokens.
+    :raises ValueError: If the filter contains an unsupported token.
+    """
+    tokens = []
+    position = 0
+    text = query_filter.rstrip()
+    while position < len(text):
+        match = _TOKEN.match(text, position)
+        if match is None or match.end() == position:
+            raise ValueError(f"Unsupported filter at {text[position:]!r}")
+        tokens.append((match.lastgroup, match.group(match.lastgroup)))
+        position = match.end()
+    return tokens
+
+
+def _parse_literal(kind: str, text: str) -> Any:
+    """
+    Convert a literal token to a Python value.
+
+    :param kind: The token kind.
+    :param text: The token text.
+    :return: The value.
+    :raises ValueError: If the token is not a literal.
+    """
+    if kind == "string":
+        return text[1:-1].replace("''", "'")
+    if kind == "typed":
+        prefix, value = text[:-1].split("'", 1)
+        if prefix == "guid":
+            return uuid.UUID(value)
+        return datetime.fromisoformat(value.rstrip("Z"))
+    if kind == "number":
+        if text.endswith("L"):
+            return int(text[:-1])
+        return float(text) if any(c in text for c in ".eE") else int(text)
+    if kind == "name" and text in ("true", "false"):
+        return text == "true"
+    raise ValueError(f"Expected a literal, got {text!r}")
+
+
+def _compare(operator: str, field: str, value: Any) -> EntityFilter:
+    """
+    Build the test of a comparison. An absent property or a value of another
+    type never matches, as in the service.
+    """
+    test = _COMPARISONS[operator]
+
+    def evaluate(entity: Dict[str, Any]) -> bool:
+        actual = entity.get(field)
+        if actual is None:
+            return False
+        expected = value
+        if isinstance(expected, datetime) and isinstance(actual, str):
+            expected = expected.isoformat()
+        elif isinstance(expected, uuid.UUID) and isinstance(actual, str):
+            expected = str(expected)
+        if isinstance(actual, bool) != isinstance(expected, bool):
+            return False
+        try:
+            return test(actual, expected)
+        except TypeError:
+            return False
+
+    return evaluate
+
+
+@functools.lru_cache(maxsize=256)
+def compile_filter(query_filter: str) -> EntityFilter:
+    """
+    Compile the OData subset the storages generate (comparisons of a property
+    with a literal, and, or, not and parentheses) into an entity test.
+
+    :param query_filter: The filter string.
+    :return: A function telling whether an entity matches.
+    :raises ValueError: If the filter is not supported.
+    """
+    tokens = _tokenize(query_filter)
+    position = 0
+
+    def peek() -> Optional[str]:
+        return tokens[position][1] if position < len(tokens) else None
+
+    def take() -> Tuple[str, str]:
+        nonlocal position
+        if position >= len(tokens):
+            raise ValueError(f"Unexpected end of filter {query_filter!r}")
+        position += 1
+        return tokens[position - 1]
+
+    def parse_or() -> EntityFilter:
+        terms = [parse_and()]
+        while peek() == "or":
+            take()
+            terms.append(parse_and())
+        if len(terms) == 1:
+            return terms[0]
+        return lambda entity: any(term(entity) for term in terms)
+
+    def parse_and() -> EntityFilter:
+        terms = [parse_unary()]
+        while peek() == "and":
+            take()
+            terms.append(parse_unary())
+        if len(terms) == 1:
+            return terms[0]
+        return lambda entity: all(term(entity) for term in terms)
+
+    def parse_unary() -> EntityFilter:
+        kind, text = take()
+        if text == "not":
+            term = parse_unary()
+            return lambda entity: not term(entity)
+        if text == "(":
+            term = parse_or()
+            if take()[1] != ")":
+                raise ValueError(f"Unbalanced parentheses in {query_filter!r}")
+            return term
+        if kind != "name":
+            raise ValueError(f"Expected a property name, got {text!r}")
+        operator = take()[1]
+        if operator not in _COMPARISONS:
+            raise ValueError(f"Unsupported operator {operator!r}")
+        return _compare(operator, text, _parse_literal(*take()))
+
+    test = parse_or()
+    if position != len(tokens):
+        raise ValueError(f"Unexpected {peek()!r} in filter {query_filter!r}")
+    return test
+
+
+# Three failure injection settings, the tables, four counters and the seeded
+# random number generator.
+# pylint: disable-next=too-many-instance-attributes
+class InMemoryTableService:
+    """
+    InMemoryTableService holds tables of entities in memory and serves them
+    through clients with the subset of the asynchronous Azure Tables client API
+    the storages use.
+
+    Every entity request waits latency seconds, then fails with a 429
+    HttpResponseError with probability throttle_rate or with a
+    ServiceRequestError with probability failure_rate. Creating tables always
+    succeeds at once. The requests and the written entities are counted.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        throttle_rate: float = 0.0,
+        failure_rate: float = 0.0,
+        seed: Optional[int] = None,
+    ):
+        """
+        Initialize the InMemoryTableService instance.
+
+        :param latency: The number of seconds every request takes.
+        :param throttle_rate: The probability that a request is throttled.
+        :param failure_rate: The probability that a request fails to connect.
+        :param seed: Seeds the failure injection, for reproducible runs.
+        :raises ValueError: If latency is negative or a rate is not between 0 and 1.
+        """
+        if latency < 0:
+            raise ValueError("Latency must not be negative")
+        if not 0.0 <= throttle_rate <= 1.0 or not 0.0 <= failure_rate <= 1.0:
+            raise ValueError("Throttle and failure rates must be between 0 and 1")
+
+        self.latency = latency
+        self.throttle_rate = throttle_rate
+        self.failure_rate = failure_rate
+        self.tables: Dict[str, Dict[EntityKey, Dict[str, Any]]] = {}
+        self.requests = 0
+        self.written_entities = 0
+        self.throttled_requests = 0
+        self.failed_requests = 0
+        # Failure injection only needs reproducible, not unpredictable, draws.
+        self._random = random.Random(seed)  # nosec B311
+
+    async def request(self):
+        """
+        Simulate the latency and injected failures of one request. The clients
+        call it before serving every entity request.
+
+        :raises HttpResponseError: If the request is throttled.
+        :raises ServiceRequestError: If the request fails.
+        """
+        self.requests += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.throttle_rate and self._random.random() < self.throttle_rate:
+            self.throttled_requests += 1
+            error = HttpResponseError(message="Injected throttling")
+            error.status_code = 429
+            raise error
+        if self.failure_rate and self._random.random() < self.failure_rate:
+            self.failed_requests += 1
+            raise ServiceRequestError("Injected connection failure")
+
+    async def create_table(self, table_name: str):
+        """
+        Create a table.
+
+        :param table_name: The name of the table.
+        :raises ResourceExistsError: If the table already exists.
+        """
+        self.requests += 1
+        if table_name in self.tables:
+            raise ResourceExistsError("The table already exists")
+        self.tables[table_name] = {}
+
+    async def delete_table(self, table_name: str):
+        """
+        Delete a table. Deleting a missing table succeeds.
+
+        :param table_name: The name of the table.
+        """
+        self.requests += 1
+        self.tables.pop(table_name, None)
+
+    async def list_tables(self) -> AsyncIterator[TableItem]:
+        """
+        List the tables.
+
+        :return: An async iterator of the tables, in name order.
+        """
+        self.requests += 1
+        for table_name in sorted(self.tables):
+            yield TableItem(table_name)
+
+    def get_table_client(self, table_name: str) -> "InMemoryTableClient":
+        """
+        Get a client of a table.
+
+        :param table_name: The name of the table.
+        :return: The table client.
+        """
+        return InMemoryTableClient(self, table_name)
+
+    async def close(self):
+        """
+        Close the service client. The tables are kept.
+        """
+
+
+class _Pages:
+    """
+    The asynchronous page iterator of a query, starting at a continuation token.
+    """
+
+    def __init__(
+        self,
+        client: "InMemoryTableClient",
+        query_filter: str,
+        page_size: int,
+        select: Optional[Sequence[str]],
+        continuation_token: Optional[Dict[str, str]],
+    ):
+        self._client = client
+        self._test = compile_filter(query_filter)
+        self._page_size = page_size
+        self._select = select
+        self._start: Optional[EntityKey] = None
+        if continuation_token is not None:
+            self._start = (
+                continuation_token["PartitionKey"],
+                continuation_token["RowKey"],
+            )
+        self._done = False
+        self.continuation_token: Optional[Dict[str, str]] = None
+
+    def __aiter__(self) -> "_Pages":
+        return self
+
+    async def __anext__(self) -> AsyncIterator[Dict[str, Any]]:
+        if self._done:
+            raise StopAsyncIteration
+        await self._client.service.request()
+        matches = self._client._scan(self._test, self._start, self._page_size + 1)
+        page = matches[: self._page_size]
+        self.continuation_token = None
+        self._done = True
+        if len(matches) > self._page_size:
+            next_key = matches[-1][0]
+            self._start = next_key
+            self._done = False
+            self.continuation_token = {
+                "PartitionKey": next_key[0],
+                "RowKey": next_key[1],
+            }
+        return _aiter_page(
+            [self._client._project(entity, self._select) for _, entity in page]
+        )
+
+
+async def _aiter_page(entities: List[Dict[str, Any]]) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Iterate over the entities of a fetched page, like a service page.
+
+    :param entities: The entities.
+    :return: An async iterator of the entities.
+    """
+    for entity in entities:
+        yield entity
+
+
+class _Query:
+    """
+    The result of query_entities, read page by page from a continuation token.
+    """
+
+    def __init__(self, pages: Callable[[Optional[Dict[str, str]]], _Pages]):
+        self._pages = pages
+
+    def by_page(self, continuation_token: Optional[Dict[str, str]] = None) -> _Pages:
+        """
+        Iterate over the pages of the query.
+
+        :param continuation_token: The token of the page to start at, or None.
+        :return: An async iterator of pages with a continuation_token attribute.
+        """
+        return self._pages(continuation_token)
+
+
+class InMemoryTableClient:
+    """
+    A client of one table of an InMemoryTableService.
+    """
+
+    _operations = {"create", "upsert", "update", "delete"}
+
+    def __init__(self, service: InMemoryTableService, table_name: str):
+        self.service = service
+        self.table_name = table_name
+
+    @property
+    def _entities(self) -> Dict[EntityKey, Dict[str, Any]]:
+        try:
+            return self.service.tables[self.table_name]
+        except KeyError:
+            raise ResourceNotFoundError("The table does not exist") from None
+
+    def _scan(
+        self, test: EntityFilter, start: Optional[EntityKey], limit: int
+    ) -> List[Tuple[EntityKey, Dict[str, Any]]]:
+        """
+        Find the first matching entities in (PartitionKey, RowKey) order.
+
+        :param test: The compiled filter.
+        :param start: The key to start at, or None.
+        :param limit: The maximum number of entities to return.
+        :return: The keys and entities.
+        """
+        matches = []
+        for key in sorted(self._entities):
+            if start is not None and key < start:
+                continue
+            entity = self._entities[key]
+            if test(entity):
+                matches.append((key, entity))
+                if len(matches) == limit:
+                    break
+        return matches
+
+    @staticmethod
+    def _project(
+        entity: Dict[str, Any], select: Optional[Iterable[str]]
+    ) -> Dict[str, Any]:
+        if select is None:
+            return dict(entity)
+        return {field: entity[field] for field in select if field in entity}
+
+    def _apply(self, operation: str, entity: Dict[str, Any]):
+        key = (entity["PartitionKey"], entity["RowKey"])
+        if operation == "create" and key in self._entities:
+            raise ResourceExistsError("The specified entity already exists")
+        if operation in ("update", "delete") and key not in self._entities:
+            raise ResourceNotFoundError("The specified resource does not exist")
+        if operation == "delete":
+            del self._entities[key]
+        elif operation == "update":
+            self._entities[key].update(entity)
+        else:
+            self._entities[key] = dict(entity)
+            self.service.written_entities += 1
+
+    async def create_entity(self, entity: Dict[str, Any]):
+        """
+        Insert an entity.
+
+        :param entity: The entity.
+        :raises ResourceExistsError: If an entity with the same keys exists.
+        """
+        await self.service.request()
+        self._apply("create", entity)
+
+    async def upsert_entity(self, entity: Dict[str, Any]):
+        """
+        Insert or replace an entity.
+
+        :param entity: The entity.
+        """
+        await self.service.request()
+        self._apply("upsert", entity)
+
+    async def submit_transaction(
+        self, operations: Sequence[Tuple[str, Dict[str, Any]]]
+    ):
+        """
+        Apply the operations of an entity group transaction atomically.
+
+        :param operations: (operation, entity) tuples on a single partition.
+        :raises ValueError: If the transaction is empty, too large, spans several
+                            partitions or has an unsupported operation.
+        :raises ResourceExistsError: If a created entity already exists; no
+                                     operation is applied.
+        """
+        await self.service.request()
+        if not operations or len(operations) > MAX_TRANSACTION_SIZE:
+            raise ValueError("A transaction holds 1 to 100 operations")
+        if len({entity["PartitionKey"] for _, entity in operations}) != 1:
+            raise ValueError("A transaction must target a single partition")
+        for operation, _ in operations:
+            if operation not in self._operations:
+                raise ValueError(f"Unsupported transaction operation {operation!r}")
+        for operation, entity in operations:
+            key = (entity["PartitionKey"], entity["RowKey"])
+            if operation == "create" and key in self._entities:
+                raise ResourceExistsError("The specified entity already exists")
+        for operation, entity in operations:
+            self._apply(operation, entity)
+
+    async def get_entity(self, partition_key: str, row_key: str) -> Dict[str, Any]:
+        """
+        Read an entity.
+
+        :param partition_key: The partition key.
+        :param row_key: The row key.
+        :return: A copy of the entity.
+        :raises ResourceNotFoundError: If the entity does not exist.
+        """
+        await self.service.request()
+        try:
+            return dict(self._entities[(partition_key, row_key)])
+        except KeyError as e:
+            raise ResourceNotFoundError("The specified resource does not exist") from e
+
+    def query_entities(
+        self,
+        query_filter: str,
+        results_per_page: int = 1000,
+        select: Optional[Sequence[str]] = None,
+    ) -> _Query:
+        """
+        Query the entities matching a filter, in (PartitionKey, RowKey) order.
+
+        :param query_filter: The OData filter string.
+        :param results_per_page: The maximum number of entities per page.
+        :param select: The properties to return, or None for all.
+        :return: A query whose by_page() iterates over the pages.
+        """
+        return _Query(
+            lambda token: _Pages(self, query_filter, results_per_page, select, token)
+        )
+
+    async def close(self):
+        """
+        Close the client.
+        """
+
+
+class InMemoryTableStorage(AsyncAzureTableStorage):
+    """
+    InMemoryTableStorage is an AsyncAzureTableStorage backed by an
+    InMemoryTableService instead of the Azure Tables service, so the whole
+    storage code path runs without network access.
+    """
+
+    def __init__(
+        self,
+        table_name: str = "logs",
+        service: Optional[InMemoryTableService] = None,
+        max_concurrency: int = 50,
+        **options: Any,
+    ):
+        """
+        Initialize the InMemoryTableStorage instance.
+
+        :param table_name: The name of the table to store logs.
+        :param service: The in-memory service; defaults to a new one without
+                        latency or failures.
+        :param max_concurrency: The maximum number of concurrent requests.
+        :param options: The table storage options: descending_row_keys,
+                        partition_strategy, resilience, metadata_codec, trace_index
+                        and metrics (see TableStorageBase).
+        :raises ValueError: If table_name is empty or max_concurrency is not positive.
+        """
+        super().__init__(
+            connection_string="memory",
+            table_name=table_name,
+            max_concurrency=max_concurrency,
+            **options,
+        )
+        self.service = service or InMemoryTableService()
+
+    def _create_service_client(self) -> InMemoryTableService:
+        return self.service
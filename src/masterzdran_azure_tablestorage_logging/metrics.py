@@ -0,0 +1,311 @@
+"""
+Metrics for Azure Table Storage logging module.
+Records counters, gauges and histograms of the logging pipeline and exports them
+as a snapshot, in the Prometheus text format, or to callbacks.
+"""
+
+import os
+import threading
+import time
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    TypeVar,
+)
+
+T = TypeVar("T")
+
+Labels = Tuple[Tuple[str, str], ...]
+# Called with the kind ("counter", "gauge" or "histogram"), the metric name, the
+# recorded value and the labels of every recorded sample.
+MetricsSink = Callable[[str, str, float, Dict[str, str]], None]
+
+# Histogram bucket upper bounds for durations, in seconds.
+DEFAULT_TIME_BUCKETS = (
+    0.0001,
+    0.0005,
+    0.001,
+    0.005,
+    0.01,
+    0.05,
+    0.1,
+    0.5,
+    1.0,
+    5.0,
+)
+# Histogram bucket upper bounds for sizes (entities, bytes).
+DEFAULT_SIZE_BUCKETS = (1, 5, 10, 25, 50, 100, 1000, 10000, 65536, 1048576)
+
+
+class Histogram:
+    """
+    Histogram counts observations in cumulative buckets, Prometheus style.
+    """
+
+    __slots__ = ("buckets", "counts", "count", "sum")
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        """
+        Record an observation.
+
+        :param value: The observed value.
+        """
+        self.count += 1
+        self.sum += value
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Get the histogram values.
+
+        :return: The count, sum and cumulative bucket counts by upper bound.
+        """
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "buckets": dict(zip(self.buckets, self.counts)),
+        }
+
+
+def _label_text(labels: Labels, extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in labels]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_bound(bound: float) -> str:
+    return repr(float(bound)) if isinstance(bound, float) else str(bound)
+
+
+class Metrics:
+    """
+    Metrics is a registry of the pipeline's counters, gauges and histograms.
+
+    Components record into it only when one is passed to them, so an
+    uninstrumented pipeline pays a single None check per event. Samples are
+    also handed to the attached sinks as they are recorded. Recording is
+    thread-safe, so the registry can be shared with an AzureTableListener
+    thread.
+    """
+
+    def __init__(
+        self,
+        time_buckets: Sequence[float] = DEFAULT_TIME_BUCKETS,
+        size_buckets: Sequence[float] = DEFAULT_SIZE_BUCKETS,
+        sinks: Optional[List[MetricsSink]] = None,
+    ):
+        """
+        Initialize the Metrics instance.
+
+        :param time_buckets: The histogram buckets of metrics named *_seconds.
+        :param size_buckets: The histogram buckets of the other histograms.
+        :param sinks: Callbacks receiving every recorded sample.
+        """
+        self.time_buckets = tuple(time_buckets)
+        self.size_buckets = tuple(size_buckets)
+        self.sinks: List[MetricsSink] = list(sinks or [])
+        self._counters: Dict[Tuple[str, Labels], float] = {}
+        self._gauges: Dict[Tuple[str, Labels], float] = {}
+        self._histograms: Dict[Tuple[str, Labels], Histogram] = {}
+        self._lock = threading.Lock()
+
+    def add_sink(self, sink: MetricsSink):
+        """
+        Attach a callback receiving every recorded sample.
+
+        :param sink: Called with the kind, name, value and labels of a sample.
+        """
+        self.sinks.append(sink)
+
+    def _emit(self, kind: str, name: str, value: float, labels: Dict[str, str]):
+        for sink in self.sinks:
+            sink(kind, name, value, labels)
+
+    def increment(self, name: str, value: float = 1, **labels: str):
+        """
+        Add to a counter.
+
+        :param name: The counter name.
+        :param value: The amount to add.
+        :param labels: The labels of the counter.
+        """
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+        if self.sinks:
+            self._emit("counter", name, value, labels)
+
+    def set_gauge(self, name: str, value: float, **labels: str):
+        """
+        Set a gauge.
+
+        :param name: The gauge name.
+        :param value: The current value.
+        :param labels: The labels of the gauge.
+        """
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._gauges[key] = value
+        if self.sinks:
+            self._emit("gauge", name, value, labels)
+
+    def observe(self, name: str, value: float, **labels: str):
+        """
+        Record an observation in a histogram.
+
+        :param name: The histogram name; names ending in _seconds use the time
+                     buckets.
+        :param value: The observed value.
+        :param labels: The labels of the histogram.
+        """
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                buckets = (
+                    self.time_buckets
+                    if name.endswith("_seconds")
+                    else self.size_buckets
+                )
+                histogram = self._histograms[key] = Histogram(buckets)
+            histogram.observe(value)
+        if self.sinks:
+            self._emit("histogram", name, value, labels)
+
+    async def time_call(
+        self, name: str, call: Callable[[], Awaitable[T]], **labels: str
+    ) -> T:
+        """
+        Run a call, recording its duration in the name histogram and its failures
+        in the errors_total counter.
+
+        :param name: The histogram name.
+        :param call: Starts the call.
+        :param labels: The labels of the samples.
+        :return: The result of the call.
+        """
+        start = time.perf_counter()
+        try:
+            return await call()
+        except Exception as e:
+            self.increment("errors_total", error=type(e).__name__, **labels)
+            raise
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get a snapshot of every metric.
+
+        :return: The counters, gauges and histograms, keyed by name and then by
+                 their labels as a "name=value,..." string.
+        """
+
+        def label_key(labels: Labels) -> str:
+            return ",".join(f"{name}={value}" for name, value in labels)
+
+        snapshot: Dict[str, Dict[str, Dict[str, Any]]] = {
+            "counters": {},
+            "gauges": {},
+            "histograms": {},
+        }
+        with self._lock:
+            for (name, labels), value in self._counters.items():
+                snapshot["counters"].setdefault(name, {})[label_key(labels)] = value
+            for (name, labels), value in self._gauges.items():
+                snapshot["gauges"].setdefault(name, {})[label_key(labels)] = value
+            for (name, labels), histogram in self._histograms.items():
+                snapshot["histograms"].setdefault(name, {})[
+                    label_key(labels)
+                ] = histogram.snapshot()
+        return snapshot
+
+    def render_prometheus(self, prefix: str = "azure_table_logging") -> str:
+        """
+        Render every metric in the Prometheus text exposition format.
+
+        :param prefix: The prefix of the metric names.
+        :return: The exposition text.
+        """
+        lines: List[str] = []
+        typed = set()
+
+        def declare(name: str, kind: str):
+            if name not in typed:
+                typed.add(name)
+                lines.append(f"# TYPE {name} {kind}")
+
+        with self._lock:
+            for (name, labels), value in sorted(self._counters.items()):
+                full_name = f"{prefix}_{name}"
+                declare(full_name, "counter")
+                lines.append(f"{full_name}{_label_text(labels)} {value}")
+            for (name, labels), value in sorted(self._gauges.items()):
+                full_name = f"{prefix}_{name}"
+                declare(full_name, "gauge")
+                lines.append(f"{full_name}{_label_text(labels)} {value}")
+            for (name, labels), histogram in sorted(
+                self._histograms.items(), key=lambda item: item[0]
+            ):
+                full_name = f"{prefix}_{name}"
+                declare(full_name, "histogram")
+                for bound, count in zip(histogram.buckets, histogram.counts):
+                    le = f'le="{_format_bound(bound)}"'
+                    lines.append(f"{full_name}_bucket{_label_text(labels, le)} {count}")
+                inf = _label_text(labels, 'le="+Inf"')
+                lines.append(f"{full_name}_bucket{inf} {histogram.count}")
+                lines.append(f"{full_name}_sum{_label_text(labels)} {histogram.sum}")
+                lines.append(
+                    f"{full_name}_count{_label_text(labels)} {histogram.count}"
+                )
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str, prefix: str = "azure_table_logging"):
+        """
+        Write the Prometheus text to a file atomically, for a textfile collector.
+
+        :param path: The path of the .prom file.
+        :param prefix: The prefix of the metric names.
+        """
+        temporary = f"{path}.tmp"
+        with open(temporary, "w", encoding="utf-8") as file:
+            file.write(self.render_prometheus(prefix))
+        os.replace(temporary, path)
+
+
+def entity_size(entity: Dict[str, Any]) -> int:
+    """
+    Estimate the payload size of an entity in bytes.
+
+    :param entity: The table entity.
+    :return: The UTF-8 size of its strings plus the size of its binary values.
+    """
+    size = 0
+    for name, value in entity.items():
+        size += len(name)
+        if isinstance(value, str):
+            size += len(value.encode("utf-8")) if not value.isascii() else len(value)
+        elif isinstance(value, (bytes, bytearray)):
+            size += len(value)
+        elif value is not None:
+            size += 8
+    return size
@@ -2,25 +2,130 @@
 Models for Azure Table Storage logging module.
 """
 
-from typing import Any, Dict
+from collections.abc import Mapping
+from typing import Any, Dict, Iterator, Optional
 
+from .codec import loads
 
-class LogEntry:
+
+# One slot per entity column and key.
+# pylint: disable-next=too-many-instance-attributes
+class LogEntry(Mapping):
     """
-    LogEntry is a class that represents a log entry.
+    LogEntry is a compact, slotted record of a log entry.
+
+    AzureLogger builds one LogEntry per call and hands it to the storage as the
+    log data, which the storage serializes straight into the table entity. It is
+    also a read-only mapping of the entity columns ("LogLevel", "Message", ...),
+    so it can be used wherever log data dictionaries are expected.
     """
 
-    def __init__(self, partition_key: str, row_key: str, data: Dict[str, Any]):
+    __slots__ = (
+        "partition_key",
+        "row_key",
+        "level",
+        "message",
+        "timestamp",
+        "trace_id",
+        "logger_name",
+        "location",
+        "metadata",
+    )
+
+    # Column name -> attribute name.
+    _columns = {
+        "LogLevel": "level",
+        "Message": "message",
+        "Timestamp": "timestamp",
+        "TraceId": "trace_id",
+        "LoggerName": "logger_name",
+        "Location": "location",
+        "Metadata": "metadata",
+    }
+
+    def __init__(
+        self,
+        partition_key: str,
+        row_key: str,
+        level: Optional[str],
+        message: Optional[str],
+        *,
+        timestamp: Optional[str] = None,
+        trace_id: Optional[str] = None,
+        logger_name: Optional[str] = None,
+        location: Optional[str] = None,
+        metadata: Any = None,
+    ):
         """
         Initialize the LogEntry instance.
 
         :param partition_key: The partition key for the log entry.
         :param row_key: The row key for the log entry.
-        :param data: A dictionary containing the log data.
+        :param level: The level name, e.g. "INFO".
+        :param message: The log message.
+        :param timestamp: The ISO 8601 UTC time of the entry.
+        :param trace_id: The trace ID for the log entry.
+        :param logger_name: The name of the logger that wrote the entry.
+        :param location: The caller location, "path:line".
+        :param metadata: The JSON-serializable metadata.
         """
         self.partition_key = partition_key
         self.row_key = row_key
-        self.data = data
+        self.level = level
+        self.message = message
+        self.timestamp = timestamp
+        self.trace_id = trace_id
+        self.logger_name = logger_name
+        self.location = location
+        self.metadata = metadata
+
+    @classmethod
+    def from_entity(cls, entity: Dict[str, Any]) -> "LogEntry":
+        """
+        Build a LogEntry from an entity read from the table.
+
+        :param entity: The entity, with its Metadata reassembled as JSON text.
+        :return: The LogEntry, with the metadata parsed.
+        """
+        metadata = entity.get("Metadata")
+        if isinstance(metadata, (str, bytes)):
+            metadata = loads(metadata)
+        return cls(
+            entity.get("PartitionKey"),
+            entity.get("RowKey"),
+            entity.get("LogLevel"),
+            entity.get("Message"),
+            timestamp=entity.get("Timestamp"),
+            trace_id=entity.get("TraceId"),
+            logger_name=entity.get("LoggerName"),
+            location=entity.get("Location"),
+            metadata=metadata,
+        )
+
+    def __getitem__(self, key: str) -> Any:
+        try:
+            return getattr(self, self._columns[key])
+        except KeyError:
+            raise KeyError(key) from None
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._columns)
+
+    def __len__(self) -> int:
+        return len(self._columns)
+
+    def __repr__(self) -> str:
+        return (
+            f"LogEntry({self.partition_key!r}, {self.row_key!r}, {self.level!r}, "
+            f"{self.message!r})"
+        )
+
+    @property
+    def data(self) -> Dict[str, Any]:
+        """
+        The log data as a dictionary of entity columns.
+        """
+        return dict(self)
 
     def to_dict(self) -> Dict[str, Any]:
         """
@@ -28,7 +133,7 @@ class LogEntry:
 
         :return: A dictionary representation of the log entry.
         """
-        return {"PartitionKey": self.partition_key, "RowKey": self.row_key, **self.data}
+        return {"PartitionKey": self.partition_key, "RowKey": self.row_key, **self}
 
     def get_partition_key(self) -> str:
         """
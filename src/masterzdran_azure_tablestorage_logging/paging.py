@@ -0,0 +1,152 @@
+"""
+Continuation tokens for Azure Table Storage logging module.
+Encodes service and composite paging positions as opaque strings, and reads
+the pages of a query over several partitions in turn.
+"""
+
+import asyncio
+import base64
+import binascii
+import json
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+)
+
+# Reads the page at a partition index and service continuation token, and
+# returns it with the index and continuation token of the next page.
+PartitionPageFetcher = Callable[
+    [int, Optional[Dict[str, str]]],
+    Awaitable[Tuple[List[Dict[str, Any]], int, Optional[Dict[str, str]]]],
+]
+
+
+def encode_token(position: Any) -> Optional[str]:
+    """
+    Encode a paging position as an opaque continuation token.
+
+    :param position: A JSON serializable paging position, or None.
+    :return: The continuation token, or None when there are no more pages.
+    """
+    if not position:
+        return None
+    raw = json.dumps(position, separators=(",", ":"), sort_keys=True)
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+
+def decode_token(token: Optional[str]) -> Any:
+    """
+    Decode a continuation token produced by encode_token.
+
+    :param token: The continuation token, or None for the first page.
+    :return: The paging position, or None.
+    :raises ValueError: If the token is malformed.
+    """
+    if not token:
+        return None
+    try:
+        return json.loads(base64.urlsafe_b64decode(token.encode("ascii")))
+    except (binascii.Error, UnicodeError, ValueError) as e:
+        raise ValueError("Invalid continuation token") from e
+
+
+def decode_position(
+    continuation_token: Optional[str], logger_name: Optional[str]
+) -> Tuple[int, Optional[Dict[str, str]]]:
+    """
+    Decode the continuation token of a query that reads the partitions of a
+    logger in turn.
+
+    :param continuation_token: The token returned with the previous page, or None.
+    :param logger_name: The logger whose partitions are read, or None for a
+                        single query of every partition.
+    :return: The partition position and the service continuation token within it.
+    :raises ValueError: If the continuation token is invalid.
+    """
+    position = decode_token(continuation_token)
+    if logger_name is None:
+        return 0, position
+    if position is None:
+        return 0, None
+    try:
+        return position["p"], position["t"]
+    except (KeyError, TypeError) as e:
+        raise ValueError("Invalid continuation token") from e
+
+
+def encode_position(
+    logger_name: Optional[str],
+    index: int,
+    partition_count: int,
+    continuation: Optional[Dict[str, str]],
+) -> Optional[str]:
+    """
+    Encode the continuation token of a query that reads the partitions of a
+    logger in turn.
+
+    :param logger_name: The logger whose partitions are read, or None for a
+                        single query of every partition.
+    :param index: The position of the partition to resume from.
+    :param partition_count: The number of partitions the query reads.
+    :param continuation: The service continuation token within the partition.
+    :return: The token, or None if the query is complete.
+    """
+    if logger_name is None:
+        return encode_token(continuation)
+    if index < partition_count:
+        return encode_token({"p": index, "t": continuation})
+    return None
+
+
+def sort_page(
+    logs: List[Dict[str, Any]], order_by: str, ascending: bool
+) -> List[Dict[str, Any]]:
+    """
+    Sort a page by order_by unless the service already returned it in order.
+
+    :param logs: The entities of the page.
+    :param order_by: The field to order the logs by.
+    :param ascending: Whether to order the logs in ascending order.
+    :return: The ordered page.
+    """
+    if order_by != "Timestamp":
+        logs.sort(key=lambda x: x.get(order_by) or "", reverse=not ascending)
+    return logs
+
+
+async def read_pages(
+    fetch: PartitionPageFetcher, partition_count: int, prefetch: bool = True
+) -> AsyncIterator[List[Dict[str, Any]]]:
+    """
+    Read the pages of a query over several partitions in turn, fetching the next
+    page in the background while the caller consumes the current one.
+
+    :param fetch: Reads a page and returns the position of the next one.
+    :param partition_count: The number of partitions the query reads.
+    :param prefetch: Fetch the next page while the current one is consumed.
+    :return: An async iterator of pages; closing it cancels the pending fetch.
+    """
+
+    def start(index, continuation):
+        coroutine = fetch(index, continuation)
+        return asyncio.ensure_future(coroutine) if prefetch else coroutine
+
+    pending = start(0, None)
+    try:
+        while pending is not None:
+            page, index, continuation = await pending
+            pending = None
+            if index < partition_count:
+                pending = start(index, continuation)
+            yield page
+    finally:
+        if isinstance(pending, asyncio.Future):
+            pending.cancel()
+        elif pending is not None:
+            pending.close()
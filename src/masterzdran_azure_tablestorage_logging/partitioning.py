@@ -0,0 +1,214 @@
+"""
+Partitioning strategies for Azure Table Storage logging module.
+Decide which PartitionKey a log entry is written to and which partitions a query reads.
+"""
+
+import zlib
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Sequence, Tuple
+
+from .query import prefix_upper_bound
+
+
+def _as_naive_utc(timestamp: datetime) -> datetime:
+    """
+    Convert an aware datetime to naive UTC; naive datetimes are taken as UTC.
+
+    :param timestamp: The datetime to convert.
+    :return: The naive UTC datetime.
+    """
+    if timestamp.tzinfo is None:
+        return timestamp
+    return timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+class PartitionStrategy(ABC):
+    """
+    Abstract base class for partitioning strategies.
+    """
+
+    @abstractmethod
+    def partition_key(self, logger_name: str, timestamp: datetime, row_key: str) -> str:
+        """
+        Get the partition key for a log entry.
+
+        :param logger_name: The name of the logger writing the entry.
+        :param timestamp: The UTC time of the log entry.
+        :param row_key: The row key of the log entry.
+        :return: The partition key.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def partition_keys_for_range(
+        self,
+        logger_name: str,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None,
+    ) -> Optional[List[str]]:
+        """
+        Get the partition keys that may hold a logger's entries in a time range.
+
+        :param logger_name: The name of the logger.
+        :param start_time: The inclusive UTC start of the range, or None.
+        :param end_time: The inclusive UTC end of the range, or None.
+        :return: The partition keys in chronological order, or None if they cannot
+                 be enumerated and partition_key_range must be scanned instead.
+        """
+        raise NotImplementedError
+
+    def partition_keys_for_loggers(
+        self,
+        logger_names: Sequence[str],
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None,
+    ) -> List[str]:
+        """
+        Get the partition keys that may hold the entries of several loggers in a
+        time range, for merged queries.
+
+        :param logger_names: The names of the loggers.
+        :param start_time: The inclusive UTC start of the range, or None.
+        :param end_time: The inclusive UTC end of the range, or None.
+        :return: The partition keys, without duplicates.
+        :raises ValueError: If the partition keys of a logger cannot be enumerated.
+        """
+        partition_keys: List[str] = []
+        for logger_name in logger_names:
+            keys = self.partition_keys_for_range(logger_name, start_time, end_time)
+            if keys is None:
+                raise ValueError(
+                    "Merged queries need a start and end time with this partition strategy"
+                )
+            partition_keys.extend(key for key in keys if key not in partition_keys)
+        return partition_keys
+
+    def partition_key_range(self, logger_name: str) -> Tuple[str, str]:
+        """
+        Get the range of PartitionKeys holding all entries of a logger.
+
+        :param logger_name: The name of the logger.
+        :return: The inclusive lower and exclusive upper PartitionKey bounds.
+        """
+        return logger_name, prefix_upper_bound(logger_name)
+
+
+class LoggerNamePartitionStrategy(PartitionStrategy):
+    """
+    Writes each logger's entries to a single partition named after the logger.
+    """
+
+    def partition_key(self, logger_name: str, timestamp: datetime, row_key: str) -> str:
+        return logger_name
+
+    def partition_keys_for_range(
+        self,
+        logger_name: str,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None,
+    ) -> Optional[List[str]]:
+        return [logger_name]
+
+
+class TimeBucketPartitionStrategy(PartitionStrategy):
+    """
+    Writes entries to one partition per logger and hour or day bucket, for example
+    "my_service-2026101715", optionally spread over several hash shards
+    ("my_service-2026101715-03"). Time-range queries read only the buckets that
+    overlap the range.
+    """
+
+    _bucket_formats = {
+        "hour": ("%Y%m%d%H", timedelta(hours=1)),
+        "day": ("%Y%m%d", timedelta(days=1)),
+    }
+
+    def __init__(self, bucket: str = "hour", shards: int = 0):
+        """
+        Initialize the TimeBucketPartitionStrategy instance.
+
+        :param bucket: The bucket size, "hour" or "day".
+        :param shards: The number of hash shards per bucket, 0 to disable sharding.
+        :raises ValueError: If bucket or shards is invalid.
+        """
+        if bucket not in self._bucket_formats:
+            raise ValueError(
+                f"Invalid bucket. Must be one of {set(self._bucket_formats)}"
+            )
+        if shards < 0 or shards > 100:
+            raise ValueError("Shards must be between 0 and 100")
+
+        self.bucket = bucket
+        self.shards = shards
+        self._format, self._step = self._bucket_formats[bucket]
+        self._step_seconds = int(self._step.total_seconds())
+        # (logger_name, bucket number, formatted prefix) of the last bucket seen,
+        # so the hot path only formats a date once per bucket.
+        self._last_bucket: Tuple[str, int, str] = ("", -1, "")
+
+    def _bucket_start(self, timestamp: datetime) -> datetime:
+        """
+        Truncate a timestamp to the start of its bucket.
+
+        :param timestamp: The UTC timestamp.
+        :return: The start of the bucket.
+        """
+        if self.bucket == "day":
+            return timestamp.replace(hour=0, minute=0, second=0, microsecond=0)
+        return timestamp.replace(minute=0, second=0, microsecond=0)
+
+    def _bucket_prefix(self, logger_name: str, timestamp: datetime) -> str:
+        """
+        Get the unsharded partition key of the bucket holding a timestamp.
+
+        :param logger_name: The name of the logger.
+        :param timestamp: The UTC timestamp.
+        :return: The partition key without the shard suffix.
+        """
+        bucket_number = (
+            timestamp.toordinal() * 86400
+            + timestamp.hour * 3600
+            + timestamp.minute * 60
+            + timestamp.second
+        ) // self._step_seconds
+        cached_name, cached_number, cached_prefix = self._last_bucket
+        if cached_number == bucket_number and cached_name == logger_name:
+            return cached_prefix
+        prefix = f"{logger_name}-{self._bucket_start(timestamp).strftime(self._format)}"
+        self._last_bucket = (logger_name, bucket_number, prefix)
+        return prefix
+
+    def partition_key(self, logger_name: str, timestamp: datetime, row_key: str) -> str:
+        prefix = self._bucket_prefix(logger_name, timestamp)
+        if not self.shards:
+            return prefix
+        shard = zlib.crc32(row_key.encode("utf-8")) % self.shards
+        return f"{prefix}-{shard:02d}"
+
+    def partition_keys_for_range(
+        self,
+        logger_name: str,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None,
+    ) -> Optional[List[str]]:
+        if start_time is None or end_time is None:
+            return None
+
+        partition_keys = []
+        end_time = _as_naive_utc(end_time)
+        bucket = self._bucket_start(_as_naive_utc(start_time))
+        while bucket <= end_time:
+            prefix = f"{logger_name}-{bucket.strftime(self._format)}"
+            if self.shards:
+                partition_keys.extend(
+                    f"{prefix}-{shard:02d}" for shard in range(self.shards)
+                )
+            else:
+                partition_keys.append(prefix)
+            bucket += self._step
+        return partition_keys
+
+    def partition_key_range(self, logger_name: str) -> Tuple[str, str]:
+        # Buckets start with a digit, so "api" does not scan "api-gateway-...".
+        return f"{logger_name}-0", f"{logger_name}-:"
@@ -0,0 +1,381 @@
+"""
+Query builder for Azure Table Storage logging module.
+Composes typed predicates that compile to escaped OData filter strings.
+"""
+
+import math
+import re
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, Optional, Union
+
+from .keys import row_key_range
+
+_FIELD_NAME = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+_INT32_MIN, _INT32_MAX = -(2**31), 2**31 - 1
+_ONE_MICROSECOND = timedelta(microseconds=1)
+
+
+def quote(value: str) -> str:
+    """
+    Quote a string literal for an OData filter.
+
+    :param value: The string value.
+    :return: The quoted and escaped literal.
+    """
+    return "'" + value.replace("'", "''") + "'"
+
+
+def prefix_upper_bound(prefix: str) -> str:
+    """
+    Get the smallest string greater than every string starting with prefix.
+
+    :param prefix: A non-empty prefix.
+    :return: The exclusive upper bound of the prefix range.
+    """
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+def literal(value: Any) -> str:
+    """
+    Format a value as an OData literal.
+
+    :param value: A str, bool, int, float, datetime or UUID.
+    :return: The literal.
+    :raises ValueError: If the value type is not supported.
+    """
+    if isinstance(value, str):
+        return quote(value)
+    # bool is an int subclass, so it is checked first.
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, int):
+        # Values outside the Edm.Int32 range are sent as Edm.Int64.
+        return str(value) if _INT32_MIN <= value <= _INT32_MAX else f"{value}L"
+    if isinstance(value, float):
+        if not math.isfinite(value):
+            raise ValueError("Filter values must be finite numbers")
+        return repr(value)
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return f"datetime'{value.isoformat()}Z'"
+    if isinstance(value, uuid.UUID):
+        return f"guid'{value}'"
+    raise ValueError(f"Invalid filter value type {type(value).__name__}")
+
+
+class Predicate:
+    """
+    Base class of query predicates. Predicates combine with & (and), | (or)
+    and ~ (not).
+    """
+
+    def compile(self, descending_row_keys: bool = True) -> str:
+        """
+        Compile the predicate to an OData filter string.
+
+        :param descending_row_keys: The RowKey layout of the table, used by time
+                                    range predicates.
+        :return: The filter string.
+        """
+        raise NotImplementedError
+
+    def __and__(self, other: "Predicate") -> "Predicate":
+        return And(self, other)
+
+    def __or__(self, other: "Predicate") -> "Predicate":
+        return Or(self, other)
+
+    def __invert__(self) -> "Predicate":
+        return Not(self)
+
+
+class Comparison(Predicate):
+    """
+    A comparison of a property with a literal, e.g. LogLevel eq 'ERROR'.
+    """
+
+    operators = {"eq", "ne", "gt", "ge", "lt", "le"}
+
+    def __init__(self, field_name: str, operator: str, value: Any):
+        """
+        Initialize the Comparison instance.
+
+        :param field_name: The property name.
+        :param operator: One of eq, ne, gt, ge, lt, le.
+        :param value: The value compared with.
+        :raises ValueError: If the field name, operator or value is invalid.
+        """
+        if operator not in self.operators:
+            raise ValueError(f"Invalid operator. Must be one of {self.operators}")
+        self.field_name = field_name
+        self.operator = operator
+        self.value = value
+        self._literal = literal(value)
+
+    def compile(self, descending_row_keys: bool = True) -> str:
+        return f"{self.field_name} {self.operator} {self._literal}"
+
+
+class And(Predicate):
+    """
+    All of the predicates hold.
+    """
+
+    def __init__(self, *predicates: Predicate):
+        self.predicates = predicates
+
+    def compile(self, descending_row_keys: bool = True) -> str:
+        return " and ".join(
+            (
+                f"({predicate.compile(descending_row_keys)})"
+                if isinstance(predicate, Or)
+                else predicate.compile(descending_row_keys)
+            )
+            for predicate in self.predicates
+        )
+
+
+class Or(Predicate):
+    """
+    At least one of the predicates holds.
+    """
+
+    def __init__(self, *predicates: Predicate):
+        self.predicates = predicates
+
+    def compile(self, descending_row_keys: bool = True) -> str:
+        return " or ".join(
+            f"({predicate.compile(descending_row_keys)})"
+            for predicate in self.predicates
+        )
+
+
+class Not(Predicate):
+    """
+    The predicate does not hold.
+    """
+
+    def __init__(self, predicate: Predicate):
+        self.predicate = predicate
+
+    def compile(self, descending_row_keys: bool = True) -> str:
+        return f"not ({self.predicate.compile(descending_row_keys)})"
+
+
+class TimeRange(Predicate):
+    """
+    The entry was logged within an inclusive time range. Compiles to a RowKey
+    range, so the service scans only that range of each partition.
+    """
+
+    def __init__(
+        self, start: Optional[datetime] = None, end: Optional[datetime] = None
+    ):
+        """
+        Initialize the TimeRange instance.
+
+        :param start: The inclusive UTC start of the range, or None.
+        :param end: The inclusive UTC end of the range, or None.
+        :raises ValueError: If both bounds are None or start is after end.
+        """
+        if start is None and end is None:
+            raise ValueError("Time range needs a start or an end")
+        if start is not None and end is not None and start > end:
+            raise ValueError("Start time must not be after end time")
+        self.start = start
+        self.end = end
+
+    def compile(self, descending_row_keys: bool = True) -> str:
+        lower, upper = row_key_range(self.start, self.end, descending_row_keys)
+        conditions = []
+        if lower is not None:
+            conditions.append(f"RowKey ge {quote(lower)}")
+        if upper is not None:
+            conditions.append(f"RowKey lt {quote(upper)}")
+        return " and ".join(conditions)
+
+
+class Field:
+    """
+    A property to build predicates on. Comparing the Timestamp with datetimes
+    builds a TimeRange, which the service serves as a RowKey range scan.
+    """
+
+    def __init__(self, name: str):
+        """
+        Initialize the Field instance.
+
+        :param name: The property name.
+        :raises ValueError: If the name is not a valid property name.
+        """
+        if not _FIELD_NAME.match(name):
+            raise ValueError(f"Invalid field name {name!r}")
+        self.name = name
+
+    def _is_time(self, value: Any) -> bool:
+        """
+        Check whether a comparison is a Timestamp range.
+
+        :param value: The compared value.
+        :return: True if this is the Timestamp and the value a datetime.
+        """
+        return self.name == "Timestamp" and isinstance(value, datetime)
+
+    def eq(self, value: Any) -> Predicate:
+        """
+        The property equals a value.
+
+        :param value: The value.
+        :return: The predicate.
+        """
+        return Comparison(self.name, "eq", value)
+
+    def ne(self, value: Any) -> Predicate:
+        """
+        The property differs from a value.
+
+        :param value: The value.
+        :return: The predicate.
+        """
+        return Comparison(self.name, "ne", value)
+
+    def gt(self, value: Any) -> Predicate:
+        """
+        The property is greater than a value.
+
+        :param value: The value.
+        :return: The predicate.
+        """
+        if self._is_time(value):
+            return TimeRange(start=value + _ONE_MICROSECOND)
+        return Comparison(self.name, "gt", value)
+
+    def ge(self, value: Any) -> Predicate:
+        """
+        The property is greater than or equal to a value.
+
+        :param value: The value.
+        :return: The predicate.
+        """
+        if self._is_time(value):
+            return TimeRange(start=value)
+        return Comparison(self.name, "ge", value)
+
+    def lt(self, value: Any) -> Predicate:
+        """
+        The property is less than a value.
+
+        :param value: The value.
+        :return: The predicate.
+        """
+        if self._is_time(value):
+            return TimeRange(end=value - _ONE_MICROSECOND)
+        return Comparison(self.name, "lt", value)
+
+    def le(self, value: Any) -> Predicate:
+        """
+        The property is less than or equal to a value.
+
+        :param value: The value.
+        :return: The predicate.
+        """
+        if self._is_time(value):
+            return TimeRange(end=value)
+        return Comparison(self.name, "le", value)
+
+    def between(self, low: Any, high: Any) -> Predicate:
+        """
+        The property is within an inclusive range.
+
+        :param low: The lowest value.
+        :param high: The highest value.
+        :return: The predicate.
+        """
+        if self._is_time(low) and self._is_time(high):
+            return TimeRange(low, high)
+        return And(Comparison(self.name, "ge", low), Comparison(self.name, "le", high))
+
+    def in_(self, values: Iterable[Any]) -> Predicate:
+        """
+        The property equals one of the values.
+
+        :param values: The values.
+        :return: The predicate.
+        :raises ValueError: If values is empty.
+        """
+        comparisons = [Comparison(self.name, "eq", value) for value in values]
+        if not comparisons:
+            raise ValueError("In needs at least one value")
+        if len(comparisons) == 1:
+            return comparisons[0]
+        return Or(*comparisons)
+
+    def startswith(self, prefix: str) -> Predicate:
+        """
+        The string property starts with a prefix. Compiles to a range, which is a
+        range scan on PartitionKey and RowKey.
+
+        :param prefix: A non-empty prefix.
+        :return: The predicate.
+        :raises ValueError: If the prefix is empty.
+        """
+        if not prefix:
+            raise ValueError("Prefix cannot be empty")
+        return And(
+            Comparison(self.name, "ge", prefix),
+            Comparison(self.name, "lt", prefix_upper_bound(prefix)),
+        )
+
+
+# Query filters: a dictionary of property values, or a Predicate.
+Filters = Union[Dict[str, Any], Predicate]
+
+
+def to_predicate(filters: Optional[Filters]) -> Optional[Predicate]:
+    """
+    Convert query filters to a Predicate.
+
+    A dictionary matches each property to its value, or to any of the values of
+    a list, tuple or set.
+
+    :param filters: A dictionary of property values, a Predicate, or None.
+    :return: The predicate, or None if there are no filters.
+    :raises ValueError: If a field name or value is invalid.
+    """
+    if not filters:
+        return None
+    if isinstance(filters, Predicate):
+        return filters
+
+    predicates = []
+    for field_name, value in filters.items():
+        field = Field(field_name)
+        try:
+            if isinstance(value, (list, tuple, set, frozenset)):
+                predicates.append(field.in_(value))
+            else:
+                predicates.append(field.eq(value))
+        except ValueError as e:
+            raise ValueError(f"Invalid filter value type for field {field_name}") from e
+    return And(*predicates)
+
+
+def compile_filters(
+    filters: Optional[Filters], descending_row_keys: bool = True
+) -> Optional[str]:
+    """
+    Compile query filters to an OData filter string.
+
+    :param filters: A dictionary of property values, a Predicate, or None.
+    :param descending_row_keys: The RowKey layout of the table.
+    :return: The filter string, or None if there are no filters.
+    :raises ValueError: If a field name or value is invalid.
+    """
+    predicate = to_predicate(filters)
+    if predicate is None:
+        return None
+    text = predicate.compile(descending_row_keys)
+    # Keep "or" from binding looser than the conditions it is joined with.
+    return f"({text})" if isinstance(predicate, Or) else text
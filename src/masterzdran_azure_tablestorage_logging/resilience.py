@@ -0,0 +1,280 @@
+"""
+Resilience policies for Azure Table Storage logging module.
+Retries transient storage failures with jittered backoff and stops calling a
+failing service through a circuit breaker.
+"""
+
+import asyncio
+import random
+import time
+from typing import Awaitable, Callable, Optional, TypeVar, cast
+
+from azure.core.exceptions import (
+    HttpResponseError,
+    ResourceExistsError,
+    ServiceRequestError,
+    ServiceResponseError,
+)
+
+from .exceptions import CircuitOpenError
+from .interfaces import StorageInterface
+from .metrics import Metrics
+
+T = TypeVar("T")
+
+# HTTP status codes of throttling and transient service failures.
+RETRYABLE_STATUS_CODES = frozenset({408, 429, 500, 502, 503, 504})
+
+
+def is_retryable(error: BaseException) -> bool:
+    """
+    Check whether a storage error is transient: throttling (429), a busy or
+    unavailable service (5xx), a timeout or a connection failure. Chained causes
+    are inspected too.
+
+    :param error: The error raised by a storage call.
+    :return: True if the call may succeed when retried.
+    """
+    current: Optional[BaseException] = error
+    while current is not None:
+        if isinstance(current, HttpResponseError) and current.status_code is not None:
+            return current.status_code in RETRYABLE_STATUS_CODES
+        if isinstance(
+            current,
+            (
+                ServiceRequestError,
+                ServiceResponseError,
+                asyncio.TimeoutError,
+                TimeoutError,
+                ConnectionError,
+            ),
+        ):
+            return True
+        current = current.__cause__
+    return False
+
+
+def is_already_stored(error: BaseException) -> bool:
+    """
+    Check whether a write failed because its entities already exist (409).
+    Chained causes are inspected too.
+
+    :param error: The error raised by a write.
+    :return: True if the entities of the write are already stored.
+    """
+    current: Optional[BaseException] = error
+    while current is not None:
+        if isinstance(current, ResourceExistsError):
+            return True
+        if isinstance(current, HttpResponseError) and current.status_code == 409:
+            return current.error_code == "EntityAlreadyExists"
+        current = current.__cause__
+    return False
+
+
+class RetryPolicy:
+    """
+    RetryPolicy retries transient failures with decorrelated-jitter backoff: each
+    delay is drawn between base_delay and three times the previous delay, capped
+    at max_delay.
+    """
+
+    def __init__(
+        self,
+        max_attempts: int = 4,
+        base_delay: float = 0.1,
+        max_delay: float = 10.0,
+        classifier: Callable[[BaseException], bool] = is_retryable,
+    ):
+        """
+        Initialize the RetryPolicy instance.
+
+        :param max_attempts: The maximum number of attempts per call, including the first.
+        :param base_delay: The minimum number of seconds between attempts.
+        :param max_delay: The maximum number of seconds between attempts.
+        :param classifier: Decides whether an error is worth retrying.
+        :raises ValueError: If an argument is invalid.
+        """
+        if max_attempts <= 0:
+            raise ValueError("Max attempts must be positive")
+        if base_delay <= 0 or max_delay < base_delay:
+            raise ValueError("Delays must be positive and base delay at most max delay")
+
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.classifier = classifier
+
+    def next_delay(self, previous: float) -> float:
+        """
+        Draw the delay before the next attempt.
+
+        :param previous: The previous delay, or 0 before the first retry.
+        :return: The number of seconds to wait.
+        """
+        upper = max(self.base_delay, previous * 3)
+        return min(self.max_delay, random.uniform(self.base_delay, upper))  # nosec B311
+
+
+class CircuitBreaker:
+    """
+    CircuitBreaker opens after failure_threshold consecutive transient failures
+    and then refuses calls for reset_timeout seconds. After that a single trial
+    call is let through: its success closes the circuit, its failure opens it
+    again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Initialize the CircuitBreaker instance.
+
+        :param failure_threshold: The number of consecutive failures that opens the circuit.
+        :param reset_timeout: The number of seconds the circuit stays open.
+        :param clock: The monotonic clock used to time the open state.
+        :raises ValueError: If failure_threshold or reset_timeout is not positive.
+        """
+        if failure_threshold <= 0:
+            raise ValueError("Failure threshold must be positive")
+        if reset_timeout <= 0:
+            raise ValueError("Reset timeout must be positive")
+
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.state = self.CLOSED
+        self.failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+
+    def allow(self) -> bool:
+        """
+        Check whether a call may go ahead.
+
+        :return: False while the circuit is open, or while a trial call is in flight.
+        """
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN:
+            if self.clock() - self._opened_at < self.reset_timeout:
+                return False
+            self.state = self.HALF_OPEN
+        if self._trial_in_flight:
+            return False
+        self._trial_in_flight = True
+        return True
+
+    def record_success(self):
+        """
+        Record a successful call, closing the circuit.
+        """
+        self.state = self.CLOSED
+        self.failures = 0
+        self._trial_in_flight = False
+
+    def record_failure(self):
+        """
+        Record a transient failure, opening the circuit at the threshold or after
+        a failed trial call.
+        """
+        self.failures += 1
+        self._trial_in_flight = False
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            self.state = self.OPEN
+            self._opened_at = self.clock()
+
+    def record_ignored(self):
+        """
+        Record a call that failed for a reason unrelated to the service's health.
+        """
+        self._trial_in_flight = False
+
+
+class Resilience:
+    """
+    Resilience combines a RetryPolicy and a CircuitBreaker around storage calls.
+    While the circuit is open, writes go to the fallback storage when one is
+    configured and other calls fail fast with CircuitOpenError.
+    """
+
+    def __init__(
+        self,
+        retry: Optional[RetryPolicy] = None,
+        breaker: Optional[CircuitBreaker] = None,
+        fallback: Optional[StorageInterface] = None,
+    ):
+        """
+        Initialize the Resilience instance.
+
+        :param retry: The retry policy; defaults to RetryPolicy().
+        :param breaker: The circuit breaker; defaults to CircuitBreaker().
+        :param fallback: The storage that receives writes while the circuit is
+                         open, for example a SpoolingStorage around another
+                         storage; None fails fast. A fallback wrapping the
+                         protected storage is not used, the CircuitOpenError
+                         reaches the wrapper instead.
+        """
+        self.retry = retry if retry is not None else RetryPolicy()
+        self.breaker = breaker if breaker is not None else CircuitBreaker()
+        self.fallback = fallback
+        self.retried_calls = 0
+        self.rejected_calls = 0
+        # Records retries and rejected calls; set by the storage when None.
+        self.metrics: Optional[Metrics] = None
+
+    async def call(
+        self, operation: Callable[[], Awaitable[T]], write: bool = False
+    ) -> T:
+        """
+        Run a storage operation, retrying transient failures.
+
+        A timed out write may have landed before it is retried. When the retry of
+        a write fails because its entities already exist, the write succeeded and
+        None is returned.
+
+        :param operation: Starts one attempt of the operation.
+        :param write: Whether the operation creates entities.
+        :return: The result of the operation.
+        :raises CircuitOpenError: If the circuit breaker refuses the call.
+        :raises Exception: The last error, if the operation does not succeed.
+        """
+        attempt, delay = 1, 0.0
+        while True:
+            if not self.breaker.allow():
+                self.rejected_calls += 1
+                if self.metrics is not None:
+                    self.metrics.increment("circuit_rejections_total")
+                raise CircuitOpenError("Circuit breaker is open")
+            try:
+                result = await operation()
+            except Exception as e:  # pylint: disable=broad-except
+                if write and attempt > 1 and is_already_stored(e):
+                    self.breaker.record_success()
+                    return cast(T, None)
+                if not self.retry.classifier(e):
+                    self.breaker.record_ignored()
+                    raise
+                self.breaker.record_failure()
+                if attempt >= self.retry.max_attempts:
+                    raise
+            except BaseException:
+                # Cancelled: release a trial call without judging the service.
+                self.breaker.record_ignored()
+                raise
+            else:
+                self.breaker.record_success()
+                return result
+            attempt += 1
+            delay = self.retry.next_delay(delay)
+            self.retried_calls += 1
+            if self.metrics is not None:
+                self.metrics.increment("retries_total")
+            await asyncio.sleep(delay)
@@ -0,0 +1,541 @@
+"""
+Time-rotated tables for Azure Table Storage logging module.
+Routes log entries to one table per time period, optionally sharded across
+storage accounts by logger, so retention drops whole tables.
+"""
+
+import asyncio
+import re
+import time
+import zlib
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from .interfaces import StorageInterface
+from .keys import row_key_time
+from .models import LogEntry
+from .paging import decode_token, encode_token, sort_page
+from .partitioning import LoggerNamePartitionStrategy, PartitionStrategy, _as_naive_utc
+from .query import Filters
+from .storage import AzureTableStorage
+from .storage_base import TableStorageBase
+from .transactions import LogTuple
+
+# Creates the storage of a table: called with a connection string and a table name.
+StorageFactory = Callable[[str, str], TableStorageBase]
+
+# A table to read: the shard position and the table name.
+TableRef = Tuple[int, str]
+
+_TABLE_PREFIX = re.compile(r"[A-Za-z][A-Za-z0-9]{0,44}")
+
+
+def _utcnow() -> datetime:
+    """
+    Get the current UTC time as a naive datetime, like the RowKey timestamps.
+
+    :return: The current UTC time.
+    """
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+# Nine settings, the compiled table name format and pattern, and the cached
+# storages and table listings.
+# pylint: disable-next=too-many-instance-attributes
+class RotatingTableStorage(StorageInterface):
+    """
+    RotatingTableStorage writes every log entry to the table of the period its
+    RowKey was generated in, for example logs202610 for October 2026, on the
+    shard its logger hashes to.
+
+    Each shard is a connection string, usually of its own storage account, so
+    the loggers spread over the scalability targets of several accounts.
+    Queries only read the tables whose period overlaps the requested time range,
+    and only the shard of the logger when one is given. With retention, tables
+    of older periods are deleted whole, one request per table, when writes roll
+    over to a new table or when drop_expired() is called.
+    """
+
+    _period_formats = {"day": "%Y%m%d", "month": "%Y%m"}
+
+    def __init__(
+        self,
+        connection_strings: Sequence[str],
+        table_prefix: str = "logs",
+        period: str = "month",
+        retention: Optional[int] = None,
+        *,
+        storage_factory: Optional[StorageFactory] = None,
+        descending_row_keys: bool = True,
+        partition_strategy: Optional[PartitionStrategy] = None,
+        refresh_interval: float = 60.0,
+        clock: Callable[[], datetime] = _utcnow,
+    ):
+        """
+        Initialize the RotatingTableStorage instance.
+
+        :param connection_strings: The connection string of every shard.
+        :param table_prefix: The start of the table names, followed by the period.
+        :param period: The period of a table, "day" or "month".
+        :param retention: The number of periods kept, including the current one;
+                          None keeps every table.
+        :param storage_factory: Creates the storage of a table; defaults to an
+                                AzureTableStorage with the RowKey layout and
+                                partition strategy of this storage.
+        :param descending_row_keys: Whether the tables' RowKeys sort newest first.
+        :param partition_strategy: How loggers partition their entries; defaults to
+                                   one partition per logger name.
+        :param refresh_interval: The number of seconds the listed tables of a
+                                 shard are reused before listing them again.
+        :param clock: Returns the current UTC time.
+        :raises ValueError: If an argument is invalid.
+        """
+        if not connection_strings or not all(connection_strings):
+            raise ValueError("Connection strings cannot be empty")
+        if not _TABLE_PREFIX.fullmatch(table_prefix):
+            raise ValueError(
+                "Table prefix must be alphanumeric, start with a letter and have "
+                "at most 45 characters"
+            )
+        if period not in self._period_formats:
+            raise ValueError(
+                f"Invalid period. Must be one of {set(self._period_formats)}"
+            )
+        if retention is not None and retention <= 0:
+            raise ValueError("Retention must be positive")
+        if refresh_interval < 0:
+            raise ValueError("Refresh interval must not be negative")
+
+        self.connection_strings = list(connection_strings)
+        self.table_prefix = table_prefix
+        self.period = period
+        self.retention = retention
+        self.descending_row_keys = descending_row_keys
+        self.partition_strategy = partition_strategy or LoggerNamePartitionStrategy()
+        self.storage_factory = storage_factory or self._default_factory
+        self.refresh_interval = refresh_interval
+        self.clock = clock
+        self._format = self._period_formats[period]
+        self._table_pattern = re.compile(
+            re.escape(table_prefix) + (r"\d{8}" if period == "day" else r"\d{6}")
+        )
+        self._storages: Dict[TableRef, TableStorageBase] = {}
+        # The table names of every shard and when they were listed.
+        self._tables: Dict[int, Tuple[float, List[str]]] = {}
+
+    def _default_factory(self, connection_string: str, table_name: str):
+        return AzureTableStorage(
+            connection_string,
+            table_name,
+            descending_row_keys=self.descending_row_keys,
+            partition_strategy=self.partition_strategy,
+        )
+
+    def _period_start(self, timestamp: datetime) -> datetime:
+        """
+        Truncate a timestamp to the start of its period.
+
+        :param timestamp: The UTC timestamp.
+        :return: The naive start of the period.
+        """
+        start = _as_naive_utc(timestamp).replace(
+            hour=0, minute=0, second=0, microsecond=0
+        )
+        return start.replace(day=1) if self.period == "month" else start
+
+    def _next_period(self, start: datetime) -> datetime:
+        """
+        Get the start of the period following the one starting at start.
+
+        :param start: The start of a period.
+        :return: The start of the next period.
+        """
+        if self.period == "day":
+            return start + timedelta(days=1)
+        return (start + timedelta(days=32)).replace(day=1)
+
+    def _previous_periods(self, start: datetime, count: int) -> datetime:
+        """
+        Go back a number of periods.
+
+        :param start: The start of a period.
+        :param count: The number of periods to go back.
+        :return: The start of the period count periods before.
+        """
+        if self.period == "day":
+            return start - timedelta(days=count)
+        months = start.year * 12 + start.month - 1 - count
+        return start.replace(year=months // 12, month=months % 12 + 1)
+
+    def table_name(self, timestamp: datetime) -> str:
+        """
+        Get the name of the table holding the entries logged at a time.
+
+        :param timestamp: The UTC time of the entries.
+        :return: The table name.
+        """
+        return self.table_prefix + self._period_start(timestamp).strftime(self._format)
+
+    def _table_period(self, table_name: str) -> datetime:
+        return datetime.strptime(table_name[len(self.table_prefix) :], self._format)
+
+    def shard(self, logger_name: str) -> int:
+        """
+        Get the shard of a logger.
+
+        :param logger_name: The name of the logger.
+        :return: The position of its connection string.
+        """
+        if len(self.connection_strings) == 1:
+            return 0
+        return zlib.crc32(logger_name.encode("utf-8")) % len(self.connection_strings)
+
+    def _storage(self, shard: int, table_name: str) -> TableStorageBase:
+        """
+        Get the storage of a table, creating it on first use.
+
+        :param shard: The shard of the table.
+        :param table_name: The name of the table.
+        :return: The storage.
+        """
+        storage = self._storages.get((shard, table_name))
+        if storage is None:
+            storage = self.storage_factory(self.connection_strings[shard], table_name)
+            self._storages[(shard, table_name)] = storage
+        return storage
+
+    async def _list_tables(self, shard: int, refresh: bool = False) -> List[str]:
+        """
+        List the rotated tables of a shard, reusing a recent listing.
+
+        :param shard: The shard.
+        :param refresh: Whether to list the tables even if a listing is recent.
+        :return: The sorted table names.
+        """
+        listed = self._tables.get(shard)
+        now = time.monotonic()
+        if (
+            not refresh
+            and listed is not None
+            and now - listed[0] < self.refresh_interval
+        ):
+            return listed[1]
+        storage = self._storage(shard, self.table_name(self.clock()))
+        names = [
+            name
+            for name in await storage.list_tables(self.table_prefix)
+            if self._table_pattern.fullmatch(name)
+        ]
+        self._tables[shard] = (now, names)
+        return names
+
+    def _route(self, partition_key: str, row_key: str, data: Any) -> TableRef:
+        """
+        Get the table of a log entry.
+
+        :param partition_key: The partition key of the log entry.
+        :param row_key: The row key of the log entry.
+        :param data: A dictionary or LogEntry containing the log data.
+        :return: The shard and the name of the table.
+        """
+        if isinstance(data, LogEntry):
+            logger_name = data.logger_name
+        else:
+            logger_name = data.get("LoggerName")
+        timestamp = row_key_time(row_key, self.descending_row_keys) or self.clock()
+        return self.shard(logger_name or partition_key), self.table_name(timestamp)
+
+    async def _written(self, tables: Sequence[TableRef]):
+        """
+        Note the tables written to, dropping expired tables on the first write
+        and when a write rolls over to a table that was not listed.
+
+        :param tables: The tables written to.
+        """
+        rolled_over = False
+        for shard, table_name in tables:
+            listed = self._tables.get(shard)
+            if listed is None:
+                rolled_over = True
+            elif table_name not in listed[1]:
+                listed[1].append(table_name)
+                listed[1].sort()
+                rolled_over = True
+        if rolled_over and self.retention is not None:
+            await self.drop_expired()
+
+    async def store_log(self, partition_key: str, row_key: str, data: Dict[str, Any]):
+        """
+        Store a log entry in the table of its period and shard.
+
+        :param partition_key: The partition key for the log entry.
+        :param row_key: The row key for the log entry.
+        :param data: A dictionary containing the log data.
+        """
+        table = self._route(partition_key, row_key, data)
+        await self._storage(*table).store_log(partition_key, row_key, data)
+        await self._written([table])
+
+    async def store_logs(self, entries: Sequence[LogTuple]):
+        """
+        Store several log entries, writing the entries of every table
+        concurrently.
+
+        :param entries: A sequence of (partition_key, row_key, data) tuples.
+        """
+        groups: Dict[TableRef, List[LogTuple]] = {}
+        for entry in entries:
+            groups.setdefault(self._route(*entry), []).append(entry)
+        await asyncio.gather(
+            *(
+                self._storage(*table).store_logs(group)
+                for table, group in groups.items()
+            )
+        )
+        await self._written(list(groups))
+
+    async def drop_expired(self, now: Optional[datetime] = None) -> List[str]:
+        """
+        Delete the tables of the periods older than the retention.
+
+        :param now: The current UTC time; defaults to the clock.
+        :return: The names of the deleted tables.
+        """
+        if self.retention is None:
+            return []
+        cutoff = self._previous_periods(
+            self._period_start(now or self.clock()), self.retention - 1
+        )
+        dropped = []
+        for shard, connection_string in enumerate(self.connection_strings):
+            names = await self._list_tables(shard, refresh=True)
+            for table_name in names:
+                if self._table_period(table_name) >= cutoff:
+                    continue
+                storage = self._storages.pop((shard, table_name), None)
+                if storage is None:
+                    storage = self.storage_factory(connection_string, table_name)
+                await storage.drop_table()
+                dropped.append(table_name)
+            self._tables[shard] = (
+                self._tables[shard][0],
+                [name for name in names if name not in dropped],
+            )
+        return dropped
+
+    async def _tables_for_range(
+        self,
+        logger_name: Optional[str],
+        start_time: Optional[datetime],
+        end_time: Optional[datetime],
+    ) -> List[TableRef]:
+        """
+        Get the tables holding entries of a logger in a time range, in the RowKey
+        layout's time order.
+
+        :param logger_name: Only read the shard of this logger, or None.
+        :param start_time: The inclusive start of the range, or None.
+        :param end_time: The inclusive end of the range, or None.
+        :return: The shards and names of the tables.
+        """
+        if logger_name is None:
+            shards = list(range(len(self.connection_strings)))
+        else:
+            shards = [self.shard(logger_name)]
+        start = _as_naive_utc(start_time) if start_time is not None else None
+        end = _as_naive_utc(end_time) if end_time is not None else None
+        tables = []
+        for shard in shards:
+            for table_name in await self._list_tables(shard):
+                period = self._table_period(table_name)
+                if end is not None and period > end:
+                    continue
+                if start is not None and self._next_period(period) <= start:
+                    continue
+                tables.append((table_name, shard))
+        tables.sort(reverse=self.descending_row_keys)
+        return [(shard, table_name) for table_name, shard in tables]
+
+    def _resume(
+        self, tables: List[TableRef], continuation_token: Optional[str]
+    ) -> Tuple[int, Optional[Dict[str, str]]]:
+        """
+        Find where a continuation token resumes reading.
+
+        The token names the table it stopped in, so tables created or dropped
+        since do not shift it. If that table was dropped, reading resumes at the
+        next table in time order.
+
+        :param tables: The tables to read, in time order.
+        :param continuation_token: The continuation token, or None.
+        :return: The position of the table to read next and its service
+                 continuation token.
+        :raises ValueError: If the continuation token is invalid.
+        """
+        position = decode_token(continuation_token)
+        if position is None:
+            return 0, None
+        try:
+            shard, table_name, token = position["s"], position["t"], position["c"]
+        except (KeyError, TypeError) as e:
+            raise ValueError("Invalid continuation token") from e
+        if not isinstance(shard, int) or not isinstance(table_name, str):
+            raise ValueError("Invalid continuation token")
+        stopped = (table_name, shard)
+        for index, (other_shard, other_name) in enumerate(tables):
+            other = (other_name, other_shard)
+            if other == stopped:
+                return index, token
+            if (other < stopped) == self.descending_row_keys:
+                return index, None
+        return len(tables), None
+
+    async def _read_tables(
+        self,
+        tables: List[TableRef],
+        continuation_token: Optional[str],
+        page_size: int,
+        query: Dict[str, Any],
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Read the tables one after the other, in time order, until a page is full.
+
+        :param tables: The tables to read, in time order.
+        :param continuation_token: The token returned with the previous page.
+        :param page_size: The maximum number of logs to read.
+        :param query: The other get_logs arguments of every table, by name.
+        :return: The logs and the continuation token of the next page.
+        :raises ValueError: If the continuation token is invalid.
+        """
+        index, token = self._resume(tables, continuation_token)
+        logs: List[Dict[str, Any]] = []
+        while index < len(tables):
+            page, token = await self._storage(*tables[index]).get_logs(
+                page_size=page_size - len(logs), continuation_token=token, **query
+            )
+            logs.extend(page)
+            if token is None:
+                index += 1
+            if len(logs) >= page_size:
+                break
+        if index >= len(tables):
+            return logs, None
+        shard, table_name = tables[index]
+        return logs, encode_token({"s": shard, "t": table_name, "c": token})
+
+    async def get_logs(
+        self,
+        page_size: int = 50,
+        continuation_token: Optional[str] = None,
+        order_by: str = "Timestamp",
+        ascending: bool = False,
+        filters: Optional[Filters] = None,
+        *,
+        logger_name: Optional[str] = None,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None,
+        as_entries: bool = False,
+    ) -> Tuple[List[Any], Optional[str]]:
+        """
+        Retrieve one page of logs from the tables overlapping the time range.
+
+        The tables are read one after the other, in time order, until the page
+        is full. Ordering by another field than Timestamp sorts the returned
+        page only.
+
+        :param page_size: The maximum number of logs to retrieve per page.
+        :param continuation_token: The token to continue retrieving logs from where the last query left off.
+        :param order_by: The field to order the logs by.
+        :param ascending: Whether to order the logs in ascending order.
+        :param filters: A dictionary of property values, or a query Predicate.
+        :param logger_name: Only read the partitions of this logger.
+        :param start_time: Only return entries logged at or after this UTC time.
+        :param end_time: Only return entries logged at or before this UTC time.
+        :param as_entries: Return LogEntry records instead of dictionaries.
+        :return: A tuple containing a list of logs and an optional continuation token.
+        :raises ValueError: If an argument or the continuation token is invalid.
+        """
+        if page_size <= 0:
+            raise ValueError("Page size must be positive")
+        tables = await self._tables_for_range(logger_name, start_time, end_time)
+        logs, token = await self._read_tables(
+            tables,
+            continuation_token,
+            page_size,
+            {
+                "logger_name": logger_name,
+                "start_time": start_time,
+                "end_time": end_time,
+                "filters": filters,
+                "order_by": order_by,
+                "ascending": ascending,
+            },
+        )
+        logs = sort_page(logs, order_by, ascending)
+        if as_entries:
+            logs = [LogEntry.from_entity(entity) for entity in logs]
+        return logs, token
+
+    async def get_log_entry(
+        self, partition_key: str, row_key: str
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Retrieve a single log entry from the table of its RowKey's period.
+
+        :param partition_key: The partition key of the log entry.
+        :param row_key: The row key of the log entry.
+        :return: A dictionary containing the log entry or None if not found.
+        """
+        timestamp = row_key_time(row_key, self.descending_row_keys)
+        if timestamp is None:
+            return None
+        table_name = self.table_name(timestamp)
+        for shard in range(len(self.connection_strings)):
+            if table_name not in await self._list_tables(shard):
+                continue
+            entry = await self._storage(shard, table_name).get_log_entry(
+                partition_key, row_key
+            )
+            if entry is not None:
+                return entry
+        return None
+
+    async def get_logs_by_trace(
+        self, trace_id: str, as_entries: bool = False, max_concurrency: int = 16
+    ) -> List[Any]:
+        """
+        Retrieve every log of a trace from every table, concurrently.
+
+        :param trace_id: The TraceId of the logs.
+        :param as_entries: Return LogEntry records instead of dictionaries.
+        :param max_concurrency: The maximum number of concurrent point reads per
+                                table, where an index is read.
+        :return: The logs of the trace.
+        """
+        tables = await self._tables_for_range(None, None, None)
+        pages = await asyncio.gather(
+            *(
+                self._storage(*table).get_logs_by_trace(
+                    trace_id, as_entries=as_entries, max_concurrency=max_concurrency
+                )
+                for table in tables
+            )
+        )
+        return [log for page in pages for log in page]
+
+    async def flush(self):
+        """
+        Flush the storage of every table.
+        """
+        for storage in list(self._storages.values()):
+            await storage.flush()
+
+    async def aclose(self):
+        """
+        Close the storage of every table.
+        """
+        storages = list(self._storages.values())
+        self._storages.clear()
+        self._tables.clear()
+        for storage in storages:
+            await storage.aclose()
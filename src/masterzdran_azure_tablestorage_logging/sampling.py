@@ -0,0 +1,204 @@
+"""
+Sampling for Azure Table Storage logging module.
+Thins out repeated log calls per logger, level and message template before
+they are formatted or written.
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple, Union
+
+from .levels import LogLevel
+
+# The metadata key carrying the number of entries suppressed before an entry.
+SUPPRESSED_KEY = "suppressed_count"
+
+SamplingKey = Tuple[str, int, Hashable]
+
+
+class _KeyState:
+    """
+    The sampling and rate limiting state of one key.
+    """
+
+    __slots__ = (
+        "window_start",
+        "window_count",
+        "credit",
+        "tokens",
+        "updated",
+        "suppressed",
+    )
+
+    def __init__(self, now: float, burst: float):
+        self.window_start = now
+        self.window_count = 0
+        # Starts full so the first call of a key is always kept.
+        self.credit = 1.0
+        self.tokens = burst
+        self.updated = now
+        self.suppressed = 0
+
+
+# The settings of the three stages, the exempt level and its int threshold, the
+# key limit, the clock, the suppressed counter and the key states.
+# pylint: disable-next=too-many-instance-attributes
+class Sampler:
+    """
+    Sampler decides which log calls are kept, per (logger name, level, message
+    template) key.
+
+    A call is kept when it passes every configured stage: a fixed ratio, "the
+    first N per interval, then 1 in M", and a token bucket of rate calls per
+    second with a burst capacity. Calls at or above exempt_level are always
+    kept. The number of calls suppressed since the last kept call of a key is
+    returned with the next kept call, and the logger adds it to that entry's
+    metadata. Keeping or suppressing a call costs a few dictionary lookups and
+    no formatting.
+    """
+
+    def __init__(
+        self,
+        *,
+        ratio: Optional[float] = None,
+        first: Optional[int] = None,
+        then_every: Optional[int] = None,
+        interval: float = 1.0,
+        rate: Optional[float] = None,
+        burst: Optional[float] = None,
+        exempt_level: Optional[Union[LogLevel, int, str]] = LogLevel.ERROR,
+        max_keys: int = 10000,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Initialize the Sampler instance.
+
+        :param ratio: The fraction of calls kept, evenly spread; None keeps all.
+        :param first: The number of calls kept per interval before thinning.
+        :param then_every: After the first calls of an interval, keep one call in
+                           then_every; None suppresses them all.
+        :param interval: The length of the first/then_every window, in seconds.
+        :param rate: The number of calls per second a key may keep, on average.
+        :param burst: The number of calls a key may keep at once; defaults to rate.
+        :param exempt_level: Calls at or above this level are always kept; None
+                             samples every level.
+        :param max_keys: The maximum number of keys tracked; the least recently
+                         used key is forgotten beyond it.
+        :param clock: Returns a monotonic time in seconds.
+        :raises ValueError: If an argument is invalid.
+        """
+        if ratio is not None and not 0.0 < ratio <= 1.0:
+            raise ValueError("Ratio must be between 0 (exclusive) and 1")
+        if first is not None and first < 0:
+            raise ValueError("First must not be negative")
+        if then_every is not None and then_every <= 0:
+            raise ValueError("Then every must be positive")
+        if interval <= 0:
+            raise ValueError("Interval must be positive")
+        if rate is not None and rate <= 0:
+            raise ValueError("Rate must be positive")
+        if burst is not None and burst < 1:
+            raise ValueError("Burst must be at least 1")
+        if max_keys <= 0:
+            raise ValueError("Max keys must be positive")
+
+        self.ratio = ratio
+        self.first = first
+        self.then_every = then_every
+        self.interval = interval
+        self.rate = rate
+        self.burst = burst if burst is not None else max(rate or 1.0, 1.0)
+        self.exempt_level = (
+            None if exempt_level is None else LogLevel.parse(exempt_level)
+        )
+        # Levels at or above this are not sampled; a plain int for the hot path.
+        self.exempt_threshold = (
+            int(self.exempt_level) if self.exempt_level is not None else 1 << 30
+        )
+        self.max_keys = max_keys
+        self.clock = clock
+        self.suppressed_total = 0
+        self._states: "OrderedDict[SamplingKey, _KeyState]" = OrderedDict()
+
+    @staticmethod
+    def template_key(message: Any) -> Hashable:
+        """
+        Get the key of a message template.
+
+        :param message: A message string or a callable building it.
+        :return: The string, or the code of the callable, so lambdas created
+                 anew at the same call site share a key.
+        """
+        return getattr(message, "__code__", message)
+
+    def check(self, logger_name: str, level: int, message: Any) -> Optional[int]:
+        """
+        Decide whether to keep a log call.
+
+        :param logger_name: The name of the logger.
+        :param level: The level of the call.
+        :param message: The message template or callable, before formatting.
+        :return: None if the call is suppressed, otherwise the number of calls of
+                 its key suppressed since the last kept one.
+        """
+        if level >= self.exempt_threshold:
+            return 0
+        key = (logger_name, level, self.template_key(message))
+        now = self.clock()
+        state = self._states.get(key)
+        if state is None:
+            if len(self._states) >= self.max_keys:
+                self._states.popitem(last=False)
+            state = self._states[key] = _KeyState(now, self.burst)
+        else:
+            self._states.move_to_end(key)
+
+        if self._keep(state, now):
+            suppressed = state.suppressed
+            state.suppressed = 0
+            return suppressed
+        state.suppressed += 1
+        self.suppressed_total += 1
+        return None
+
+    def _keep(self, state: _KeyState, now: float) -> bool:
+        """
+        Run a call through the configured stages.
+
+        :param state: The state of the call's key.
+        :param now: The current time.
+        :return: True if the call is kept.
+        """
+        if self.first is not None:
+            if now - state.window_start >= self.interval:
+                state.window_start = now
+                state.window_count = 0
+            state.window_count += 1
+            over = state.window_count - self.first
+            if over > 0 and (self.then_every is None or over % self.then_every):
+                return False
+
+        if self.ratio is not None:
+            if state.credit < 1.0:
+                state.credit += self.ratio
+                if state.credit < 1.0:
+                    return False
+            state.credit -= 1.0
+
+        if self.rate is not None:
+            state.tokens = min(
+                self.burst, state.tokens + (now - state.updated) * self.rate
+            )
+            state.updated = now
+            if state.tokens < 1.0:
+                return False
+            state.tokens -= 1.0
+        return True
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get the sampler counters.
+
+        :return: The number of tracked keys and of suppressed calls.
+        """
+        return {"keys": len(self._states), "suppressed": self.suppressed_total}
@@ -0,0 +1,527 @@
+"""
+Disk spool for Azure Table Storage logging module.
+Keeps log entries that could not be stored in append-only segment files and
+replays them into the storage once writes succeed again.
+"""
+
+import asyncio
+import contextlib
+import json
+import os
+import struct
+import threading
+import zlib
+from collections.abc import Mapping
+from typing import Any, BinaryIO, Callable, Dict, List, Optional, Sequence, Tuple
+
+from azure.core.exceptions import ResourceExistsError
+
+from .ingestion import PeriodicTask, QueuedEntry
+from .interfaces import StorageInterface, StorageWrapper
+
+# Each frame is a big-endian payload length and CRC-32, followed by the payload:
+# the compact JSON array [partition_key, row_key, data].
+_FRAME_HEADER = struct.Struct(">II")
+_SEGMENT_SUFFIX = ".seg"
+_CURSOR_FILE = "cursor"
+
+# A (segment number, byte offset) position in the spool.
+SpoolPosition = Tuple[int, int]
+
+
+def _json_default(value: Any) -> Any:
+    """
+    Convert a value json cannot serialize.
+
+    :param value: The value.
+    :return: A mapping, such as the layered metadata of a log call, as a
+             dictionary; any other value as its text.
+    """
+    if isinstance(value, Mapping):
+        return dict(value)
+    return str(value)
+
+
+def _segment_number(name: str) -> Optional[int]:
+    """
+    Parse the number of a segment file.
+
+    :param name: A file name in the spool directory.
+    :return: The segment number, or None if the name is not a segment file name.
+    """
+    if not name.endswith(_SEGMENT_SUFFIX):
+        return None
+    number = name[: -len(_SEGMENT_SUFFIX)]
+    if not (number.isascii() and number.isdigit()):
+        return None
+    return int(number)
+
+
+def encode_frame(entry: QueuedEntry) -> bytes:
+    """
+    Encode a log entry as a spool frame.
+
+    :param entry: A (partition_key, row_key, data) tuple.
+    :return: The framed entry.
+    """
+    partition_key, row_key, data = entry
+    payload = json.dumps(
+        [partition_key, row_key, dict(data)],
+        separators=(",", ":"),
+        ensure_ascii=False,
+        default=_json_default,
+    ).encode("utf-8")
+    return _FRAME_HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+
+
+# Four settings, the corrupt frame counter, the segment sizes, the read cursor,
+# the segment being written with its number and unsynced entries, and a lock.
+# pylint: disable-next=too-many-instance-attributes
+class DiskSpool:
+    """
+    DiskSpool is an append-only, on-disk FIFO of log entries.
+
+    Entries are appended as CRC-checked frames to numbered segment files in a
+    directory, and fsynced every fsync_every entries. The read position is
+    committed to a cursor file with an atomic rename, so a restarted process
+    resumes after the last committed entry; a torn frame at the end of a segment
+    left by a crash is skipped. Fully read segments are deleted, and appends that
+    would exceed max_bytes on disk are refused. Files in the directory that are
+    not named like segments are ignored.
+
+    The methods are thread-safe, so the file I/O can run off the event loop.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        max_bytes: int = 256 * 1024 * 1024,
+        segment_bytes: int = 8 * 1024 * 1024,
+        fsync_every: int = 100,
+    ):
+        """
+        Initialize the DiskSpool instance, resuming any spool left in the directory.
+
+        :param directory: The directory holding the segment files; created if missing.
+        :param max_bytes: The maximum total size of the segment files.
+        :param segment_bytes: The size after which a new segment file is started.
+        :param fsync_every: The number of appended entries between fsyncs.
+        :raises ValueError: If an argument is invalid.
+        """
+        if not directory:
+            raise ValueError("Spool directory cannot be empty")
+        if max_bytes <= 0:
+            raise ValueError("Max bytes must be positive")
+        if segment_bytes <= 0 or segment_bytes > max_bytes:
+            raise ValueError("Segment bytes must be positive and at most max bytes")
+        if fsync_every <= 0:
+            raise ValueError("Fsync every must be positive")
+
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.segment_bytes = segment_bytes
+        self.fsync_every = fsync_every
+        self.corrupt_frames = 0
+        os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.RLock()
+        self._segments: Dict[int, int] = {}
+        for name in os.listdir(directory):
+            number = _segment_number(name)
+            if number is not None:
+                self._segments[number] = os.path.getsize(os.path.join(directory, name))
+        self._cursor = self._load_cursor()
+        # Segments before the cursor were fully read before a crash.
+        for number in [n for n in self._segments if n < self._cursor[0]]:
+            self._delete_segment(number)
+
+        self._unsynced = 0
+        self._writer: Optional[BinaryIO] = None
+        self._write_segment = max(self._segments, default=self._cursor[0]) + 1
+        if not self._segments:
+            self._cursor = (self._write_segment, 0)
+
+    @property
+    def size(self) -> int:
+        """
+        The total size of the segment files in bytes.
+        """
+        with self._lock:
+            return sum(self._segments.values())
+
+    @property
+    def position(self) -> SpoolPosition:
+        """
+        The committed read position.
+        """
+        return self._cursor
+
+    def __bool__(self) -> bool:
+        with self._lock:
+            segment, offset = self._cursor
+            return any(
+                number > segment or (number == segment and size > offset)
+                for number, size in self._segments.items()
+            )
+
+    def _segment_path(self, number: int) -> str:
+        return os.path.join(self.directory, f"{number:020d}{_SEGMENT_SUFFIX}")
+
+    def _load_cursor(self) -> SpoolPosition:
+        """
+        Read the committed read position.
+
+        :return: The position, or the start of the oldest segment.
+        """
+        try:
+            with open(
+                os.path.join(self.directory, _CURSOR_FILE), encoding="utf-8"
+            ) as cursor_file:
+                segment, offset = cursor_file.read().split()
+            return int(segment), int(offset)
+        except (OSError, ValueError):
+            return min(self._segments, default=0), 0
+
+    def _save_cursor(self):
+        """
+        Persist the read position atomically.
+        """
+        path = os.path.join(self.directory, _CURSOR_FILE)
+        with open(path + ".tmp", "w", encoding="utf-8") as cursor_file:
+            cursor_file.write(f"{self._cursor[0]} {self._cursor[1]}\n")
+            cursor_file.flush()
+            os.fsync(cursor_file.fileno())
+        os.replace(path + ".tmp", path)
+
+    def _delete_segment(self, number: int):
+        del self._segments[number]
+        try:
+            os.remove(self._segment_path(number))
+        except FileNotFoundError:
+            pass
+
+    def _close_writer(self):
+        """
+        Sync and close the segment being written.
+        """
+        if self._writer is None:
+            return
+        self.sync()
+        self._writer.close()
+        self._writer = None
+        self._write_segment += 1
+
+    def append(self, entries: Sequence[QueuedEntry]) -> bool:
+        """
+        Append log entries to the spool.
+
+        :param entries: A sequence of (partition_key, row_key, data) tuples.
+        :return: False, and nothing is appended, if the entries do not fit in max_bytes.
+        """
+        frames = b"".join(encode_frame(entry) for entry in entries)
+        with self._lock:
+            if self.size + len(frames) > self.max_bytes:
+                return False
+
+            if (
+                self._writer is not None
+                and self._segments[self._write_segment] >= self.segment_bytes
+            ):
+                self._close_writer()
+            if self._writer is None:
+                # pylint: disable=consider-using-with
+                self._writer = open(self._segment_path(self._write_segment), "ab")
+                self._segments[self._write_segment] = 0
+
+            self._writer.write(frames)
+            self._segments[self._write_segment] += len(frames)
+            self._unsynced += len(entries)
+            if self._unsynced >= self.fsync_every:
+                self.sync()
+            return True
+
+    def sync(self):
+        """
+        Flush the appended entries to disk.
+        """
+        with self._lock:
+            if self._writer is None or not self._unsynced:
+                return
+            self._writer.flush()
+            os.fsync(self._writer.fileno())
+            self._unsynced = 0
+
+    def read_batch(self, max_entries: int) -> Tuple[List[QueuedEntry], SpoolPosition]:
+        """
+        Read the oldest uncommitted entries without consuming them.
+
+        :param max_entries: The maximum number of entries to return.
+        :return: The entries, and the position to commit once they are stored.
+        """
+        with self._lock:
+            if self._writer is not None:
+                self._writer.flush()
+
+            entries: List[QueuedEntry] = []
+            segment, offset = self._cursor
+            for number in sorted(n for n in self._segments if n >= segment):
+                if number > segment:
+                    segment, offset = number, 0
+                with open(self._segment_path(number), "rb") as segment_file:
+                    segment_file.seek(offset)
+                    while len(entries) < max_entries:
+                        header = segment_file.read(_FRAME_HEADER.size)
+                        if len(header) < _FRAME_HEADER.size:
+                            break
+                        length, checksum = _FRAME_HEADER.unpack(header)
+                        payload = segment_file.read(length)
+                        if len(payload) < length or zlib.crc32(payload) != checksum:
+                            # A torn or corrupt frame: the rest of the segment is lost.
+                            self.corrupt_frames += 1
+                            offset = self._segments[number]
+                            break
+                        partition_key, row_key, data = json.loads(payload)
+                        entries.append((partition_key, row_key, data))
+                        offset += _FRAME_HEADER.size + length
+                if len(entries) >= max_entries:
+                    break
+            return entries, (segment, offset)
+
+    def commit(self, position: SpoolPosition):
+        """
+        Consume the entries before a position returned by read_batch.
+
+        :param position: The position to resume reading from.
+        """
+        with self._lock:
+            self._cursor = position
+            segment, offset = position
+            for number in [n for n in self._segments if n < segment]:
+                self._delete_segment(number)
+            if segment in self._segments and offset >= self._segments[segment]:
+                if segment == self._write_segment:
+                    # The segment being written is fully read: start a new one.
+                    self._close_writer()
+                self._delete_segment(segment)
+                self._cursor = (max(segment + 1, self._write_segment), 0)
+            self._save_cursor()
+
+    def close(self):
+        """
+        Sync and close the spool.
+        """
+        with self._lock:
+            if self._writer is not None:
+                self.sync()
+                self._writer.close()
+                self._writer = None
+
+
+class SpoolingStorage(StorageWrapper):
+    """
+    SpoolingStorage wraps another storage and appends the log entries it fails to
+    store to a DiskSpool instead of losing them. A background task replays the
+    spooled entries into the wrapped storage in batches, backing off while the
+    storage keeps failing.
+
+    Replay is at-least-once: entries stored just before a crash may be replayed,
+    and entries the storage reports as already existing are skipped. Reads go to
+    the wrapped storage and do not include spooled entries. The spool's file
+    writes and fsyncs run on the event loop's default executor.
+    """
+
+    def __init__(
+        self,
+        storage: StorageInterface,
+        spool: DiskSpool,
+        replay_interval: float = 5.0,
+        max_batch_size: int = 100,
+        max_backoff: float = 300.0,
+    ):
+        """
+        Initialize the SpoolingStorage instance.
+
+        :param storage: The storage the log entries are written to.
+        :param spool: The spool holding the entries that could not be stored.
+        :param replay_interval: The number of seconds between replay attempts.
+        :param max_batch_size: The maximum number of entries per replayed batch.
+        :param max_backoff: The maximum number of seconds between replay attempts
+                            while the storage keeps failing.
+        :raises ValueError: If an argument is not positive.
+        """
+        if replay_interval <= 0:
+            raise ValueError("Replay interval must be positive")
+        if max_batch_size <= 0:
+            raise ValueError("Max batch size must be positive")
+        if max_backoff < replay_interval:
+            raise ValueError("Max backoff must not be less than the replay interval")
+
+        super().__init__(storage)
+        self.spool = spool
+        self.max_batch_size = max_batch_size
+        self.spooled_entries = 0
+        self.replayed_entries = 0
+        self.rejected_entries = 0
+        self._replayer = PeriodicTask(self.replay, replay_interval, max_backoff)
+
+    @property
+    def replay_interval(self) -> float:
+        """
+        The number of seconds between replay attempts.
+        """
+        return self._replayer.interval
+
+    @property
+    def max_backoff(self) -> float:
+        """
+        The maximum number of seconds between replay attempts while the storage
+        keeps failing.
+        """
+        return self._replayer.max_backoff
+
+    @staticmethod
+    async def _run_in_executor(function: Callable[..., Any], *args: Any) -> Any:
+        """
+        Run a blocking spool method on the event loop's default executor.
+
+        :param function: The method.
+        :param args: The arguments of the method.
+        :return: The return value of the method.
+        """
+        return await asyncio.get_running_loop().run_in_executor(None, function, *args)
+
+    async def _store_batch(self, batch: List[QueuedEntry]):
+        """
+        Store a replayed batch, skipping entries that were already stored.
+
+        :param batch: The entries to store.
+        :raises Exception: If the wrapped storage fails to store an entry.
+        """
+        try:
+            await self.storage.store_logs(batch)
+        except Exception:  # pylint: disable=broad-except
+            # One entry of the batch may already exist; store them one by one.
+            for partition_key, row_key, data in batch:
+                try:
+                    await self.storage.store_log(partition_key, row_key, data)
+                except Exception as e:  # pylint: disable=broad-except
+                    if not isinstance(e, ResourceExistsError) and not isinstance(
+                        e.__cause__, ResourceExistsError
+                    ):
+                        raise
+
+    async def replay(self):
+        """
+        Replay all spooled entries into the wrapped storage.
+
+        :raises Exception: If the wrapped storage fails; the remaining entries stay
+                           spooled.
+        """
+        async with self._replayer.lock:
+            while True:
+                batch, position = await self._run_in_executor(
+                    self.spool.read_batch, self.max_batch_size
+                )
+                if batch:
+                    await self._store_batch(batch)
+                    self.replayed_entries += len(batch)
+                if position != self.spool.position:
+                    await self._run_in_executor(self.spool.commit, position)
+                if not batch:
+                    break
+
+    async def _spool(self, entries: Sequence[QueuedEntry], error: Exception):
+        """
+        Append entries the wrapped storage failed to store to the spool.
+
+        :param entries: The entries that failed.
+        :param error: The storage error.
+        :raises Exception: The storage error, if the spool is full.
+        """
+        if not await self._run_in_executor(self.spool.append, entries):
+            self.rejected_entries += len(entries)
+            raise error
+        self.spooled_entries += len(entries)
+        self._replayer.start()
+
+    async def store_log(self, partition_key: str, row_key: str, data: Dict[str, Any]):
+        """
+        Store a log entry, spooling it to disk if the wrapped storage fails.
+
+        :param partition_key: The partition key for the log entry.
+        :param row_key: The row key for the log entry.
+        :param data: A dictionary containing the log data.
+        :raises ValueError: If partition_key, row_key, or data is invalid,
+                            or the storage has been closed.
+        :raises Exception: If the storage fails and the spool is full.
+        """
+        if self._replayer.closed:
+            raise ValueError("Storage is closed")
+        if not self._replayer.started and self.spool:
+            # Entries left by a previous run.
+            self._replayer.start()
+        try:
+            await self.storage.store_log(partition_key, row_key, data)
+        except ValueError:
+            raise
+        except Exception as e:  # pylint: disable=broad-except
+            await self._spool([(partition_key, row_key, data)], e)
+
+    async def store_logs(self, entries: Sequence[QueuedEntry]):
+        """
+        Store several log entries, spooling them to disk if the wrapped storage fails.
+
+        :param entries: A sequence of (partition_key, row_key, data) tuples.
+        :raises ValueError: If any of the entries is invalid, or the storage has
+                            been closed.
+        :raises Exception: If the storage fails and the spool is full.
+        """
+        if self._replayer.closed:
+            raise ValueError("Storage is closed")
+        if not self._replayer.started and self.spool:
+            # Entries left by a previous run.
+            self._replayer.start()
+        try:
+            await self.storage.store_logs(entries)
+        except ValueError:
+            raise
+        except Exception as e:  # pylint: disable=broad-except
+            await self._spool(entries, e)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get the spool counters.
+
+        :return: The number of spooled, replayed and rejected entries, and the
+                 size of the spool on disk.
+        """
+        return {
+            "spooled_entries": self.spooled_entries,
+            "replayed_entries": self.replayed_entries,
+            "rejected_entries": self.rejected_entries,
+            "spool_bytes": self.spool.size,
+            "corrupt_frames": self.spool.corrupt_frames,
+        }
+
+    async def flush(self):
+        """
+        Flush the wrapped storage and sync the spool to disk.
+        """
+        await self.storage.flush()
+        await self._run_in_executor(self.spool.sync)
+
+    async def aclose(self):
+        """
+        Stop the background task, make a last replay attempt, and close the spool
+        and the wrapped storage. Entries that still cannot be stored stay spooled
+        for the next run.
+        """
+        if self._replayer.closed:
+            return
+        await self._replayer.stop()
+        if self.spool:
+            # The entries that still fail stay spooled for the next run.
+            with contextlib.suppress(Exception):
+                await self.replay()
+        await self._run_in_executor(self.spool.close)
+        await self.storage.aclose()
@@ -0,0 +1,992 @@
+"""
+Storage base for Azure Table Storage logging module.
+Holds the write, read and query paths shared by the synchronous and asynchronous
+table storages.
+"""
+
+import asyncio
+import functools
+import time
+from abc import abstractmethod
+from datetime import datetime
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    TypeVar,
+)
+
+from azure.core.exceptions import ResourceNotFoundError
+
+from .codec import METADATA_PROPERTIES, MetadataCodec
+from .exceptions import CircuitOpenError, StorageError
+from .fanout import PageFetcher
+from .interfaces import StorageInterface
+from .keys import is_valid_key, row_key_range
+from .metrics import Metrics, entity_size
+from .models import LogEntry
+from .paging import decode_position, encode_position, read_pages, sort_page
+from .partitioning import LoggerNamePartitionStrategy, PartitionStrategy
+from .query import Filters, compile_filters, quote
+from .resilience import Resilience
+from .transactions import (
+    LogTuple,
+    group_transactions,
+    index_transactions,
+    validate_keys,
+    validate_log,
+)
+
+T = TypeVar("T")
+# Suffix of the table holding the TraceId index of a log table.
+TRACE_INDEX_SUFFIX = "TraceIndex"
+# The index pointer properties.
+INDEX_FIELDS = ["LogPartitionKey", "LogRowKey"]
+# The largest page the service returns.
+MAX_QUERY_PAGE_SIZE = 1000
+
+
+class TableStorageBase(StorageInterface):
+    """
+    TableStorageBase holds the logic shared by the synchronous and asynchronous
+    Azure Table Storage backends: validation, entity building and query building.
+    """
+
+    valid_order_fields = {
+        "Timestamp",
+        "LogLevel",
+        "TraceId",
+        "LoggerName",
+        "Location",
+        "Message",
+    }
+
+    select_fields = [
+        "PartitionKey",
+        "RowKey",
+        "LogLevel",
+        "Timestamp",
+        "TraceId",
+        "LoggerName",
+        "Location",
+        "Message",
+    ] + METADATA_PROPERTIES
+
+    # How the Metadata column is serialized and read back.
+    metadata_codec = MetadataCodec()
+
+    # Retries, circuit breaking and the fallback storage of the storage calls;
+    # None calls the service once.
+    resilience: Optional[Resilience] = None
+
+    # Whether writes maintain the <table>TraceIndex table read by
+    # get_logs_by_trace.
+    trace_index = False
+
+    # Where request latencies, serialization times, payload sizes and errors are
+    # recorded; None records nothing.
+    metrics: Optional[Metrics] = None
+
+    # The clients of the log table and of its trace index table.
+    table_client: Any = None
+    index_client: Any = None
+
+    def __init__(
+        self,
+        table_name: str,
+        *,
+        descending_row_keys: bool = True,
+        partition_strategy: Optional[PartitionStrategy] = None,
+        resilience: Optional[Resilience] = None,
+        metadata_codec: Optional[MetadataCodec] = None,
+        trace_index: bool = False,
+        metrics: Optional[Metrics] = None,
+    ):
+        """
+        Initialize the options shared by the table storages.
+
+        The resilience policies record their retries in metrics unless they
+        already record elsewhere.
+
+        :param table_name: The name of the table to store logs.
+        :param descending_row_keys: Whether the table's RowKeys sort newest first.
+        :param partition_strategy: How loggers partition their entries; defaults to
+                                   one partition per logger name.
+        :param resilience: Retries, circuit breaking and fallback of the storage
+                           calls; None calls the service once.
+        :param metadata_codec: How the Metadata column is encoded; defaults to
+                               uncompressed JSON.
+        :param trace_index: Whether to maintain the <table>TraceIndex table read by
+                            get_logs_by_trace.
+        :param metrics: Records request latencies, serialization and errors; None
+                        records nothing.
+        :raises ValueError: If table_name is empty.
+        """
+        if not table_name:
+            raise ValueError("Table name cannot be empty")
+
+        self.table_name = table_name
+        self.descending_row_keys = descending_row_keys
+        self.partition_strategy = partition_strategy or LoggerNamePartitionStrategy()
+        self.resilience = resilience
+        self.metadata_codec = metadata_codec or MetadataCodec()
+        self.trace_index = trace_index
+        self.metrics = metrics
+        if metrics is not None and resilience is not None:
+            if resilience.metrics is None:
+                resilience.metrics = metrics
+
+    async def _call(
+        self,
+        operation: Callable[[], Awaitable[T]],
+        name: str = "query",
+        write: bool = False,
+    ) -> T:
+        """
+        Run a storage call through the resilience policies, if any.
+
+        :param operation: Starts one attempt of the call.
+        :param name: The operation label of the call's metrics.
+        :param write: Whether the call creates entities.
+        :return: The result of the call.
+        :raises CircuitOpenError: If the circuit breaker refuses the call.
+        """
+        attempt = operation
+        if self.metrics is not None:
+            attempt = functools.partial(
+                self.metrics.time_call, "request_seconds", operation, operation=name
+            )
+        if self.resilience is None:
+            return await attempt()
+        return await self.resilience.call(attempt, write)
+
+    def _fallback(self) -> Optional[StorageInterface]:
+        """
+        Get the storage that receives writes while the circuit is open.
+
+        A fallback wrapping this storage, such as a SpoolingStorage around it,
+        would hand the writes straight back, so it is not used and the
+        CircuitOpenError reaches the wrapper.
+
+        :return: The fallback storage, or None.
+        """
+        fallback = self.resilience.fallback
+        storage = fallback
+        while storage is not None:
+            if storage is self:
+                return None
+            storage = getattr(storage, "storage", None)
+        return fallback
+
+    async def _write(
+        self,
+        operation: Callable[[], Awaitable[Any]],
+        entries: Sequence[LogTuple],
+        failure_message: str,
+        name: str = "write",
+    ):
+        """
+        Run a write call, diverting its entries to the fallback storage while the
+        circuit breaker is open.
+
+        :param operation: Starts one attempt of the write.
+        :param entries: The (partition_key, row_key, data) tuples being written.
+        :param failure_message: The message of the StorageError raised on failure.
+        :param name: The operation label of the call's metrics.
+        :raises CircuitOpenError: If the circuit is open and there is no fallback.
+        :raises StorageError: If the write fails.
+        """
+        try:
+            await self._call(operation, name, write=True)
+        except CircuitOpenError:
+            fallback = self._fallback()
+            if fallback is None:
+                raise
+            await fallback.store_logs(entries)
+            if self.metrics is not None:
+                self.metrics.increment("fallback_entries_total", len(entries))
+        except Exception as e:
+            raise StorageError(f"{failure_message}: {str(e)}") from e
+        else:
+            if self.metrics is not None:
+                self.metrics.increment("entities_written_total", len(entries))
+
+    def _validate_query(self, page_size: int, order_by: str):
+        """
+        Validate the paging and ordering arguments of a query.
+
+        :param page_size: The number of logs to retrieve per page.
+        :param order_by: The field to order the logs by.
+        :raises ValueError: If page_size is not positive or order_by is invalid.
+        """
+        if page_size <= 0:
+            raise ValueError("Page size must be positive")
+        if order_by not in self.valid_order_fields:
+            raise ValueError(
+                f"Invalid order_by field. Must be one of {self.valid_order_fields}"
+            )
+
+    def _prepare_query(
+        self,
+        page_size: int,
+        order_by: str,
+        ascending: bool,
+        filters: Optional[Filters],
+        *,
+        logger_name: Optional[str] = None,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None,
+    ) -> List[str]:
+        """
+        Validate the query arguments and build the filter string of every
+        partition the query reads.
+
+        Timestamp order is served by the RowKey layout, so only the layout's own
+        direction can be requested; other fields are sorted within the page.
+        The time range is pushed to the service as a RowKey range.
+
+        :param page_size: The number of logs to retrieve per page.
+        :param order_by: The field to order the logs by.
+        :param ascending: Whether to order the logs in ascending order.
+        :param filters: A dictionary of property values, or a query Predicate.
+        :param logger_name: The logger whose partitions are read, or None for all.
+        :param start_time: The inclusive start of the time range, or None.
+        :param end_time: The inclusive end of the time range, or None.
+        :return: The OData filter strings, in the order the partitions are read.
+        :raises ValueError: If an argument is invalid.
+        """
+        self._validate_query(page_size, order_by)
+        if order_by == "Timestamp" and ascending == self.descending_row_keys:
+            direction = "descending" if self.descending_row_keys else "ascending"
+            raise ValueError(
+                f"Timestamp order must be {direction} for this table's RowKey layout"
+            )
+        base_filter = self.query_filter(filters, start_time, end_time)
+        return [
+            " and ".join(
+                condition for condition in (partition, base_filter) if condition
+            )
+            for partition in self.partition_filters(logger_name, start_time, end_time)
+        ]
+
+    def query_filter(
+        self,
+        filters: Optional[Filters] = None,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None,
+    ) -> str:
+        """
+        Build the filter string of a query, without partition conditions.
+
+        The time range is pushed to the service as a RowKey range.
+
+        :param filters: A dictionary of property values, or a query Predicate.
+        :param start_time: The inclusive start of the time range, or None.
+        :param end_time: The inclusive end of the time range, or None.
+        :return: The OData filter string; empty if nothing is filtered.
+        :raises ValueError: If a filter is invalid or the time range is reversed.
+        """
+        if start_time is not None and end_time is not None and start_time > end_time:
+            raise ValueError("Start time must not be after end time")
+
+        conditions = []
+        lower, upper = row_key_range(start_time, end_time, self.descending_row_keys)
+        if lower is not None:
+            conditions.append(f"RowKey ge {quote(lower)}")
+        if upper is not None:
+            conditions.append(f"RowKey lt {quote(upper)}")
+        filter_string = self._build_filter_string(filters)
+        if filter_string:
+            conditions.append(filter_string)
+        return " and ".join(conditions)
+
+    def partition_filters(
+        self,
+        logger_name: Optional[str],
+        start_time: Optional[datetime],
+        end_time: Optional[datetime],
+    ) -> List[str]:
+        """
+        Get one partition condition per partition a query has to read, in the
+        order the partitions are read.
+
+        :param logger_name: The logger whose partitions are read, or None for all.
+        :param start_time: The inclusive start of the time range, or None.
+        :param end_time: The inclusive end of the time range, or None.
+        :return: The PartitionKey conditions; an empty string matches every partition.
+        """
+        if logger_name is None:
+            return [""]
+
+        partition_keys = self.partition_strategy.partition_keys_for_range(
+            logger_name, start_time, end_time
+        )
+        if partition_keys is None:
+            lower, upper = self.partition_strategy.partition_key_range(logger_name)
+            return [
+                f"PartitionKey ge {quote(lower)} and PartitionKey lt {quote(upper)}"
+            ]
+        if self.descending_row_keys:
+            partition_keys = partition_keys[::-1]
+        return [f"PartitionKey eq {quote(key)}" for key in partition_keys]
+
+    def _build_entity(
+        self, partition_key: str, row_key: str, data: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """
+        Build the table entity for a log entry.
+
+        :param partition_key: The partition key for the log entry.
+        :param row_key: The row key for the log entry.
+        :param data: A dictionary or LogEntry containing the log data.
+        :return: The entity to write to the table.
+        :raises ValueError: If the metadata is too large for an entity.
+        """
+        if self.metrics is None:
+            return self._encode_entity(partition_key, row_key, data)
+        start = time.perf_counter()
+        entity = self._encode_entity(partition_key, row_key, data)
+        self.metrics.observe("serialize_seconds", time.perf_counter() - start)
+        self.metrics.observe("entity_bytes", entity_size(entity))
+        return entity
+
+    def _encode_entity(
+        self, partition_key: str, row_key: str, data: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """
+        Encode a log entry as a table entity.
+
+        :param partition_key: The partition key for the log entry.
+        :param row_key: The row key for the log entry.
+        :param data: A dictionary or LogEntry containing the log data.
+        :return: The entity to write to the table.
+        :raises ValueError: If the metadata is too large for an entity.
+        """
+        if isinstance(data, LogEntry):
+            entity = {
+                "PartitionKey": partition_key,
+                "RowKey": row_key,
+                "LogLevel": data.level,
+                "Message": data.message,
+                "Timestamp": data.timestamp,
+                "TraceId": data.trace_id,
+                "LoggerName": data.logger_name,
+                "Location": data.location,
+            }
+            entity.update(self.metadata_codec.encode(data.metadata))
+            return entity
+
+        entity = {
+            "PartitionKey": partition_key,
+            "RowKey": row_key,
+            "LogLevel": data.get("LogLevel"),
+            "Message": data.get("Message"),
+            "Timestamp": data.get("Timestamp"),
+            "TraceId": data.get("TraceId"),
+            "LoggerName": data.get("LoggerName"),
+            "Location": data.get("Location"),
+        }
+        entity.update(self.metadata_codec.encode(data.get("Metadata")))
+        return entity
+
+    def _group_transactions(self, entries: Sequence[LogTuple]) -> List[List[LogTuple]]:
+        """
+        Group log entries into entity group transactions, recording their sizes.
+
+        :param entries: A sequence of (partition_key, row_key, data) tuples.
+        :return: A list of transactions, each a list of entries.
+        :raises ValueError: If any of the entries is invalid.
+        """
+        transactions = group_transactions(entries)
+        if self.metrics is not None:
+            for transaction in transactions:
+                self.metrics.observe("transaction_entities", len(transaction))
+        return transactions
+
+    def _transaction_operations(
+        self, transaction: Sequence[LogTuple]
+    ) -> List[Tuple[str, Dict[str, Any]]]:
+        """
+        Build the create operations of a transaction.
+
+        :param transaction: The entries of one transaction.
+        :return: The operations to submit.
+        """
+        return [("create", self._build_entity(*entry)) for entry in transaction]
+
+    @abstractmethod
+    async def _submit_index(self, operations: List[Tuple[str, Dict[str, Any]]]):
+        """
+        Submit one transaction to the trace index table.
+
+        :param operations: The upsert operations of one index partition.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def _first_page(
+        self, pages: Any
+    ) -> Tuple[List[Dict[str, Any]], Optional[Dict[str, str]]]:
+        """
+        Read the first page of a paged query.
+
+        :param pages: The pages returned by the client's query_entities().by_page().
+        :return: The entities and the service continuation token of the next page.
+        """
+        raise NotImplementedError
+
+    async def _query_client_page(
+        self,
+        table_client: Any,
+        query_filter: str,
+        page_size: int,
+        continuation: Optional[Dict[str, str]],
+        select: List[str],
+    ) -> Tuple[List[Dict[str, Any]], Optional[Dict[str, str]]]:
+        """
+        Fetch exactly one service page of a query from a table client.
+
+        :param table_client: The client of the log table or the trace index table.
+        :param query_filter: The OData filter string.
+        :param page_size: The maximum number of entities to fetch.
+        :param continuation: The service continuation token, or None.
+        :param select: The properties to fetch.
+        :return: The entities and the service continuation token of the next page.
+        """
+        pages = table_client.query_entities(
+            query_filter=query_filter,
+            results_per_page=page_size,
+            select=select,
+        ).by_page(continuation_token=continuation)
+        return await self._first_page(pages)
+
+    async def _query_index_page(
+        self,
+        query_filter: str,
+        page_size: int,
+        continuation: Optional[Dict[str, str]],
+    ) -> Tuple[List[Dict[str, Any]], Optional[Dict[str, str]]]:
+        """
+        Fetch one service page of pointers from the trace index table.
+
+        :param query_filter: The OData filter string.
+        :param page_size: The maximum number of pointers to fetch.
+        :param continuation: The service continuation token, or None.
+        :return: The pointer entities and the continuation token of the next page.
+        """
+        await self.open()
+        return await self._query_client_page(
+            self.index_client, query_filter, page_size, continuation, INDEX_FIELDS
+        )
+
+    @abstractmethod
+    async def list_tables(self, prefix: str = "") -> List[str]:
+        """
+        List the tables of the storage account.
+
+        :param prefix: Only list the tables whose names start with prefix.
+        :return: The sorted table names.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def drop_table(self):
+        """
+        Delete the table and its trace index table, then close the clients.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def _create_entity(self, entity: Dict[str, Any]):
+        """
+        Insert one entity into the table.
+
+        :param entity: The entity.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def _submit_transaction(self, operations: List[Tuple[str, Dict[str, Any]]]):
+        """
+        Submit one entity group transaction to the table.
+
+        :param operations: The operations of one partition.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def _get_entity(self, partition_key: str, row_key: str) -> Dict[str, Any]:
+        """
+        Read one entity of the table.
+
+        :param partition_key: The partition key of the entity.
+        :param row_key: The row key of the entity.
+        :return: The entity.
+        :raises ResourceNotFoundError: If the entity does not exist.
+        """
+        raise NotImplementedError
+
+    async def open(self):
+        """
+        Prepare the clients before a request. The clients of this storage are
+        ready once it is constructed, so this does nothing.
+        """
+
+    async def _write_index(self, entries: Sequence[LogTuple]):
+        """
+        Write the trace index pointers of log entries.
+
+        Pointers are written before their entries and upserted, so a failed write
+        is retried as a whole, and a pointer whose entry is missing is skipped
+        by get_logs_by_trace. While the circuit breaker is open and the entries
+        go to the fallback storage, they are not indexed here.
+
+        :param entries: A sequence of (partition_key, row_key, data) tuples.
+        :raises CircuitOpenError: If the circuit is open and there is no fallback.
+        :raises StorageError: If writing the index fails.
+        """
+        if not self.trace_index:
+            return
+
+        async def submit(operations):
+            await self._call(
+                lambda: self._submit_index(operations), "index_transaction"
+            )
+
+        try:
+            await asyncio.gather(
+                *(submit(operations) for operations in index_transactions(entries))
+            )
+        except CircuitOpenError:
+            if self._fallback() is None:
+                raise
+        except Exception as e:
+            raise StorageError(f"Failed to index logs: {str(e)}") from e
+
+    async def store_log(self, partition_key: str, row_key: str, data: Dict[str, Any]):
+        """
+        Store a log entry in the table.
+
+        :param partition_key: The partition key for the log entry.
+        :param row_key: The row key for the log entry.
+        :param data: A dictionary containing the log data.
+        :raises ValueError: If partition_key, row_key, or data is invalid.
+        :raises CircuitOpenError: If the circuit breaker is open and there is no
+                                  fallback storage.
+        :raises StorageError: If storing the log entry fails.
+        """
+        validate_log(partition_key, row_key, data)
+
+        entity = self._build_entity(partition_key, row_key, data)
+
+        await self.open()
+        await self._write_index([(partition_key, row_key, data)])
+        await self._write(
+            functools.partial(self._create_entity, entity),
+            [(partition_key, row_key, data)],
+            "Failed to store log",
+            "create_entity",
+        )
+
+    async def store_logs(self, entries: Sequence[LogTuple]):
+        """
+        Store several log entries using entity group transactions.
+
+        Entries are grouped by partition key and submitted in transactions of at
+        most MAX_TRANSACTION_SIZE operations, one round trip per transaction.
+
+        :param entries: A sequence of (partition_key, row_key, data) tuples.
+        :raises ValueError: If any of the entries is invalid.
+        :raises CircuitOpenError: If the circuit breaker is open and there is no
+                                  fallback storage.
+        :raises StorageError: If submitting a transaction fails.
+        """
+        transactions = self._group_transactions(entries)
+
+        await self.open()
+        await self._write_index(entries)
+        await self._write_transactions(transactions)
+
+    async def _write_transactions(self, transactions: List[List[LogTuple]]):
+        """
+        Submit the transactions of store_logs, one after the other.
+
+        :param transactions: The entries of every transaction.
+        :raises CircuitOpenError: If the circuit breaker is open and there is no
+                                  fallback storage.
+        :raises StorageError: If submitting a transaction fails.
+        """
+        for transaction in transactions:
+            await self._write_transaction(transaction)
+
+    async def _write_transaction(self, transaction: List[LogTuple]):
+        """
+        Submit one transaction of store_logs.
+
+        :param transaction: The entries of the transaction.
+        :raises CircuitOpenError: If the circuit breaker is open and there is no
+                                  fallback storage.
+        :raises StorageError: If submitting the transaction fails.
+        """
+        await self._write(
+            functools.partial(
+                self._submit_transaction, self._transaction_operations(transaction)
+            ),
+            transaction,
+            "Failed to store logs",
+            "submit_transaction",
+        )
+
+    async def get_log_entry(
+        self, partition_key: str, row_key: str
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Retrieve a single log entry from the table.
+
+        :param partition_key: The partition key of the log entry.
+        :param row_key: The row key of the log entry.
+        :return: A dictionary containing the log entry or None if not found.
+        :raises ValueError: If partition_key or row_key is empty.
+        :raises CircuitOpenError: If the circuit breaker is open.
+        """
+        validate_keys(partition_key, row_key)
+
+        await self.open()
+        get = functools.partial(self._get_entity, partition_key, row_key)
+        try:
+            return self.metadata_codec.decode(dict(await self._call(get, "get_entity")))
+        except ResourceNotFoundError:
+            return None
+
+    async def get_logs_by_trace(
+        self, trace_id: str, as_entries: bool = False, max_concurrency: int = 16
+    ) -> List[Any]:
+        """
+        Retrieve every log of a trace.
+
+        With trace_index enabled, the trace's index partition is read and the
+        entries it points to are fetched with concurrent point reads. Otherwise,
+        or if the TraceId is not a valid key, the table is scanned with a TraceId
+        filter.
+
+        :param trace_id: The TraceId of the logs.
+        :param as_entries: Return LogEntry records instead of dictionaries.
+        :param max_concurrency: The maximum number of concurrent point reads.
+        :return: The logs of the trace in the RowKey layout's time order.
+        :raises ValueError: If max_concurrency is not positive.
+        :raises CircuitOpenError: If the circuit breaker is open.
+        """
+        if max_concurrency <= 0:
+            raise ValueError("Max concurrency must be positive")
+        if not self.trace_index or not is_valid_key(trace_id):
+            return await super().get_logs_by_trace(trace_id, as_entries=as_entries)
+
+        query_filter = f"PartitionKey eq {quote(trace_id)}"
+        pointers: List[Tuple[str, str]] = []
+        continuation = None
+        while True:
+            page, continuation = await self._call(
+                lambda: self._query_index_page(
+                    query_filter, MAX_QUERY_PAGE_SIZE, continuation
+                ),
+                "index_query",
+            )
+            pointers.extend(
+                (entity["LogPartitionKey"], entity["LogRowKey"]) for entity in page
+            )
+            if continuation is None:
+                break
+
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def read(partition_key, row_key):
+            async with semaphore:
+                return await self.get_log_entry(partition_key, row_key)
+
+        logs = [
+            log
+            for log in await asyncio.gather(*(read(*pointer) for pointer in pointers))
+            if log is not None
+        ]
+        if as_entries:
+            return [LogEntry.from_entity(log) for log in logs]
+        return logs
+
+    def _build_filter_string(self, filters: Optional[Filters]) -> Optional[str]:
+        """
+        Build an OData filter string from query filters.
+
+        :param filters: A dictionary of property values, or a query Predicate.
+        :return: An OData filter string or None if no filters are provided.
+        :raises ValueError: If a field name or filter value is invalid.
+        """
+        return compile_filters(filters, self.descending_row_keys)
+
+    async def _query_page(
+        self,
+        query_filter: str,
+        page_size: int,
+        continuation: Optional[Dict[str, str]],
+        select: Optional[List[str]] = None,
+    ) -> Tuple[List[Dict[str, Any]], Optional[Dict[str, str]]]:
+        """
+        Fetch exactly one service page of a query.
+
+        :param query_filter: The OData filter string.
+        :param page_size: The maximum number of entities to fetch.
+        :param continuation: The service continuation token, or None.
+        :param select: The properties to fetch; defaults to select_fields.
+        :return: The entities and the service continuation token of the next page.
+        """
+        await self.open()
+        return await self._query_client_page(
+            self.table_client,
+            query_filter,
+            page_size,
+            continuation,
+            select or self.select_fields,
+        )
+
+    def _projection(self, select: Optional[Sequence[str]]) -> List[str]:
+        """
+        Get the properties to fetch for the requested columns.
+
+        :param select: The requested columns, or None for all log columns.
+        :return: The property names, including every Metadata part if Metadata
+                 is requested.
+        """
+        if select is None:
+            return self.select_fields
+        fields: List[str] = []
+        for field in select:
+            for name in METADATA_PROPERTIES if field == "Metadata" else [field]:
+                if name not in fields:
+                    fields.append(name)
+        return fields
+
+    async def _fetch_partition_page(
+        self,
+        queries: List[str],
+        index: int,
+        continuation: Optional[Dict[str, str]],
+        page_size: int,
+        select: Optional[List[str]] = None,
+    ) -> Tuple[List[Dict[str, Any]], int, Optional[Dict[str, str]]]:
+        """
+        Fetch the next service page of a query that reads partitions in turn.
+
+        :param queries: The filter strings of the partitions, in reading order.
+        :param index: The position of the partition being read.
+        :param continuation: The service continuation token within it, or None.
+        :param page_size: The maximum number of entities to fetch.
+        :param select: The properties to fetch; defaults to select_fields.
+        :return: The decoded entities, and the partition position and service
+                 continuation token to resume from.
+        """
+        page, continuation = await self.scan_page(
+            queries[index], page_size, continuation, select
+        )
+        if continuation is None:
+            index += 1
+        return page, index, continuation
+
+    async def scan_page(
+        self,
+        query_filter: str,
+        page_size: int,
+        continuation: Optional[Dict[str, str]] = None,
+        select: Optional[Sequence[str]] = None,
+    ) -> Tuple[List[Dict[str, Any]], Optional[Dict[str, str]]]:
+        """
+        Fetch exactly one service page of a filter string, in the RowKey order of
+        each partition, through the resilience policies.
+
+        This is the building block of bulk readers that track their own position,
+        such as export_logs; query_filter and partition_filters build the filter.
+
+        :param query_filter: The OData filter string; empty reads every entity.
+        :param page_size: The maximum number of entities to fetch; the service
+                          returns at most MAX_QUERY_PAGE_SIZE.
+        :param continuation: The service continuation token, or None.
+        :param select: Only fetch these columns; None fetches every log column.
+        :return: The decoded entities and the service continuation token of the
+                 next page, or None after the last page.
+        :raises ValueError: If page_size is not positive.
+        :raises CircuitOpenError: If the circuit breaker is open.
+        """
+        if page_size <= 0:
+            raise ValueError("Page size must be positive")
+        fields = self._projection(select)
+        page, continuation = await self._call(
+            lambda: self._query_page(
+                query_filter or "PartitionKey ne ''", page_size, continuation, fields
+            )
+        )
+        return [self.metadata_codec.decode(entity) for entity in page], continuation
+
+    async def get_logs(
+        self,
+        page_size: int = 50,
+        continuation_token: Optional[str] = None,
+        order_by: str = "Timestamp",
+        ascending: bool = False,
+        filters: Optional[Filters] = None,
+        *,
+        logger_name: Optional[str] = None,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None,
+        as_entries: bool = False,
+    ) -> Tuple[List[Any], Optional[str]]:
+        """
+        Retrieve one page of logs from the table.
+
+        Without logger_name exactly one service page is fetched. With logger_name,
+        only the partitions the partition strategy maps to the time range are read,
+        one after the other, until the page is full. Timestamp order comes from the
+        RowKey layout; ordering by another field sorts the returned page only.
+
+        :param page_size: The maximum number of logs to retrieve per page.
+        :param continuation_token: The token to continue retrieving logs from where the last query left off.
+        :param order_by: The field to order the logs by.
+        :param ascending: Whether to order the logs in ascending order.
+        :param filters: A dictionary of property values, or a query Predicate.
+        :param logger_name: Only read the partitions of this logger.
+        :param start_time: Only return entries logged at or after this UTC time.
+        :param end_time: Only return entries logged at or before this UTC time.
+        :param as_entries: Return LogEntry records instead of dictionaries.
+        :return: A tuple containing a list of logs and an optional continuation token.
+        :raises ValueError: If page_size is not positive, order_by is invalid, the
+                            order is not supported by the RowKey layout, or the
+                            continuation token is invalid.
+        :raises CircuitOpenError: If the circuit breaker is open.
+        """
+        queries = self._prepare_query(
+            page_size,
+            order_by,
+            ascending,
+            filters,
+            logger_name=logger_name,
+            start_time=start_time,
+            end_time=end_time,
+        )
+        index, continuation = decode_position(continuation_token, logger_name)
+
+        logs: List[Dict[str, Any]] = []
+        while index < len(queries):
+            page, index, continuation = await self._fetch_partition_page(
+                queries, index, continuation, page_size - len(logs)
+            )
+            logs.extend(page)
+            if len(logs) >= page_size or logger_name is None:
+                break
+
+        logs = sort_page(logs, order_by, ascending)
+        if as_entries:
+            logs = [LogEntry.from_entity(entity) for entity in logs]
+        return logs, encode_position(logger_name, index, len(queries), continuation)
+
+    def _partition_fetcher(
+        self,
+        partition_keys: Sequence[str],
+        filters: Optional[Filters],
+        start_time: Optional[datetime],
+        end_time: Optional[datetime],
+    ) -> PageFetcher:
+        """
+        Build the function get_logs_merged reads one partition page with.
+
+        Every fetch is one service query of the partition after the last RowKey
+        returned.
+
+        :param partition_keys: The partitions, in fetcher index order.
+        :param filters: A dictionary of property values, or a query Predicate.
+        :param start_time: Only return entries logged at or after this UTC time.
+        :param end_time: Only return entries logged at or before this UTC time.
+        :return: The page fetcher of a FanOutMerge over the partitions.
+        :raises ValueError: If a filter is invalid.
+        """
+        base_filter = self.query_filter(filters, start_time, end_time)
+
+        async def fetch(index, after, continuation, size):
+            conditions = [f"PartitionKey eq {quote(partition_keys[index])}"]
+            if after is not None:
+                conditions.append(f"RowKey gt {quote(after)}")
+            if base_filter:
+                conditions.append(base_filter)
+            page, continuation = await self._call(
+                lambda: self._query_page(" and ".join(conditions), size, continuation)
+            )
+            return [self.metadata_codec.decode(entity) for entity in page], continuation
+
+        return fetch
+
+    async def iter_logs(
+        self,
+        page_size: int = 1000,
+        filters: Optional[Filters] = None,
+        *,
+        logger_name: Optional[str] = None,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None,
+        select: Optional[Sequence[str]] = None,
+        limit: Optional[int] = None,
+        prefetch: bool = True,
+        as_entries: bool = False,
+    ) -> AsyncIterator[Any]:
+        """
+        Iterate over the matching logs in the RowKey layout's time order, holding
+        one service page in memory at a time.
+
+        While the caller consumes a page, the next one is fetched in the
+        background. Breaking out of the loop stops the query and cancels the
+        pending fetch.
+
+        :param page_size: The number of entities per service page, at most 1000.
+        :param filters: A dictionary of property values, or a query Predicate.
+        :param logger_name: Only read the partitions of this logger.
+        :param start_time: Only return entries logged at or after this UTC time.
+        :param end_time: Only return entries logged at or before this UTC time.
+        :param select: Only fetch these columns; Metadata includes its parts.
+        :param limit: Stop after this many logs, or None.
+        :param prefetch: Fetch the next page while the current one is consumed.
+        :param as_entries: Yield LogEntry records instead of dictionaries.
+        :return: An async iterator of logs.
+        :raises ValueError: If an argument is invalid.
+        """
+        if limit is not None and limit <= 0:
+            raise ValueError("Limit must be positive")
+        queries = self._prepare_query(
+            page_size,
+            "Timestamp",
+            not self.descending_row_keys,
+            filters,
+            logger_name=logger_name,
+            start_time=start_time,
+            end_time=end_time,
+        )
+        pages = read_pages(
+            functools.partial(
+                self._fetch_partition_page,
+                queries,
+                page_size=page_size,
+                select=self._projection(select),
+            ),
+            len(queries),
+            prefetch,
+        )
+        count = 0
+        try:
+            async for page in pages:
+                for entity in page:
+                    yield LogEntry.from_entity(entity) if as_entries else entity
+                    count += 1
+                    if count == limit:
+                        return
+        finally:
+            await pages.aclose()
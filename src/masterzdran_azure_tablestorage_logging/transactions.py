@@ -0,0 +1,107 @@
+"""
+Entity group transactions for Azure Table Storage logging module.
+Validates log entries and groups them into the batches the service accepts.
+"""
+
+from typing import Any, Dict, List, Sequence, Tuple, TypeVar
+
+from .keys import is_valid_key
+
+T = TypeVar("T")
+LogTuple = Tuple[str, str, Dict[str, Any]]
+
+# Maximum number of operations accepted by a single entity group transaction.
+MAX_TRANSACTION_SIZE = 100
+
+
+def validate_keys(partition_key: str, row_key: str):
+    """
+    Validate the keys of a log entry.
+
+    :param partition_key: The partition key of the log entry.
+    :param row_key: The row key of the log entry.
+    :raises ValueError: If partition_key or row_key is empty.
+    """
+    if not partition_key:
+        raise ValueError("Partition key cannot be empty")
+    if not row_key:
+        raise ValueError("Row key cannot be empty")
+
+
+def validate_log(partition_key: str, row_key: str, data: Dict[str, Any]):
+    """
+    Validate a log entry before it is written or queued.
+
+    :param partition_key: The partition key for the log entry.
+    :param row_key: The row key for the log entry.
+    :param data: A dictionary containing the log data.
+    :raises ValueError: If partition_key, row_key, or data is invalid.
+    """
+    validate_keys(partition_key, row_key)
+    if not data or "Message" not in data:
+        raise ValueError("Invalid log data")
+
+
+def _split(partitions: Dict[str, List[T]]) -> List[List[T]]:
+    """
+    Split each partition into transactions of at most MAX_TRANSACTION_SIZE items.
+
+    :param partitions: The items of each partition key.
+    :return: A list of transactions, each a list of items.
+    """
+    transactions = []
+    for group in partitions.values():
+        for start in range(0, len(group), MAX_TRANSACTION_SIZE):
+            transactions.append(group[start : start + MAX_TRANSACTION_SIZE])
+    return transactions
+
+
+def group_transactions(entries: Sequence[LogTuple]) -> List[List[LogTuple]]:
+    """
+    Group log entries into entity group transactions.
+
+    Entries are grouped by partition key and split into transactions of at
+    most MAX_TRANSACTION_SIZE operations.
+
+    :param entries: A sequence of (partition_key, row_key, data) tuples.
+    :return: A list of transactions, each a list of entries.
+    :raises ValueError: If any of the entries is invalid.
+    """
+    partitions: Dict[str, List[LogTuple]] = {}
+    for entry in entries:
+        validate_log(*entry)
+        partitions.setdefault(entry[0], []).append(entry)
+    return _split(partitions)
+
+
+def index_transactions(
+    entries: Sequence[LogTuple],
+) -> List[List[Tuple[str, Dict[str, Any]]]]:
+    """
+    Build the trace index operations of log entries, grouped into entity
+    group transactions.
+
+    The index has one partition per TraceId and one pointer entity per entry,
+    keyed by the entry's RowKey so a trace reads back in time order. Entries
+    without a TraceId, or with one that is not a valid key, are not indexed.
+
+    :param entries: A sequence of (partition_key, row_key, data) tuples.
+    :return: A list of transactions, each a list of upsert operations.
+    """
+    partitions: Dict[str, List[Tuple[str, Dict[str, Any]]]] = {}
+    for partition_key, row_key, data in entries:
+        trace_id = data.get("TraceId")
+        if not trace_id or not is_valid_key(trace_id):
+            continue
+        partitions.setdefault(trace_id, []).append(
+            (
+                "upsert",
+                {
+                    "PartitionKey": trace_id,
+                    "RowKey": f"{row_key}_{partition_key}",
+                    "LogPartitionKey": partition_key,
+                    "LogRowKey": row_key,
+                },
+            )
+        )
+    return _split(partitions)
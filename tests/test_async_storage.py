@@ -0,0 +1,107 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+import pytest_asyncio
+from azure.core.exceptions import ResourceNotFoundError
+
+from masterzdran_azure_tablestorage_logging import AsyncAzureTableStorage
+
+CONNECTION_STRING = (
+    "DefaultEndpointsProtocol=https;AccountName=devstoreaccount1;AccountKey=key;"
+)
+
+
+@pytest_asyncio.fixture
+async def async_storage():
+    """
+    Fixture for AsyncAzureTableStorage with mocked asynchronous clients.
+    """
+    table_client = MagicMock()
+    table_client.create_entity = AsyncMock()
+    table_client.submit_transaction = AsyncMock()
+    table_client.get_entity = AsyncMock()
+    table_client.close = AsyncMock()
+    service = MagicMock()
+    service.create_table = AsyncMock()
+    service.close = AsyncMock()
+    service.get_table_client.return_value = table_client
+
+    with patch(
+        "masterzdran_azure_tablestorage_logging.async_storage.TableServiceClient.from_connection_string",
+        return_value=service,
+    ), patch.object(AsyncAzureTableStorage, "_create_transport", return_value=None):
+        storage = AsyncAzureTableStorage(
+            connection_string=CONNECTION_STRING, table_name="logs", max_concurrency=2
+        )
+        yield storage, service, table_client
+
+
+@pytest.mark.asyncio
+async def test_async_storage_validation():
+    """
+    Test AsyncAzureTableStorage argument validation.
+    """
+    with pytest.raises(ValueError, match="Connection string cannot be empty"):
+        AsyncAzureTableStorage(connection_string="", table_name="logs")
+    with pytest.raises(ValueError, match="Max concurrency must be positive"):
+        AsyncAzureTableStorage(CONNECTION_STRING, "logs", max_concurrency=0)
+
+
+@pytest.mark.asyncio
+async def test_async_storage_lifecycle(async_storage):
+    """
+    Test that the context manager creates the table and closes the clients.
+    """
+    storage, service, table_client = async_storage
+
+    async with storage:
+        await storage.store_log("pk", "rk", {"LogLevel": "INFO", "Message": "m"})
+
+    service.create_table.assert_awaited_once_with("logs")
+    table_client.create_entity.assert_awaited_once()
+    assert table_client.create_entity.call_args[1]["entity"]["Message"] == "m"
+    table_client.close.assert_awaited_once()
+    service.close.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_async_storage_limits_concurrency(async_storage):
+    """
+    Test that no more than max_concurrency transactions run at once.
+    """
+    storage, _, table_client = async_storage
+    in_flight = 0
+    peak = 0
+
+    async def submit_transaction(operations):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+
+    table_client.submit_transaction.side_effect = submit_transaction
+    entries = [(f"pk{i}", "rk", {"LogLevel": "INFO", "Message": "m"}) for i in range(5)]
+
+    await storage.store_logs(entries)
+
+    assert table_client.submit_transaction.await_count == 5
+    assert peak == 2
+
+
+@pytest.mark.asyncio
+async def test_async_storage_get_log_entry(async_storage):
+    """
+    Test point reads, including missing entities.
+    """
+    storage, _, table_client = async_storage
+    table_client.get_entity.return_value = {"PartitionKey": "pk", "RowKey": "rk"}
+
+    assert await storage.get_log_entry("pk", "rk") == {
+        "PartitionKey": "pk",
+        "RowKey": "rk",
+    }
+
+    table_client.get_entity.side_effect = ResourceNotFoundError("missing")
+    assert await storage.get_log_entry("pk", "other") is None
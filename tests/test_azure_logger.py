@@ -1,3 +1,4 @@
+import sys
 from datetime import datetime
 from typing import Any, Dict, List, Optional, Tuple
 from unittest.mock import AsyncMock, MagicMock, patch
@@ -9,6 +10,8 @@ import pytest_asyncio
 
 from masterzdran_azure_tablestorage_logging import AzureLogger, LogLevel
 from masterzdran_azure_tablestorage_logging.interfaces import StorageInterface
+from masterzdran_azure_tablestorage_logging.keys import row_key_for
+from masterzdran_azure_tablestorage_logging.models import LogEntry
 from masterzdran_azure_tablestorage_logging.storage import AzureTableStorage
 
 # Storage Test Fixtures
@@ -18,7 +21,7 @@ def mock_table_client():
     Fixture for mocking TableClient.
     """
     client = MagicMock(spec=TableClient)
-    client.create_entity = AsyncMock()
+    client.create_entity = MagicMock()
     client.query_entities = MagicMock()
     return client
 
@@ -283,3 +286,233 @@ async def test_get_log_entry_invalid_keys(azure_storage):
     with pytest.raises(ValueError, match="Partition key cannot be empty"):
         await storage.get_log_entry(None, "row_key")
 
+
+
+@pytest.mark.asyncio
+async def test_storage_store_logs_groups_transactions(azure_storage):
+    """
+    Test that store_logs submits one transaction per partition and 100 entities.
+    """
+    storage, mock_client = azure_storage
+
+    entries = [
+        ("service-a", f"{i:05d}", {"LogLevel": "INFO", "Message": f"message {i}"})
+        for i in range(150)
+    ]
+    entries.append(("service-b", "00000", {"LogLevel": "INFO", "Message": "other"}))
+
+    await storage.store_logs(entries)
+
+    batches = [call[0][0] for call in mock_client.submit_transaction.call_args_list]
+    assert [len(batch) for batch in batches] == [100, 50, 1]
+    assert all(op == "create" for batch in batches for op, _ in batch)
+    assert {entity["PartitionKey"] for _, entity in batches[0]} == {"service-a"}
+    assert batches[2][0][1]["PartitionKey"] == "service-b"
+
+
+@pytest.mark.asyncio
+async def test_get_log_entry_returns_entity(azure_storage):
+    """
+    Test retrieving a single log entry from AzureTableStorage.
+    """
+    storage, mock_client = azure_storage
+    mock_client.get_entity.return_value = {"PartitionKey": "pk", "RowKey": "rk"}
+
+    entry = await storage.get_log_entry("pk", "rk")
+
+    assert entry == {"PartitionKey": "pk", "RowKey": "rk"}
+
+
+@pytest.mark.asyncio
+async def test_logger_records_caller_location(logger, mock_storage):
+    """
+    Test that the logger records the module and line of its caller.
+    """
+    await logger.info("Test message")
+    expected_line = sys._getframe().f_lineno - 1
+
+    data = mock_storage.store_log.call_args[0][2]
+    assert data["Location"] == f"{__name__}:{expected_line}"
+
+
+@pytest.mark.asyncio
+async def test_logger_location_capture_disabled(mock_storage):
+    """
+    Test that location capture can be turned off per logger.
+    """
+    logger = AzureLogger(
+        storage=mock_storage, logger_name="test_logger", capture_location=False
+    )
+
+    await logger.info("Test message")
+
+    assert mock_storage.store_log.call_args[0][2]["Location"] is None
+
+    with pytest.raises(ValueError, match="Location sample rate"):
+        AzureLogger(storage=mock_storage, logger_name="x", location_sample_rate=2)
+
+
+class FakePageIterator:
+    """
+    Stand-in for the page iterator returned by ItemPaged.by_page.
+    """
+
+    def __init__(self, pages, next_token):
+        self._pages = iter(pages)
+        self._next_token = next_token
+        self.continuation_token = None
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        page = next(self._pages)
+        self.continuation_token = self._next_token
+        return iter(page)
+
+
+@pytest.mark.asyncio
+async def test_get_logs_fetches_one_page(azure_storage):
+    """
+    Test that get_logs fetches a single service page and returns its token.
+    """
+    storage, mock_client = azure_storage
+    service_token = {"PartitionKey": "pk", "RowKey": "next"}
+    entities = [{"PartitionKey": "pk", "RowKey": "1"}, {"PartitionKey": "pk", "RowKey": "2"}]
+    pager = MagicMock()
+    pager.by_page.return_value = FakePageIterator(
+        [entities, [{"PartitionKey": "pk", "RowKey": "never"}]], service_token
+    )
+    mock_client.query_entities.return_value = pager
+
+    logs, token = await storage.get_logs(page_size=2)
+
+    assert logs == entities
+    assert mock_client.query_entities.call_args[1]["results_per_page"] == 2
+    pager.by_page.assert_called_once_with(continuation_token=None)
+
+    pager.by_page.return_value = FakePageIterator([], None)
+    logs, next_token = await storage.get_logs(page_size=2, continuation_token=token)
+
+    assert (logs, next_token) == ([], None)
+    pager.by_page.assert_called_with(continuation_token=service_token)
+
+
+@pytest.mark.asyncio
+async def test_get_logs_rejects_order_against_row_key_layout(azure_storage):
+    """
+    Test that Timestamp order must follow the RowKey layout.
+    """
+    storage, _ = azure_storage
+
+    with pytest.raises(ValueError, match="Timestamp order must be descending"):
+        await storage.get_logs(order_by="Timestamp", ascending=True)
+
+    with pytest.raises(ValueError, match="Invalid continuation token"):
+        await storage.get_logs(continuation_token="not a token!")
+
+
+def test_descending_row_keys_sort_newest_first():
+    """
+    Test that inverted-tick RowKeys sort newer entries first.
+    """
+    older = row_key_for(datetime(2025, 1, 21, 12, 0, 0))
+    newer = row_key_for(datetime(2025, 1, 21, 12, 0, 0, 1))
+
+    assert len(older) == len(newer) == 19
+    assert newer < older
+    assert row_key_for(datetime(2025, 1, 21), descending=False) < row_key_for(
+        datetime(2025, 1, 22), descending=False
+    )
+
+
+@pytest.mark.asyncio
+async def test_logger_skips_levels_below_threshold(mock_storage):
+    """
+    Test that calls below the logger's level never reach the storage.
+    """
+    logger = AzureLogger(storage=mock_storage, logger_name="test_logger", level="INFO")
+    message = MagicMock()
+
+    await logger.debug(message)
+    await logger.log(LogLevel.DEBUG, "ignored")
+
+    mock_storage.store_log.assert_not_called()
+    message.assert_not_called()
+    assert not logger.is_enabled_for(LogLevel.DEBUG)
+    assert logger.is_enabled_for(LogLevel.ERROR)
+
+    await logger.warning("kept")
+    assert mock_storage.store_log.call_args[0][2]["LogLevel"] == "WARNING"
+
+    logger.set_level(LogLevel.DEBUG)
+    await logger.debug("now kept")
+    assert mock_storage.store_log.call_count == 2
+
+    with pytest.raises(ValueError):
+        logger.set_level("VERBOSE")
+
+
+@pytest.mark.asyncio
+async def test_logger_accepts_custom_numeric_levels(mock_storage):
+    """
+    Test that numbers between the defined levels filter at that number and are
+    stored under the closest level below them.
+    """
+    logger = AzureLogger(storage=mock_storage, logger_name="test_logger", level=25)
+
+    await logger.log(22, "ignored")
+    mock_storage.store_log.assert_not_called()
+
+    await logger.log(25, "notice")
+    assert mock_storage.store_log.call_args[0][2]["LogLevel"] == "INFO"
+    await logger.log(5, "trace")
+    await logger.log(99, "fatal")
+    assert mock_storage.store_log.call_count == 2
+    assert mock_storage.store_log.call_args[0][2]["LogLevel"] == "CRITICAL"
+    assert logger.level == LogLevel.INFO
+    assert LogLevel.parse(5) == LogLevel.DEBUG
+
+
+@pytest.mark.asyncio
+async def test_logger_formats_messages_lazily(logger, mock_storage):
+    """
+    Test that message templates and callables are formatted when logged.
+    """
+    await logger.info("user %s did %d things", args=("alice", 3))
+    assert mock_storage.store_log.call_args[0][2]["Message"] == "user alice did 3 things"
+
+    await logger.log(LogLevel.ERROR, lambda: "built on demand")
+    data = mock_storage.store_log.call_args[0][2]
+    assert data["Message"] == "built on demand"
+    assert data["LogLevel"] == "ERROR"
+
+    assert LogLevel.DEBUG < LogLevel.INFO < LogLevel.CRITICAL
+
+
+@pytest.mark.asyncio
+async def test_logger_hands_log_entry_to_storage(logger, mock_storage, azure_storage):
+    """
+    Test that the logger builds a LogEntry that storages serialize directly and
+    that get_logs can return LogEntry records.
+    """
+    await logger.info("hello", metadata={"user": "alice"})
+    partition_key, row_key, entry = mock_storage.store_log.call_args[0]
+
+    assert isinstance(entry, LogEntry)
+    assert (entry.partition_key, entry.row_key) == (partition_key, row_key)
+    assert entry["Message"] == "hello" and "Metadata" in entry
+
+    storage, mock_client = azure_storage
+    await storage.store_log(partition_key, row_key, entry)
+    entity = mock_client.create_entity.call_args[1]["entity"]
+    assert entity["LogLevel"] == "INFO"
+    assert entity["Metadata"] == '{"user":"alice"}'
+
+    pager = MagicMock()
+    pager.by_page.return_value = FakePageIterator([[entity]], None)
+    mock_client.query_entities.return_value = pager
+    logs, _ = await storage.get_logs(as_entries=True)
+
+    assert logs[0].metadata == {"user": "alice"}
+    assert logs[0].to_dict()["RowKey"] == row_key
@@ -0,0 +1,241 @@
+import asyncio
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import pytest
+
+from masterzdran_azure_tablestorage_logging import (
+    AzureLogger,
+    BatchingStorage,
+    InMemoryTableStorage,
+)
+from masterzdran_azure_tablestorage_logging.ingestion import (
+    IngestionQueue,
+    OverflowPolicy,
+)
+from masterzdran_azure_tablestorage_logging.interfaces import StorageInterface
+
+
+class RecordingStorage(StorageInterface):
+    """
+    In-memory StorageInterface recording every batch it receives.
+    """
+
+    def __init__(self):
+        self.batches: List[List[Tuple[str, str, Dict[str, Any]]]] = []
+        self.closed = False
+
+    async def store_log(self, partition_key: str, row_key: str, data: dict) -> None:
+        await self.store_logs([(partition_key, row_key, data)])
+
+    async def store_logs(self, entries):
+        self.batches.append(list(entries))
+
+    async def aclose(self):
+        self.closed = True
+
+    async def get_logs(
+        self,
+        page_size: int = 50,
+        continuation_token: Optional[str] = None,
+        order_by: str = "Timestamp",
+        ascending: bool = False,
+        filters: Optional[Dict[str, Any]] = None,
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        return [], None
+
+    async def get_log_entry(
+        self, partition_key: str, row_key: str
+    ) -> Optional[Dict[str, Any]]:
+        return None
+
+
+def _data(message: str) -> Dict[str, Any]:
+    return {"LogLevel": "INFO", "Message": message}
+
+
+@pytest.mark.asyncio
+async def test_batching_flushes_on_size():
+    """
+    Test that reaching max_batch_size triggers a background flush.
+    """
+    inner = RecordingStorage()
+    storage = BatchingStorage(inner, max_batch_size=3, flush_interval=60)
+
+    for i in range(3):
+        await storage.store_log("pk", f"rk{i}", _data(f"m{i}"))
+    await asyncio.sleep(0.01)
+
+    assert [len(batch) for batch in inner.batches] == [3]
+    await storage.aclose()
+
+
+@pytest.mark.asyncio
+async def test_batching_flushes_on_interval():
+    """
+    Test that buffered entries are written once the flush interval elapses.
+    """
+    inner = RecordingStorage()
+    storage = BatchingStorage(inner, max_batch_size=100, flush_interval=0.01)
+
+    await storage.store_log("pk", "rk", _data("m"))
+    assert inner.batches == []
+    await asyncio.sleep(0.05)
+
+    assert len(inner.batches) == 1
+    await storage.aclose()
+
+
+@pytest.mark.asyncio
+async def test_batching_aclose_drains_buffer():
+    """
+    Test that aclose writes pending entries and closes the wrapped storage.
+    """
+    inner = RecordingStorage()
+    logger = AzureLogger(
+        storage=BatchingStorage(inner, max_batch_size=100, flush_interval=60),
+        logger_name="test_logger",
+    )
+
+    await logger.info("first")
+    await logger.info("second")
+    await logger.aclose()
+
+    messages = [data["Message"] for batch in inner.batches for _, _, data in batch]
+    assert messages == ["first", "second"]
+    assert inner.closed
+
+    with pytest.raises(ValueError, match="Storage is closed"):
+        await logger.info("late")
+
+
+@pytest.mark.asyncio
+async def test_batching_reports_failed_flush():
+    """
+    Test that failures from the wrapped storage surface on flush.
+    """
+    inner = RecordingStorage()
+    failures = []
+
+    async def failing_store_logs(entries):
+        raise Exception("Storage error")
+
+    inner.store_logs = failing_store_logs
+    storage = BatchingStorage(
+        inner, flush_interval=60, on_error=lambda e, batch: failures.append(batch)
+    )
+
+    await storage.store_log("pk", "rk", _data("m"))
+    with pytest.raises(Exception, match="Storage error"):
+        await storage.flush()
+    assert storage.failed_entries == 1
+    assert len(failures) == 1
+    assert len(storage.queue) == 1
+
+
+@pytest.mark.asyncio
+async def test_batching_retries_a_failed_flush():
+    """
+    Test that a batch the wrapped storage fails to store is requeued in order
+    and written by the next flush.
+    """
+    inner = RecordingStorage()
+    store_logs = inner.store_logs
+    attempts = []
+
+    async def flaky_store_logs(entries):
+        attempts.append(len(entries))
+        if len(attempts) == 1:
+            raise ConnectionError("Transient error")
+        await store_logs(entries)
+
+    inner.store_logs = flaky_store_logs
+    storage = BatchingStorage(inner, max_batch_size=2, flush_interval=60)
+    for index in range(3):
+        await storage.store_log("pk", f"rk{index}", _data(f"m{index}"))
+
+    with pytest.raises(ConnectionError):
+        await storage.flush()
+    await storage.flush()
+
+    written = [row_key for batch in inner.batches for _, row_key, _ in batch]
+    assert written == ["rk0", "rk1", "rk2"]
+    assert storage.failed_entries == 2
+    assert len(storage.queue) == 0
+
+
+@pytest.mark.asyncio
+async def test_batching_closes_the_storage_when_the_last_flush_fails():
+    """
+    Test that aclose() closes the wrapped storage even if the last flush fails,
+    keeps the failed entries and retries them when called again.
+    """
+    inner = RecordingStorage()
+    store_logs = inner.store_logs
+    failing = [True]
+
+    async def failing_store_logs(entries):
+        if failing[0]:
+            raise ConnectionError("Storage down")
+        await store_logs(entries)
+
+    inner.store_logs = failing_store_logs
+    storage = BatchingStorage(inner, flush_interval=60)
+    await storage.store_log("pk", "rk", _data("m"))
+
+    with pytest.raises(ConnectionError):
+        await storage.aclose()
+    assert inner.closed
+    assert len(storage.queue) == 1
+    with pytest.raises(ValueError, match="closed"):
+        await storage.store_log("pk", "rk2", _data("late"))
+
+    failing[0] = False
+    await storage.aclose()
+    assert [row_key for _, row_key, _ in inner.batches[0]] == ["rk"]
+    await storage.aclose()
+
+
+@pytest.mark.asyncio
+async def test_batching_applies_queue_overflow_policy():
+    """
+    Test that a full queue drops entries instead of growing without bound.
+    """
+    inner = RecordingStorage()
+    storage = BatchingStorage(
+        inner,
+        max_batch_size=100,
+        flush_interval=60,
+        queue=IngestionQueue(max_entries=2, policy=OverflowPolicy.DROP_NEWEST),
+    )
+
+    for i in range(5):
+        await storage.store_log("pk", f"rk{i}", _data(f"m{i}"))
+
+    assert storage.stats()["dropped_entries"] == 3
+    await storage.aclose()
+    assert [rk for batch in inner.batches for _, rk, _ in batch] == ["rk0", "rk1"]
+
+
+@pytest.mark.asyncio
+async def test_batching_queues_batches_and_forwards_reads():
+    """
+    Test that store_logs goes through the queue and that every read, with its
+    time range, reaches the wrapped storage.
+    """
+    table = InMemoryTableStorage()
+    storage = BatchingStorage(table, max_batch_size=10, flush_interval=60)
+    logger = AzureLogger(storage, "svc")
+    await logger.info("early")
+    await storage.flush()
+    await storage.store_logs([("svc", "0" * 19 + "late", {"Message": "queued"})])
+    assert table.service.written_entities == 1
+
+    await storage.flush()
+    logs, _ = await storage.get_logs(logger_name="svc", end_time=datetime(2000, 1, 1))
+    assert logs == []
+    messages = [log["Message"] async for log in storage.iter_logs(limit=5)]
+    assert sorted(messages) == ["early", "queued"]
+    merged, _ = await storage.get_logs_merged(["svc"], page_size=5)
+    assert len(merged) == 2
+    await storage.aclose()
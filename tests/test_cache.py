@@ -0,0 +1,152 @@
+from typing import Any, Dict, List, Optional, Tuple
+
+import pytest
+
+from masterzdran_azure_tablestorage_logging import CachingStorage, Field, LogEntry
+from masterzdran_azure_tablestorage_logging.cache import _MISSING, LRUCache
+from masterzdran_azure_tablestorage_logging.interfaces import StorageInterface
+
+
+class CountingStorage(StorageInterface):
+    """
+    In-memory storage counting the reads that reach it.
+    """
+
+    def __init__(self):
+        self.entries: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self.point_reads = 0
+        self.queries: List[Dict[str, Any]] = []
+
+    async def store_log(self, partition_key: str, row_key: str, data: dict):
+        self.entries[(partition_key, row_key)] = dict(data, RowKey=row_key)
+
+    async def get_logs(self, page_size=50, continuation_token=None, **kwargs):
+        self.queries.append(dict(kwargs, continuation_token=continuation_token))
+        logs = [dict(log) for _, log in sorted(self.entries.items())]
+        return logs[:page_size], None
+
+    async def get_log_entry(self, partition_key: str, row_key: str):
+        self.point_reads += 1
+        log = self.entries.get((partition_key, row_key))
+        return None if log is None else dict(log)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_lru_cache_evicts_and_expires():
+    """
+    Test LRU eviction by count and expiry by TTL.
+    """
+    clock = FakeClock()
+    cache = LRUCache(max_entries=2, ttl=10, clock=clock)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+
+    assert len(cache) == 2
+    assert cache.get("a") == 1
+    assert cache.get("b") is _MISSING
+
+    clock.now = 11
+    assert cache.get("a") is _MISSING
+    assert len(cache) == 1
+    assert (cache.hits, cache.misses) == (2, 2)
+
+    with pytest.raises(ValueError, match="Max entries"):
+        LRUCache(max_entries=0, ttl=1)
+    with pytest.raises(ValueError, match="TTL"):
+        LRUCache(max_entries=1, ttl=0)
+
+
+@pytest.mark.asyncio
+async def test_point_reads_are_cached_and_invalidated():
+    """
+    Test that repeated point reads hit the cache, including misses, and that
+    writes through the cache invalidate them.
+    """
+    inner = CountingStorage()
+    await inner.store_log("svc", "001", {"Message": "first"})
+    storage = CachingStorage(inner)
+
+    first = await storage.get_log_entry("svc", "001")
+    first["Message"] = "changed by the caller"
+    second = await storage.get_log_entry("svc", "001")
+    assert await storage.get_log_entry("svc", "002") is None
+    assert await storage.get_log_entry("svc", "002") is None
+
+    assert second["Message"] == "first"
+    assert inner.point_reads == 2
+
+    await storage.store_log("svc", "002", {"Message": "second"})
+    assert (await storage.get_log_entry("svc", "002"))["Message"] == "second"
+    assert inner.point_reads == 3
+    assert storage.stats()["entry_hits"] == 2
+    assert storage.stats()["entry_misses"] == 3
+
+
+@pytest.mark.asyncio
+async def test_cached_log_entries_are_copied():
+    """
+    Test that changing a LogEntry returned from the cache, or its metadata, does
+    not change the next cache hit.
+    """
+
+    class EntryStorage(CountingStorage):
+        async def get_logs(self, page_size=50, continuation_token=None, **kwargs):
+            logs, token = await super().get_logs(page_size, continuation_token)
+            return [LogEntry.from_entity(log) for log in logs], token
+
+    inner = EntryStorage()
+    await inner.store_log(
+        "svc", "001", {"PartitionKey": "svc", "Message": "first", "Metadata": {"n": 1}}
+    )
+    storage = CachingStorage(inner)
+
+    (first,), _ = await storage.get_logs(as_entries=True)
+    first.message = "changed by the caller"
+    first.metadata["n"] = 2
+    (second,), _ = await storage.get_logs(as_entries=True)
+
+    assert isinstance(second, LogEntry)
+    assert second.message == "first"
+    assert second.metadata == {"n": 1}
+    assert storage.stats()["page_hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_pages_are_cached_by_normalized_query():
+    """
+    Test that equivalent queries share a cached page, and that pages expire and
+    are dropped by writes.
+    """
+    inner = CountingStorage()
+    await inner.store_log("svc", "001", {"Message": "first"})
+    clock = FakeClock()
+    storage = CachingStorage(inner, page_ttl=5, clock=clock)
+
+    await storage.get_logs(filters={"LoggerName": "svc", "LogLevel": "INFO"})
+    await storage.get_logs(filters={"LogLevel": "INFO", "LoggerName": "svc"})
+    await storage.get_logs(
+        filters=Field("LogLevel").eq("INFO") & Field("LoggerName").eq("svc")
+    )
+    assert len(inner.queries) == 1
+
+    await storage.get_logs(filters={"LogLevel": "INFO"}, continuation_token="t")
+    assert len(inner.queries) == 2
+
+    await storage.store_logs([("svc", "002", {"Message": "second"})])
+    logs, _ = await storage.get_logs(filters={"LogLevel": "INFO", "LoggerName": "svc"})
+    assert [log["Message"] for log in logs] == ["first", "second"]
+    assert len(inner.queries) == 3
+
+    clock.now = 6
+    await storage.get_logs(filters={"LogLevel": "INFO", "LoggerName": "svc"})
+    assert len(inner.queries) == 4
+    assert storage.stats()["page_hits"] == 2
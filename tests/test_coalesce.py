@@ -0,0 +1,144 @@
+import asyncio
+
+import pytest
+
+from masterzdran_azure_tablestorage_logging import (
+    AzureLogger,
+    CoalescingStorage,
+    InMemoryTableService,
+    InMemoryTableStorage,
+    ingestion,
+)
+from masterzdran_azure_tablestorage_logging.coalesce import COALESCED_KEY
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.mark.asyncio
+async def test_repeats_are_collapsed_into_the_first_entry():
+    """
+    Test that repeats within the window become one entity with a summary, and
+    that distinct lines and single entries are stored unchanged.
+    """
+    service = InMemoryTableService()
+    storage = CoalescingStorage(
+        InMemoryTableStorage(service=service), window=60, max_samples=2
+    )
+    logger = AzureLogger(storage, "svc", capture_location=False)
+
+    for attempt in range(5):
+        await logger.warning("retrying", metadata={"attempt": attempt % 3})
+    await logger.warning("retrying", trace_id="t1")
+    await logger.info("health ok")
+    await logger.error("retrying")
+    assert service.written_entities == 0
+    assert storage.stats() == {"groups": 3, "coalesced_entries": 5}
+
+    await storage.flush()
+    logs, _ = await storage.get_logs(as_entries=True)
+
+    assert service.written_entities == 3
+    by_message = {(log.level, log.message): log for log in logs}
+    retrying = by_message[("WARNING", "retrying")]
+    summary = retrying.metadata[COALESCED_KEY]
+    assert summary["count"] == 6
+    assert summary["first_timestamp"] == retrying.timestamp
+    assert summary["last_timestamp"] > summary["first_timestamp"]
+    assert summary["metadata_samples"] == [{"attempt": 0}, {"attempt": 1}]
+    assert retrying.metadata["attempt"] == 0
+    assert by_message[("INFO", "health ok")].metadata == {}
+    assert by_message[("ERROR", "retrying")].metadata == {}
+    await storage.aclose()
+
+
+@pytest.mark.asyncio
+async def test_windows_close_in_the_background_and_groups_are_bounded():
+    """
+    Test that closed windows are written by the background task and that the
+    oldest group is written when max_groups is exceeded.
+    """
+    clock = Clock()
+    service = InMemoryTableService()
+    errors = []
+    storage = CoalescingStorage(
+        InMemoryTableStorage(service=service),
+        window=0.05,
+        max_groups=2,
+        on_error=lambda error, entries: errors.append(entries),
+        clock=clock,
+    )
+    logger = AzureLogger(storage, "svc")
+
+    await logger.info("a")
+    await logger.info("b")
+    await logger.info("c")
+    assert service.written_entities == 1
+
+    clock.now = 1.0
+    await asyncio.sleep(0.15)
+    assert service.written_entities == 3
+    await logger.info("a")
+    await storage.aclose()
+    assert service.written_entities == 4
+    assert errors == []
+    with pytest.raises(ValueError, match="closed"):
+        await logger.info("a")
+
+
+@pytest.mark.asyncio
+async def test_groups_are_written_when_their_window_closes(monkeypatch):
+    """
+    Test that the background task wakes at the deadline of the oldest open
+    group, so each line is written window seconds after its first occurrence.
+    """
+    clock = Clock()
+
+    async def wait_for_clock(wakeup, timeout):
+        deadline = clock.now + timeout
+        while clock.now < deadline and not wakeup.is_set():
+            await asyncio.sleep(0)
+        wakeup.clear()
+
+    async def advance(now):
+        clock.now = now
+        for _ in range(20):
+            await asyncio.sleep(0)
+
+    monkeypatch.setattr(ingestion, "wait_for_wakeup", wait_for_clock)
+    service = InMemoryTableService()
+    storage = CoalescingStorage(
+        InMemoryTableStorage(service=service), window=10, clock=clock
+    )
+    logger = AzureLogger(storage, "svc")
+
+    await logger.info("a")
+    await advance(9.0)
+    await logger.info("b")
+    await advance(9.9)
+    assert service.written_entities == 0
+    await advance(10.0)
+    assert service.written_entities == 1
+    await advance(18.9)
+    assert service.written_entities == 1
+    await advance(19.0)
+    assert service.written_entities == 2
+    await storage.aclose()
+
+
+def test_invalid_arguments():
+    """
+    Test argument validation.
+    """
+    storage = InMemoryTableStorage()
+    with pytest.raises(ValueError, match="Window"):
+        CoalescingStorage(storage, window=0)
+    with pytest.raises(ValueError, match="Max samples"):
+        CoalescingStorage(storage, max_samples=-1)
+    with pytest.raises(ValueError, match="Max groups"):
+        CoalescingStorage(storage, max_groups=0)
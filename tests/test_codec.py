@@ -0,0 +1,76 @@
+import json
+
+import pytest
+
+from masterzdran_azure_tablestorage_logging.codec import (
+    MAX_METADATA_PARTS,
+    MetadataCodec,
+)
+
+
+def _roundtrip(codec: MetadataCodec, metadata):
+    properties = codec.encode(metadata)
+    entity = {"PartitionKey": "service", "RowKey": "00001", **properties}
+    return properties, MetadataCodec.decode(entity)
+
+
+def test_small_metadata_is_stored_as_json_text():
+    """
+    Test that small metadata keeps the single JSON string property.
+    """
+    properties, entity = _roundtrip(MetadataCodec(), {"user": "alice", "n": 1})
+
+    assert properties == {"Metadata": '{"user":"alice","n":1}'}
+    assert json.loads(entity["Metadata"]) == {"user": "alice", "n": 1}
+
+
+def test_large_metadata_is_split_and_reassembled():
+    """
+    Test that metadata larger than a property is split across Metadata_N
+    properties, including text with surrogate pairs, and joined on read.
+    """
+    metadata = {"blob": "x" * 70000, "emoji": "\U0001f600" * 20000}
+    properties, entity = _roundtrip(MetadataCodec(), metadata)
+
+    assert properties["MetadataParts"] == 1 + sum(
+        name.startswith("Metadata_") for name in properties
+    )
+    for name, value in properties.items():
+        if isinstance(value, str):
+            assert len(value.encode("utf-16-le")) <= 64000
+    assert json.loads(entity["Metadata"]) == metadata
+    assert "Metadata_1" not in entity and "MetadataParts" not in entity
+
+    with pytest.raises(ValueError, match="too large"):
+        MetadataCodec().encode({"blob": "x" * 32000 * MAX_METADATA_PARTS})
+
+
+def test_compressed_metadata_is_binary():
+    """
+    Test that metadata over the threshold is compressed into a binary property.
+    """
+    metadata = {"lines": ["repeated line"] * 1000}
+    codec = MetadataCodec(compression="zlib", compress_threshold=100)
+    properties, entity = _roundtrip(codec, metadata)
+
+    assert properties["MetadataEncoding"] == "zlib"
+    assert isinstance(properties["Metadata"], bytes)
+    assert len(properties["Metadata"]) < len(json.dumps(metadata)) // 10
+    assert json.loads(entity["Metadata"]) == metadata
+
+    assert "MetadataEncoding" not in codec.encode({"small": True})
+    with pytest.raises(ValueError, match="Invalid compression"):
+        MetadataCodec(compression="lz4")
+
+
+def test_zstd_compression():
+    """
+    Test the zstd codec when zstandard is installed.
+    """
+    pytest.importorskip("zstandard")
+    metadata = {"lines": ["repeated line"] * 1000}
+    _, entity = _roundtrip(
+        MetadataCodec(compression="zstd", compress_threshold=0), metadata
+    )
+
+    assert json.loads(entity["Metadata"]) == metadata
@@ -0,0 +1,178 @@
+import asyncio
+import copy
+import json
+import logging
+
+import pytest
+
+from masterzdran_azure_tablestorage_logging import (
+    AzureLogger,
+    AzureTableHandler,
+    InMemoryTableStorage,
+    MetadataCodec,
+    context,
+    get_trace_id,
+    log_context,
+    with_context,
+)
+from masterzdran_azure_tablestorage_logging.context import BoundFields, LayeredFields
+from masterzdran_azure_tablestorage_logging.spool import encode_frame
+
+
+def test_bound_fields_splice_their_json():
+    """
+    Test that extended fields reuse the cached JSON and that later fields win.
+    """
+    base = BoundFields(service="api", region="eu")
+    extended = base.extend({"region": "us", "n": 1})
+
+    assert base.extend({}) is base
+    assert extended == {"service": "api", "region": "us", "n": 1}
+    assert json.loads(extended.to_json()) == extended
+    assert MetadataCodec().encode(extended)["Metadata"] == extended.to_json()
+    assert BoundFields().extend({"a": 1}).to_json() == '{"a":1}'
+    assert extended.to_json().count('"region"') == 1
+    assert base.extend({"n": 1}).to_json() == '{"service":"api","region":"eu","n":1}'
+    with pytest.raises(TypeError):
+        extended["region"] = "ap"
+    with pytest.raises(TypeError):
+        extended.update(region="ap")
+    assert copy.deepcopy(extended) == extended
+
+
+@pytest.mark.asyncio
+async def test_context_and_bound_fields_reach_the_entries():
+    """
+    Test trace ID and field precedence: call, then bound, then context.
+    """
+    storage = InMemoryTableStorage()
+    logger = AzureLogger(storage, "svc", default_trace_id="default")
+    child = logger.bind(trace_id="bound", component="db", shard=1)
+    grandchild = child.bind(shard=2)
+
+    await logger.info("plain")
+    with log_context(trace_id="request-1", user="u1", component="http"):
+        assert get_trace_id() == "request-1"
+        await logger.info("in context")
+        await child.info("child in context", metadata={"query": "q"})
+        await grandchild.info("explicit", trace_id="call")
+    assert get_trace_id() is None
+    await child.info("child")
+
+    logs, _ = await storage.get_logs(as_entries=True)
+    entries = {entry.message: entry for entry in logs}
+    assert entries["plain"].trace_id == "default"
+    assert entries["plain"].metadata == {}
+    assert entries["in context"].trace_id == "request-1"
+    assert entries["in context"].metadata == {"user": "u1", "component": "http"}
+    assert entries["child in context"].trace_id == "request-1"
+    assert entries["child in context"].metadata == {
+        "user": "u1",
+        "component": "db",
+        "shard": 1,
+        "query": "q",
+    }
+    assert entries["explicit"].trace_id == "call"
+    assert entries["explicit"].metadata["shard"] == 2
+    assert entries["child"].trace_id == "bound"
+    assert entries["child"].metadata == {"component": "db", "shard": 1}
+    assert entries["child"].metadata is not entries["child in context"].metadata
+
+
+@pytest.mark.asyncio
+async def test_call_metadata_overrides_bound_fields_once():
+    """
+    Test that overriding a bound field stores a single, merged key.
+    """
+    storage = InMemoryTableStorage()
+    logger = AzureLogger(storage, "svc").bind(component="db", shard=1)
+
+    with log_context(component="http"):
+        await logger.info("override", metadata={"shard": 2})
+
+    (entity,) = storage.service.tables["logs"].values()
+    assert entity["Metadata"] == '{"component":"db","shard":2}'
+
+
+@pytest.mark.asyncio
+async def test_call_metadata_does_not_copy_bound_fields(monkeypatch):
+    """
+    Test that a call's metadata references the bound fields instead of copying
+    them, and that encoding it only serializes the call's own fields.
+    """
+    storage = InMemoryTableStorage()
+    bound = {f"field{index}": index for index in range(1000)}
+    logger = AzureLogger(storage, "svc").bind(**bound)
+    logger.bound_fields.to_json()
+    serialized = []
+    dumps = context.dumps
+    monkeypatch.setattr(
+        context, "dumps", lambda value: serialized.append(value) or dumps(value)
+    )
+
+    call = {"n": 1}
+    view = logger._layer_fields(call)
+    assert isinstance(view, LayeredFields)
+    assert view.base is logger.bound_fields and view.fields is call
+    assert view == {**bound, "n": 1} and len(view) == 1001
+
+    await logger.info("first", metadata={"n": 1})
+    await logger.info("second", metadata={"n": 2})
+    assert serialized == [{"n": 1}, {"n": 2}]
+    logs, _ = await storage.get_logs(as_entries=True)
+    assert sorted(entry.metadata["n"] for entry in logs) == [1, 2]
+    assert all(len(entry.metadata) == 1001 for entry in logs)
+    frame = json.loads(encode_frame(("pk", "rk", {"Metadata": view}))[8:])
+    assert frame[2]["Metadata"] == {**bound, "n": 1}
+
+
+@pytest.mark.asyncio
+async def test_context_propagates_to_tasks_and_threads():
+    """
+    Test that concurrent tasks keep their own context and that with_context
+    carries it into executor threads.
+    """
+    storage = InMemoryTableStorage()
+    logger = AzureLogger(storage, "svc")
+
+    async def request(number):
+        with log_context(trace_id=f"request-{number}", number=number):
+            await asyncio.sleep(0.01 * (3 - number))
+            await logger.info("handled")
+            return await asyncio.get_running_loop().run_in_executor(
+                None, with_context(get_trace_id)
+            )
+
+    assert await asyncio.gather(*(request(number) for number in range(3))) == [
+        "request-0",
+        "request-1",
+        "request-2",
+    ]
+    logs, _ = await storage.get_logs(as_entries=True)
+    assert sorted((entry.trace_id, entry.metadata["number"]) for entry in logs) == [
+        ("request-0", 0),
+        ("request-1", 1),
+        ("request-2", 2),
+    ]
+
+
+def test_handler_captures_the_logging_thread_context():
+    """
+    Test that the standard library handler records the caller's context.
+    """
+    storage = InMemoryTableStorage()
+    handler = AzureTableHandler(storage, flush_interval=0.01)
+    std_logger = logging.getLogger("context-test")
+    std_logger.addHandler(handler)
+    std_logger.propagate = False
+    try:
+        with log_context(trace_id="t1", tenant="acme"):
+            std_logger.warning("handled")
+        handler.flush()
+        entries = list(storage.service.tables["logs"].values())
+    finally:
+        std_logger.removeHandler(handler)
+        handler.close()
+
+    assert entries[0]["TraceId"] == "t1"
+    assert json.loads(entries[0]["Metadata"]) == {"tenant": "acme"}
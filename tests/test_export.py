@@ -0,0 +1,196 @@
+import gzip
+import json
+import os
+
+import pytest
+
+from masterzdran_azure_tablestorage_logging import (
+    InMemoryTableService,
+    InMemoryTableStorage,
+)
+from masterzdran_azure_tablestorage_logging.export import (
+    CHECKPOINT_FILE,
+    export_logs,
+    main,
+)
+
+
+async def fill(storage, count):
+    await storage.store_logs(
+        [
+            (
+                logger_name,
+                f"{index:04d}",
+                {
+                    "LoggerName": logger_name,
+                    "LogLevel": "ERROR" if index % 3 == 0 else "INFO",
+                    "Message": f"{logger_name} {index}",
+                    "Metadata": {"index": index},
+                },
+            )
+            for logger_name in ("api", "worker")
+            for index in range(count)
+        ]
+    )
+
+
+def read_ndjson(paths):
+    rows = []
+    for path in paths:
+        with gzip.open(path, "rt", encoding="utf-8") as file:
+            rows.extend(json.loads(line) for line in file)
+    return rows
+
+
+@pytest.mark.asyncio
+async def test_export_partitions_to_chunked_ndjson(tmp_path):
+    """
+    Test that each partition is exported in chunks of at most chunk_entries.
+    """
+    storage = InMemoryTableStorage()
+    await fill(storage, 25)
+
+    result = await export_logs(
+        storage,
+        str(tmp_path),
+        logger_names=["api", "worker"],
+        file_format="ndjson",
+        chunk_entries=10,
+        page_size=7,
+    )
+
+    names = sorted(os.listdir(tmp_path))
+    assert result["entries"] == 50
+    assert names == [CHECKPOINT_FILE] + [
+        f"{logger}-{chunk:05d}.ndjson.gz"
+        for logger in ("api", "worker")
+        for chunk in range(3)
+    ]
+    rows = read_ndjson(path for path in result["files"] if "api-" in path)
+    assert [row["Message"] for row in rows] == [f"api {index}" for index in range(25)]
+    assert json.loads(rows[4]["Metadata"]) == {"index": 4}
+    assert set(rows[0]) == {
+        "PartitionKey",
+        "RowKey",
+        "LogLevel",
+        "Timestamp",
+        "TraceId",
+        "LoggerName",
+        "Location",
+        "Message",
+        "Metadata",
+    }
+
+    again = await export_logs(
+        storage,
+        str(tmp_path),
+        logger_names=["api", "worker"],
+        file_format="ndjson",
+        chunk_entries=10,
+        page_size=7,
+    )
+    assert again["entries"] == 0
+    with pytest.raises(ValueError, match="another export"):
+        await export_logs(storage, str(tmp_path), file_format="ndjson")
+
+
+@pytest.mark.asyncio
+async def test_export_resumes_after_last_checkpoint(tmp_path):
+    """
+    Test that an interrupted export resumes after its last finished chunk.
+    """
+    service = InMemoryTableService()
+    storage = InMemoryTableStorage(service=service)
+    await fill(storage, 30)
+
+    calls = 0
+    query_page = storage._query_page
+
+    async def failing_query_page(*args):
+        nonlocal calls
+        calls += 1
+        if calls == 4:
+            raise RuntimeError("connection lost")
+        return await query_page(*args)
+
+    storage._query_page = failing_query_page
+    with pytest.raises(RuntimeError):
+        await export_logs(
+            storage,
+            str(tmp_path),
+            filters={"LogLevel": "INFO"},
+            select=["Message"],
+            file_format="ndjson",
+            chunk_entries=8,
+            page_size=5,
+        )
+    first = sorted(name for name in os.listdir(tmp_path) if name.endswith(".gz"))
+    assert first == ["table-00000.ndjson.gz"]
+
+    result = await export_logs(
+        storage,
+        str(tmp_path),
+        filters={"LogLevel": "INFO"},
+        select=["Message"],
+        file_format="ndjson",
+        chunk_entries=8,
+        page_size=5,
+    )
+    assert result["entries"] == 32
+    paths = sorted(
+        os.path.join(tmp_path, name)
+        for name in os.listdir(tmp_path)
+        if name.endswith(".gz")
+    )
+    rows = read_ndjson(paths)
+    assert len(rows) == 40
+    assert len({row["Message"] for row in rows}) == 40
+    assert set(rows[0]) == {"Message"}
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".tmp")]
+
+
+@pytest.mark.asyncio
+async def test_export_parquet(tmp_path):
+    """
+    Test the Parquet output.
+    """
+    parquet = pytest.importorskip("pyarrow.parquet")
+    storage = InMemoryTableStorage()
+    await fill(storage, 5)
+
+    result = await export_logs(storage, str(tmp_path), partition_keys=["api"])
+
+    assert result["format"] == "parquet"
+    table = parquet.read_table(result["files"][0])
+    assert table.column("Message").to_pylist() == [f"api {i}" for i in range(5)]
+
+
+def test_export_arguments(tmp_path):
+    """
+    Test argument validation.
+    """
+    with pytest.raises(SystemExit):
+        main(["--table", "logs", "--output", str(tmp_path), "--connection-string", ""])
+
+
+@pytest.mark.asyncio
+async def test_scan_page_reads_one_projected_page():
+    """
+    Test the page scan export is built on.
+    """
+    storage = InMemoryTableStorage()
+    await fill(storage, 5)
+
+    (condition,) = storage.partition_filters("api", None, None)
+    page, continuation = await storage.scan_page(
+        condition, 3, select=["Message", "Metadata"]
+    )
+    assert [row["Message"] for row in page] == ["api 0", "api 1", "api 2"]
+    assert json.loads(page[0]["Metadata"]) == {"index": 0}
+    assert "LogLevel" not in page[0]
+
+    rest, continuation = await storage.scan_page(condition, 20, continuation)
+    assert [row["Message"] for row in rest] == ["api 3", "api 4"]
+    assert continuation is None
+    with pytest.raises(ValueError, match="Page size"):
+        await storage.scan_page("", 0)
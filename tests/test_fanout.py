@@ -0,0 +1,246 @@
+import asyncio
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+import pytest
+
+from masterzdran_azure_tablestorage_logging import AzureLogger, InMemoryTableStorage
+from masterzdran_azure_tablestorage_logging.fanout import FanOutMerge
+from masterzdran_azure_tablestorage_logging.interfaces import StorageInterface
+from masterzdran_azure_tablestorage_logging.partitioning import (
+    LoggerNamePartitionStrategy,
+)
+from masterzdran_azure_tablestorage_logging.storage_base import TableStorageBase
+
+
+def make_partitions() -> List[List[Dict[str, Any]]]:
+    # Interleaved RowKeys across four partitions, one of them empty.
+    return [
+        [{"RowKey": f"{i:03d}", "Partition": 0} for i in range(0, 30, 3)],
+        [{"RowKey": f"{i:03d}", "Partition": 1} for i in range(1, 30, 3)],
+        [],
+        [{"RowKey": f"{i:03d}", "Partition": 3} for i in range(2, 12, 3)],
+    ]
+
+
+class FakeFetcher:
+    """
+    Serves pages of fixed partitions and records the fetch concurrency.
+    """
+
+    def __init__(self, partitions: List[List[Dict[str, Any]]], service_page: int = 2):
+        self.partitions = partitions
+        self.service_page = service_page
+        self.calls = 0
+        self.active = 0
+        self.max_active = 0
+
+    async def __call__(
+        self,
+        index: int,
+        after: Optional[str],
+        continuation: Optional[Dict[str, str]],
+        page_size: int,
+    ) -> Tuple[List[Dict[str, Any]], Optional[Dict[str, str]]]:
+        self.calls += 1
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        await asyncio.sleep(0)
+        self.active -= 1
+
+        entities = [
+            entity
+            for entity in self.partitions[index]
+            if after is None or entity["RowKey"] > after
+        ]
+        start = int(continuation["next"]) if continuation else 0
+        end = start + min(page_size, self.service_page)
+        next_token = {"next": str(end)} if end < len(entities) else None
+        return entities[start:end], next_token
+
+
+async def read_all(merge: FanOutMerge, page_size: int) -> List[List[str]]:
+    pages = []
+    positions = None
+    while True:
+        logs, positions = await merge.page(page_size, positions)
+        pages.append([entity["RowKey"] for entity in logs])
+        if positions is None:
+            return pages
+
+
+def test_merge_is_globally_ordered_and_resumable():
+    """
+    Test that merged pages are exact, ordered across partitions, and that the
+    positions resume every partition where it stopped.
+    """
+    partitions = make_partitions()
+    merge = FanOutMerge(FakeFetcher(partitions), len(partitions))
+
+    pages = asyncio.run(read_all(merge, 4))
+
+    expected = sorted(entity["RowKey"] for part in partitions for entity in part)
+    assert [row_key for page in pages for row_key in page] == expected
+    assert all(len(page) == 4 for page in pages[:-1])
+
+
+def test_merge_limits_concurrency():
+    """
+    Test that no more than max_concurrency partitions are fetched at once.
+    """
+    partitions = [[{"RowKey": f"{p}-{i}"} for i in range(3)] for p in range(10)]
+    fetcher = FakeFetcher(partitions)
+    merge = FanOutMerge(fetcher, len(partitions), max_concurrency=3)
+
+    logs, _ = asyncio.run(merge.page(5))
+
+    assert len(logs) == 5
+    assert fetcher.max_active == 3
+
+
+def test_merge_rejects_invalid_arguments():
+    """
+    Test the argument and position validation.
+    """
+    fetcher = FakeFetcher(make_partitions())
+    with pytest.raises(ValueError, match="At least one partition"):
+        FanOutMerge(fetcher, 0)
+    with pytest.raises(ValueError, match="Max concurrency"):
+        FanOutMerge(fetcher, 4, max_concurrency=0)
+    with pytest.raises(ValueError, match="Invalid continuation token"):
+        asyncio.run(FanOutMerge(fetcher, 4).page(5, [(None, False)]))
+
+
+class RangeTableStorage(TableStorageBase):
+    """
+    TableStorageBase serving one partition per logger, honoring RowKey gt.
+    """
+
+    descending_row_keys = False
+
+    def __init__(self, partitions: Dict[str, List[Dict[str, Any]]]):
+        self.partitions = partitions
+        self.partition_strategy = LoggerNamePartitionStrategy()
+        self.queries: List[str] = []
+
+    async def _query_page(
+        self,
+        query_filter: str,
+        page_size: int,
+        continuation: Optional[Dict[str, str]],
+        select: Optional[List[str]] = None,
+    ) -> Tuple[List[Dict[str, Any]], Optional[Dict[str, str]]]:
+        self.queries.append(query_filter)
+        partition_key = query_filter.split("'")[1]
+        after = re.search(r"RowKey gt '([^']*)'", query_filter)
+        entities = [
+            dict(entity)
+            for entity in self.partitions.get(partition_key, [])
+            if after is None or entity["RowKey"] > after.group(1)
+        ]
+        start = int(continuation["RowKey"]) if continuation else 0
+        end = start + page_size
+        next_token = {"RowKey": str(end)} if end < len(entities) else None
+        return entities[start:end], next_token
+
+    async def _create_entity(self, entity: Dict[str, Any]):
+        raise NotImplementedError
+
+    async def _submit_transaction(self, operations: List[Tuple[str, Dict[str, Any]]]):
+        raise NotImplementedError
+
+    async def _get_entity(self, partition_key: str, row_key: str) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    async def _first_page(
+        self, pages: Any
+    ) -> Tuple[List[Dict[str, Any]], Optional[Dict[str, str]]]:
+        raise NotImplementedError
+
+    async def _submit_index(self, operations: List[Tuple[str, Dict[str, Any]]]):
+        raise NotImplementedError
+
+    async def list_tables(self, prefix: str = "") -> List[str]:
+        raise NotImplementedError
+
+    async def drop_table(self):
+        raise NotImplementedError
+
+
+def test_get_logs_merged():
+    """
+    Test that get_logs_merged merges loggers and resumes from its token.
+    """
+    storage = RangeTableStorage(
+        {
+            "api": [{"RowKey": f"{i:03d}", "LoggerName": "api"} for i in (1, 4, 5)],
+            "worker": [{"RowKey": f"{i:03d}", "LoggerName": "worker"} for i in (2, 3)],
+        }
+    )
+
+    async def run():
+        first, token = await storage.get_logs_merged(["api", "worker"], page_size=3)
+        second, last = await storage.get_logs_merged(
+            ["api", "worker"], page_size=3, continuation_token=token
+        )
+        return first, token, second, last
+
+    first, token, second, last = asyncio.run(run())
+
+    assert [log["RowKey"] for log in first] == ["001", "002", "003"]
+    assert [log["RowKey"] for log in second] == ["004", "005"]
+    assert token is not None and last is None
+    assert any("RowKey gt '001'" in query for query in storage.queries)
+
+    with pytest.raises(ValueError, match="Invalid continuation token"):
+        asyncio.run(storage.get_logs_merged(["api"], continuation_token=token))
+
+
+class ForwardingStorage(StorageInterface):
+    """
+    A custom backend implementing only the abstract methods.
+    """
+
+    def __init__(self, storage: StorageInterface):
+        self.storage = storage
+
+    async def store_log(self, partition_key: str, row_key: str, data: dict):
+        await self.storage.store_log(partition_key, row_key, data)
+
+    async def get_logs(self, *args, **kwargs):
+        return await self.storage.get_logs(*args, **kwargs)
+
+    async def get_log_entry(self, partition_key: str, row_key: str):
+        return await self.storage.get_log_entry(partition_key, row_key)
+
+
+@pytest.mark.asyncio
+async def test_default_get_logs_merged_matches_the_table_storage():
+    """
+    Test that the StorageInterface default merges pages like TableStorageBase.
+    """
+    table = InMemoryTableStorage()
+    backend = ForwardingStorage(table)
+    for number in range(12):
+        logger = AzureLogger(backend, ["api", "worker", "billing"][number % 3])
+        await logger.info(f"message {number}")
+
+    async def read_all(storage):
+        pages, token = [], None
+        while True:
+            logs, token = await storage.get_logs_merged(
+                ["api", "worker"],
+                page_size=3,
+                continuation_token=token,
+                filters={"LogLevel": "INFO"},
+                as_entries=True,
+            )
+            pages.append([log.message for log in logs])
+            if token is None:
+                return pages
+
+    pages = await read_all(backend)
+    assert pages == await read_all(table)
+    assert sorted(sum(pages, [])) == sorted(
+        f"message {number}" for number in range(12) if number % 3 != 2
+    )
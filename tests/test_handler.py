@@ -0,0 +1,209 @@
+import logging
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+import pytest
+
+from masterzdran_azure_tablestorage_logging import (
+    AzureTableHandler,
+    BatchingStorage,
+    InMemoryTableStorage,
+    log_context,
+)
+from masterzdran_azure_tablestorage_logging.handler import record_to_entry
+from masterzdran_azure_tablestorage_logging.interfaces import StorageInterface
+
+
+class RecordingStorage(StorageInterface):
+    """
+    StorageInterface recording the batches written by the listener thread.
+    """
+
+    def __init__(self):
+        self.batches: List[List[Tuple[str, str, Dict[str, Any]]]] = []
+        self.closed = False
+
+    async def store_log(self, partition_key: str, row_key: str, data: dict):
+        await self.store_logs([(partition_key, row_key, data)])
+
+    async def store_logs(self, entries):
+        self.batches.append(list(entries))
+
+    async def aclose(self):
+        self.closed = True
+
+    async def get_logs(self, *args, **kwargs):
+        return [], None
+
+    async def get_log_entry(self, partition_key: str, row_key: str):
+        return None
+
+
+@pytest.fixture
+def handler_logger():
+    """
+    Fixture for a stdlib logger wired to an AzureTableHandler.
+    """
+    storage = RecordingStorage()
+    handler = AzureTableHandler(
+        storage, max_batch_size=10, flush_interval=0.01, default_trace_id="default"
+    )
+    logger = logging.getLogger("test_handler")
+    logger.setLevel(logging.DEBUG)
+    logger.propagate = False
+    logger.addHandler(handler)
+    yield logger, handler, storage
+    logger.removeHandler(handler)
+    handler.close()
+
+
+def test_handler_maps_log_records(handler_logger):
+    """
+    Test that LogRecord fields map onto the entity schema.
+    """
+    logger, handler, storage = handler_logger
+
+    logger.warning(
+        "user %s failed",
+        "alice",
+        extra={"trace_id": "t-1", "attempt": 3, "obj": object},
+    )
+    handler.flush()
+
+    ((partition_key, row_key, data),) = [e for batch in storage.batches for e in batch]
+    assert partition_key == "test_handler"
+    assert len(row_key) == 27
+    assert data["LogLevel"] == "WARNING"
+    assert data["Message"] == "user alice failed"
+    assert data["TraceId"] == "t-1"
+    assert data["LoggerName"] == "test_handler"
+    assert data["Location"].endswith(
+        "test_handler.py:" + data["Location"].split(":")[-1]
+    )
+    assert data["Metadata"] == {"attempt": 3, "obj": str(object)}
+
+
+def test_handler_batches_and_closes(handler_logger):
+    """
+    Test that records are written in batches and close() drains the queue.
+    """
+    logger, handler, storage = handler_logger
+
+    for i in range(25):
+        logger.info("message %d", i)
+    handler.close()
+
+    entries = [entry for batch in storage.batches for entry in batch]
+    assert [data["Message"] for _, _, data in entries] == [
+        f"message {i}" for i in range(25)
+    ]
+    assert all(len(batch) <= 10 for batch in storage.batches)
+    assert entries[0][2]["TraceId"] == "default"
+    assert storage.closed
+
+
+def test_record_to_entry_maps_extras_and_location():
+    """
+    Test that extras become the metadata, that standard record attributes are
+    left out, and that the location is pathname:lineno.
+    """
+    record = logging.LogRecord(
+        "app.db", logging.ERROR, "/srv/app/db.py", 42, "query %s failed", ("q1",), None
+    )
+    record.__dict__.update(
+        {"trace_id": "t-2", "table": "users", "rows": [1, 2], "conn": object}
+    )
+
+    partition_key, row_key, data = record_to_entry(record, InMemoryTableStorage())
+
+    assert partition_key == "app.db"
+    assert len(row_key) == 27
+    assert data["Location"] == "/srv/app/db.py:42"
+    assert data["LoggerName"] == "app.db"
+    assert data["Message"] == "query q1 failed"
+    assert data["TraceId"] == "t-2"
+    assert data["Metadata"] == {"table": "users", "rows": [1, 2], "conn": str(object)}
+
+
+def test_handler_captures_the_log_context(handler_logger):
+    """
+    Test that the log_context of the logging thread reaches the metadata, and
+    that extras take precedence over it.
+    """
+    logger, handler, storage = handler_logger
+
+    with log_context(trace_id="ctx", user="bob", region="eu"):
+        logger.info("hello", extra={"region": "us"})
+    handler.flush()
+
+    ((_, _, data),) = [e for batch in storage.batches for e in batch]
+    assert data["TraceId"] == "ctx"
+    assert data["Metadata"] == {"user": "bob", "region": "us"}
+
+
+class BlockingStorage(RecordingStorage):
+    """
+    RecordingStorage whose writes block the listener thread until released.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.writing = threading.Event()
+        self.release = threading.Event()
+
+    async def store_logs(self, entries):
+        self.writing.set()
+        self.release.wait(5)
+        await super().store_logs(entries)
+
+
+def test_handler_drops_records_when_the_queue_is_full():
+    """
+    Test that records arriving while the queue is full are dropped and counted.
+    """
+    storage = BlockingStorage()
+    handler = AzureTableHandler(storage, max_queue_size=1, max_batch_size=1)
+    logger = logging.getLogger("test_handler_drops")
+    logger.propagate = False
+    logger.addHandler(handler)
+    try:
+        logger.warning("message 0")
+        assert storage.writing.wait(5)
+        for i in range(1, 4):
+            logger.warning("message %d", i)
+        assert handler.dropped_records == 2
+
+        storage.release.set()
+        handler.flush()
+        assert [
+            data["Message"] for batch in storage.batches for _, _, data in batch
+        ] == [
+            "message 0",
+            "message 1",
+        ]
+    finally:
+        storage.release.set()
+        logger.removeHandler(handler)
+        handler.close()
+
+
+def test_handler_flush_flushes_a_buffering_storage():
+    """
+    Test that flush() writes the records a buffering storage holds back.
+    """
+    inner = RecordingStorage()
+    handler = AzureTableHandler(BatchingStorage(inner, flush_interval=60))
+    logger = logging.getLogger("test_handler_flush")
+    logger.propagate = False
+    logger.addHandler(handler)
+    try:
+        for i in range(3):
+            logger.warning("message %d", i)
+        handler.flush()
+        assert [data["Message"] for batch in inner.batches for _, _, data in batch] == [
+            f"message {i}" for i in range(3)
+        ]
+    finally:
+        logger.removeHandler(handler)
+        handler.close()
+    assert inner.closed
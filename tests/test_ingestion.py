@@ -0,0 +1,103 @@
+import asyncio
+
+import pytest
+
+from masterzdran_azure_tablestorage_logging.ingestion import (
+    IngestionQueue,
+    OverflowPolicy,
+)
+
+
+def _entry(row_key: str, level: str = "INFO", message: str = "m"):
+    return ("pk", row_key, {"LogLevel": level, "Message": message})
+
+
+async def _fill(queue: IngestionQueue, *entries):
+    return [await queue.put(entry) for entry in entries]
+
+
+@pytest.mark.asyncio
+async def test_drop_newest_and_drop_oldest():
+    """
+    Test that the dropping policies keep the expected entries and count drops.
+    """
+    newest = IngestionQueue(max_entries=2, policy=OverflowPolicy.DROP_NEWEST)
+    oldest = IngestionQueue(max_entries=2, policy=OverflowPolicy.DROP_OLDEST)
+
+    assert await _fill(newest, _entry("1"), _entry("2"), _entry("3")) == [
+        True,
+        True,
+        False,
+    ]
+    await _fill(oldest, _entry("1"), _entry("2"), _entry("3"))
+
+    assert [rk for _, rk, _ in newest.get_batch(10)] == ["1", "2"]
+    assert [rk for _, rk, _ in oldest.get_batch(10)] == ["2", "3"]
+    assert newest.stats()["dropped_entries"] == oldest.stats()["dropped_entries"] == 1
+    assert newest.stats()["queued_entries"] == 2
+
+
+@pytest.mark.asyncio
+async def test_drop_below_level_keeps_important_entries():
+    """
+    Test that DROP_BELOW_LEVEL sacrifices low-level entries first.
+    """
+    queue = IngestionQueue(
+        max_entries=2,
+        policy=OverflowPolicy.DROP_BELOW_LEVEL,
+        protected_level="WARNING",
+    )
+
+    await _fill(queue, _entry("1", "ERROR"), _entry("2", "DEBUG"))
+    assert not await queue.put(_entry("3", "INFO"))
+    assert await queue.put(_entry("4", "CRITICAL"))
+
+    assert [rk for _, rk, _ in queue.get_batch(10)] == ["1", "4"]
+    assert queue.dropped_entries == 2
+
+
+@pytest.mark.asyncio
+async def test_max_bytes_limits_queue():
+    """
+    Test that the byte budget bounds the queue independently of the entry count.
+    """
+    queue = IngestionQueue(
+        max_entries=100, max_bytes=30, policy=OverflowPolicy.DROP_NEWEST
+    )
+
+    results = await _fill(
+        queue, _entry("1", message="x" * 10), _entry("2", message="x" * 10)
+    )
+    assert results == [True, True]
+    assert not await queue.put(_entry("3", message="x" * 10))
+    assert queue.queued_bytes == 28
+
+
+@pytest.mark.asyncio
+async def test_block_waits_for_room_and_times_out():
+    """
+    Test that BLOCK waits until entries are taken, or drops after block_timeout.
+    """
+    queue = IngestionQueue(max_entries=1, policy=OverflowPolicy.BLOCK)
+    await queue.put(_entry("1"))
+
+    blocked = asyncio.ensure_future(queue.put(_entry("2")))
+    await asyncio.sleep(0.01)
+    assert not blocked.done()
+    queue.get_batch(1)
+    assert await blocked
+
+    timed = IngestionQueue(
+        max_entries=1, policy=OverflowPolicy.BLOCK, block_timeout=0.01
+    )
+    await timed.put(_entry("1"))
+    assert not await timed.put(_entry("2"))
+    assert timed.dropped_entries == 1
+
+
+def test_invalid_policy():
+    """
+    Test IngestionQueue argument validation.
+    """
+    with pytest.raises(ValueError, match="Invalid overflow policy"):
+        IngestionQueue(policy="spill")
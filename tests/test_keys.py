@@ -0,0 +1,93 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from masterzdran_azure_tablestorage_logging import (
+    AzureLogger,
+    LoggerNamePartitionStrategy,
+)
+from masterzdran_azure_tablestorage_logging.keys import (
+    TICKS_WIDTH,
+    RowKeyGenerator,
+    row_key_for,
+    row_key_range,
+    ticks_to_datetime,
+    ticks_to_row_key,
+    to_ticks,
+)
+
+
+def test_generated_keys_are_unique_and_monotonic():
+    """
+    Test that keys generated in a burst never collide and keep their order.
+    """
+    ascending = RowKeyGenerator(descending=False, node_id="node")
+    descending = RowKeyGenerator(descending=True, node_id="node")
+
+    ascending_keys = [ascending.next_key()[1] for _ in range(10000)]
+    descending_keys = [descending.next_key()[1] for _ in range(10000)]
+
+    assert len(set(ascending_keys)) == 10000
+    assert ascending_keys == sorted(ascending_keys)
+    assert descending_keys == sorted(descending_keys, reverse=True)
+    assert all(key.endswith("node") for key in ascending_keys)
+
+
+def test_generated_key_matches_its_ticks():
+    """
+    Test that the key prefix encodes the returned ticks.
+    """
+    generator = RowKeyGenerator(descending=True, node_id="n")
+
+    ticks, key = generator.next_key()
+
+    assert key == ticks_to_row_key(ticks, descending=True) + "n"
+    assert to_ticks(ticks_to_datetime(ticks)) == ticks - ticks % 10
+    lower, upper = row_key_range(
+        ticks_to_datetime(ticks), ticks_to_datetime(ticks), descending=True
+    )
+    assert lower <= key < upper
+
+
+def test_row_key_range_bounds_suffixed_keys():
+    """
+    Test that RowKey ranges include suffixed keys at both ends of the range.
+    """
+    start = datetime(2026, 10, 17, 12)
+    end = datetime(2026, 10, 17, 13)
+    lower, upper = row_key_range(start, end, descending=True)
+
+    assert lower <= row_key_for(end) + "ffffffff" < upper
+    assert lower <= row_key_for(start) + "ffffffff" < upper
+    assert not lower <= row_key_for(datetime(2026, 10, 17, 13, 0, 1)) < upper
+    assert len(lower) == len(upper) == TICKS_WIDTH
+
+
+def test_invalid_node_id():
+    """
+    Test that node ids with characters not allowed in RowKeys are rejected.
+    """
+    with pytest.raises(ValueError, match="Invalid node id"):
+        RowKeyGenerator(node_id="a/b")
+
+
+@pytest.mark.asyncio
+async def test_concurrent_log_calls_get_distinct_row_keys():
+    """
+    Test that coroutines logging at the same time get distinct RowKeys.
+    """
+    row_keys = []
+
+    class CollectingStorage:
+        descending_row_keys = True
+        partition_strategy = LoggerNamePartitionStrategy()
+
+        async def store_log(self, partition_key, row_key, data):
+            row_keys.append(row_key)
+
+    logger = AzureLogger(storage=CollectingStorage(), logger_name="burst")
+
+    await asyncio.gather(*(logger.info(f"m{i}") for i in range(500)))
+
+    assert len(set(row_keys)) == 500
@@ -0,0 +1,152 @@
+import asyncio
+
+import pytest
+from azure.core.exceptions import HttpResponseError
+
+from masterzdran_azure_tablestorage_logging import (
+    AzureLogger,
+    Field,
+    InMemoryTableService,
+    InMemoryTableStorage,
+    Resilience,
+    RetryPolicy,
+)
+from masterzdran_azure_tablestorage_logging.benchmark import percentile, run_benchmark
+from masterzdran_azure_tablestorage_logging.memory import compile_filter
+from masterzdran_azure_tablestorage_logging.query import compile_filters
+
+# Smoke benchmark thresholds, about 20 times below a typical run so that slow
+# CI machines pass.
+MIN_ENTRIES_PER_SECOND = 2000
+MAX_P99_LATENCY_MS = 50
+
+
+def test_compile_filter_matches_query_builder_output():
+    """
+    Test that filters produced by the query builder evaluate like the service.
+    """
+    entity = {
+        "PartitionKey": "svc",
+        "RowKey": "0042",
+        "LogLevel": "ERROR",
+        "Message": "it's down",
+        "Count": 3,
+        "Flag": True,
+    }
+    predicate = (
+        Field("LogLevel").in_(["ERROR", "CRITICAL"])
+        & Field("RowKey").startswith("00")
+        & ~Field("Message").eq("ok")
+    )
+
+    assert compile_filter(compile_filters(predicate))(entity)
+    assert compile_filter("Message eq 'it''s down' and Count ge 3")(entity)
+    assert compile_filter("Flag eq true and not (Count gt 5L)")(entity)
+    assert not compile_filter("Flag eq 1")(entity)
+    assert not compile_filter("TraceId ne 'x'")(entity)
+    assert not compile_filter("(LogLevel eq 'INFO') or (Count lt 2.5)")(entity)
+
+    with pytest.raises(ValueError, match="Unsupported"):
+        compile_filter("LogLevel eq 'x' ;")
+    with pytest.raises(ValueError, match="Unsupported operator"):
+        compile_filter("LogLevel has 'x'")
+
+
+@pytest.mark.asyncio
+async def test_in_memory_storage_round_trip():
+    """
+    Test logging, paging, point reads and trace lookups on the in-memory storage.
+    """
+    service = InMemoryTableService()
+    storage = InMemoryTableStorage(service=service, trace_index=True)
+    logger = AzureLogger(storage, "svc", default_trace_id="t1")
+    for index in range(5):
+        await logger.info("message %d", args=(index,), metadata={"index": index})
+
+    first, token = await storage.get_logs(page_size=3, logger_name="svc")
+    second, last = await storage.get_logs(
+        page_size=3, logger_name="svc", continuation_token=token
+    )
+    messages = [log["Message"] for log in first + second]
+    entry = await storage.get_log_entry(first[0]["PartitionKey"], first[0]["RowKey"])
+    trace = await storage.get_logs_by_trace("t1", as_entries=True)
+    await storage.aclose()
+
+    assert messages == [f"message {index}" for index in range(4, -1, -1)]
+    assert last is None
+    assert entry["Metadata"] == '{"index":4}'
+    assert [entry.metadata["index"] for entry in trace] == [4, 3, 2, 1, 0]
+    assert set(service.tables) == {"logs", "logsTraceIndex"}
+    assert service.written_entities == 10
+
+
+@pytest.mark.asyncio
+async def test_in_memory_transactions_and_failure_injection():
+    """
+    Test transaction limits and that injected throttling is retried.
+    """
+    service = InMemoryTableService(throttle_rate=0.5, seed=7)
+    storage = InMemoryTableStorage(
+        service=service,
+        resilience=Resilience(retry=RetryPolicy(max_attempts=10, base_delay=0.001)),
+    )
+    entries = [
+        ("svc", f"{index:03d}", {"LogLevel": "INFO", "Message": "m"})
+        for index in range(150)
+    ]
+
+    await storage.store_logs(entries)
+
+    assert service.written_entities == 150
+    assert service.throttled_requests > 0
+    assert (await storage.get_logs(page_size=200))[0][0]["RowKey"] == "000"
+
+    service.throttle_rate = 0.0
+    client = service.get_table_client("logs")
+    with pytest.raises(ValueError, match="single partition"):
+        await client.submit_transaction(
+            [
+                ("create", {"PartitionKey": "a", "RowKey": "1"}),
+                ("create", {"PartitionKey": "b", "RowKey": "1"}),
+            ]
+        )
+    service.throttle_rate = 1.0
+    with pytest.raises(HttpResponseError):
+        await client.get_entity("svc", "000")
+
+
+def test_percentile():
+    """
+    Test nearest-rank percentiles.
+    """
+    values = [float(value) for value in range(1, 101)]
+    assert percentile(values, 0.5) == 50.0
+    assert percentile(values, 0.99) == 99.0
+    assert percentile([], 0.5) == 0.0
+
+
+def test_benchmark_smoke_throughput():
+    """
+    Test that a short benchmark run stays far above a conservative throughput
+    floor, so large regressions in the logging pipeline fail the suite.
+    """
+    result = asyncio.run(run_benchmark(entries=2000, trace_memory=False))
+
+    assert result["entries_per_second"] > MIN_ENTRIES_PER_SECOND
+    assert result["p99_latency_ms"] < MAX_P99_LATENCY_MS
+
+
+def test_benchmark_counts_requests_per_entry():
+    """
+    Test a small benchmark run: batching keeps requests per entry low.
+    """
+    batched = asyncio.run(run_benchmark(entries=500, concurrency=4))
+    unbatched = asyncio.run(
+        run_benchmark(entries=100, concurrency=2, batching=False, trace_memory=False)
+    )
+
+    assert batched["entries"] == 500
+    assert batched["requests_per_entry"] < 0.1
+    assert batched["peak_memory_bytes"] > 0
+    assert batched["p99_latency_ms"] >= batched["p50_latency_ms"]
+    assert unbatched["requests"] == 101
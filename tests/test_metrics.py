@@ -0,0 +1,112 @@
+import pytest
+
+from masterzdran_azure_tablestorage_logging import (
+    AzureLogger,
+    BatchingStorage,
+    InMemoryTableService,
+    InMemoryTableStorage,
+    Metrics,
+    Resilience,
+    RetryPolicy,
+)
+from masterzdran_azure_tablestorage_logging.ingestion import (
+    IngestionQueue,
+    OverflowPolicy,
+)
+from masterzdran_azure_tablestorage_logging.metrics import entity_size
+
+
+def test_metrics_registry_and_prometheus_text(tmp_path):
+    """
+    Test counters, gauges, histograms, sinks and the Prometheus rendering.
+    """
+    samples = []
+    metrics = Metrics(time_buckets=(0.1, 1.0), size_buckets=(10, 100))
+    metrics.add_sink(lambda *sample: samples.append(sample))
+
+    metrics.increment("errors_total", operation="query")
+    metrics.increment("errors_total", 2, operation="query")
+    metrics.set_gauge("queue_depth", 7)
+    metrics.observe("request_seconds", 0.05, operation="query")
+    metrics.observe("request_seconds", 0.5, operation="query")
+    metrics.observe("batch_entries", 50)
+
+    stats = metrics.stats()
+    assert stats["counters"]["errors_total"] == {"operation=query": 3}
+    assert stats["gauges"]["queue_depth"] == {"": 7}
+    assert stats["histograms"]["request_seconds"]["operation=query"] == {
+        "count": 2,
+        "sum": 0.55,
+        "buckets": {0.1: 1, 1.0: 2},
+    }
+    assert stats["histograms"]["batch_entries"][""]["buckets"] == {10: 0, 100: 1}
+    assert samples[0] == ("counter", "errors_total", 1, {"operation": "query"})
+    assert len(samples) == 6
+
+    text = metrics.render_prometheus(prefix="app")
+    assert "# TYPE app_errors_total counter" in text
+    assert 'app_errors_total{operation="query"} 3' in text
+    assert 'app_request_seconds_bucket{operation="query",le="0.1"} 1' in text
+    assert 'app_request_seconds_bucket{operation="query",le="+Inf"} 2' in text
+    assert 'app_batch_entries_bucket{le="100"} 1' in text
+    assert "app_queue_depth 7" in text
+
+    path = tmp_path / "logging.prom"
+    metrics.write_prometheus(str(path), prefix="app")
+    assert path.read_text() == text
+
+
+def test_entity_size():
+    """
+    Test the payload size estimate.
+    """
+    assert entity_size({"Message": "abc", "Metadata": b"12", "Count": 1}) == (
+        7 + 3 + 8 + 2 + 5 + 8
+    )
+    assert entity_size({"M": "é"}) == 1 + 2
+
+
+@pytest.mark.asyncio
+async def test_pipeline_records_metrics():
+    """
+    Test that the logger, the batching storage and the table storage record
+    their metrics into a shared registry.
+    """
+    metrics = Metrics()
+    service = InMemoryTableService(throttle_rate=0.3, seed=3)
+    table = InMemoryTableStorage(
+        service=service,
+        metrics=metrics,
+        resilience=Resilience(retry=RetryPolicy(max_attempts=20, base_delay=0.001)),
+    )
+    storage = BatchingStorage(
+        table,
+        max_batch_size=10,
+        queue=IngestionQueue(max_entries=15, policy=OverflowPolicy.DROP_NEWEST),
+        metrics=metrics,
+    )
+    logger = AzureLogger(storage, "svc", metrics=metrics)
+
+    for index in range(20):
+        await logger.info("message %d", args=(index,))
+    await logger.aclose()
+
+    stats = metrics.stats()
+    counters = stats["counters"]
+    histograms = stats["histograms"]
+    assert counters["log_entries_total"] == {"level=INFO": 20}
+    assert histograms["enqueue_seconds"][""]["count"] == 20
+    assert counters["dropped_entries_total"][""] == 20 - service.written_entities
+    assert counters["entities_written_total"][""] == service.written_entities
+    assert counters["retries_total"][""] == service.throttled_requests
+    assert counters["errors_total"] == {
+        "error=HttpResponseError,operation=submit_transaction": (
+            service.throttled_requests
+        )
+    }
+    assert histograms["request_seconds"]["operation=submit_transaction"]["count"] > 0
+    assert histograms["serialize_seconds"][""]["count"] == service.written_entities
+    assert histograms["entity_bytes"][""]["sum"] > 0
+    assert histograms["batch_entries"][""]["sum"] == service.written_entities
+    assert histograms["transaction_entities"][""]["sum"] == service.written_entities
+    assert "queue_depth" in stats["gauges"]
@@ -0,0 +1,186 @@
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import pytest
+
+from masterzdran_azure_tablestorage_logging import AzureLogger, InMemoryTableStorage
+from masterzdran_azure_tablestorage_logging.partitioning import (
+    LoggerNamePartitionStrategy,
+    TimeBucketPartitionStrategy,
+)
+from masterzdran_azure_tablestorage_logging.storage_base import TableStorageBase
+
+
+class PagedTableStorage(TableStorageBase):
+    """
+    TableStorageBase serving fixed pages per partition filter.
+    """
+
+    def __init__(self, partitions: Dict[str, List[Dict[str, Any]]], strategy):
+        self.partitions = partitions
+        self.partition_strategy = strategy
+        self.queries: List[str] = []
+        self.selects: List[Optional[List[str]]] = []
+
+    async def _query_page(
+        self,
+        query_filter: str,
+        page_size: int,
+        continuation: Optional[Dict[str, str]],
+        select: Optional[List[str]] = None,
+    ) -> Tuple[List[Dict[str, Any]], Optional[Dict[str, str]]]:
+        self.queries.append(query_filter)
+        self.selects.append(select)
+        partition_key = query_filter.split("'")[1]
+        entities = self.partitions.get(partition_key, [])
+        start = int(continuation["RowKey"]) if continuation else 0
+        end = start + page_size
+        next_token = {"RowKey": str(end)} if end < len(entities) else None
+        return entities[start:end], next_token
+
+    async def _create_entity(self, entity: Dict[str, Any]):
+        raise NotImplementedError
+
+    async def _submit_transaction(self, operations: List[Tuple[str, Dict[str, Any]]]):
+        raise NotImplementedError
+
+    async def _get_entity(self, partition_key: str, row_key: str) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    async def _first_page(
+        self, pages: Any
+    ) -> Tuple[List[Dict[str, Any]], Optional[Dict[str, str]]]:
+        raise NotImplementedError
+
+    async def _submit_index(self, operations: List[Tuple[str, Dict[str, Any]]]):
+        raise NotImplementedError
+
+    async def list_tables(self, prefix: str = "") -> List[str]:
+        raise NotImplementedError
+
+    async def drop_table(self):
+        raise NotImplementedError
+
+
+def test_logger_name_strategy():
+    """
+    Test that the default strategy keeps one partition per logger.
+    """
+    strategy = LoggerNamePartitionStrategy()
+
+    assert strategy.partition_key("svc", datetime(2026, 10, 17), "rk") == "svc"
+    assert strategy.partition_keys_for_range("svc") == ["svc"]
+
+
+def test_time_bucket_strategy_keys():
+    """
+    Test hour and day buckets, with and without shards.
+    """
+    hourly = TimeBucketPartitionStrategy(bucket="hour")
+    daily = TimeBucketPartitionStrategy(bucket="day", shards=4)
+    timestamp = datetime(2026, 10, 17, 15, 42, 7)
+
+    assert hourly.partition_key("svc", timestamp, "rk") == "svc-2026101715"
+    assert hourly.partition_key("svc", timestamp.replace(hour=16), "rk") == (
+        "svc-2026101716"
+    )
+    shard_keys = {daily.partition_key("svc", timestamp, f"rk{i}") for i in range(50)}
+    assert shard_keys == {f"svc-20261017-0{shard}" for shard in range(4)}
+
+    assert hourly.partition_keys_for_range(
+        "svc", datetime(2026, 10, 17, 14, 30), datetime(2026, 10, 17, 16, 0)
+    ) == ["svc-2026101714", "svc-2026101715", "svc-2026101716"]
+    assert hourly.partition_keys_for_range("svc") is None
+
+    with pytest.raises(ValueError, match="Invalid bucket"):
+        TimeBucketPartitionStrategy(bucket="week")
+
+
+@pytest.mark.asyncio
+async def test_get_logs_reads_only_overlapping_partitions():
+    """
+    Test that a time-range query walks the overlapping buckets, newest first.
+    """
+    storage = PagedTableStorage(
+        {
+            "svc-2026101715": [{"RowKey": "3"}],
+            "svc-2026101716": [{"RowKey": "1"}, {"RowKey": "2"}],
+        },
+        TimeBucketPartitionStrategy(bucket="hour"),
+    )
+    query = {
+        "logger_name": "svc",
+        "start_time": datetime(2026, 10, 17, 15, 0),
+        "end_time": datetime(2026, 10, 17, 16, 59),
+    }
+
+    logs, token = await storage.get_logs(page_size=2, **query)
+    assert [log["RowKey"] for log in logs] == ["1", "2"]
+    assert token is not None
+
+    logs, token = await storage.get_logs(page_size=2, continuation_token=token, **query)
+    assert [log["RowKey"] for log in logs] == ["3"]
+    assert token is None
+
+    assert all("RowKey ge '" in query for query in storage.queries)
+    assert {query.split("'")[1] for query in storage.queries} == {
+        "svc-2026101715",
+        "svc-2026101716",
+    }
+
+
+@pytest.mark.asyncio
+async def test_logger_scan_skips_loggers_sharing_its_prefix():
+    """
+    Test that a query without a time range only scans the buckets of its own
+    logger, not those of a logger whose name extends it.
+    """
+    strategy = TimeBucketPartitionStrategy(bucket="day", shards=2)
+    storage = InMemoryTableStorage(partition_strategy=strategy)
+    await AzureLogger(storage, "api").info("api msg")
+    await AzureLogger(storage, "api-gateway").info("gateway msg")
+
+    logs, _ = await storage.get_logs(logger_name="api")
+    assert [log["Message"] for log in logs] == ["api msg"]
+    logs, _ = await storage.get_logs(logger_name="api-gateway")
+    assert [log["Message"] for log in logs] == ["gateway msg"]
+    assert strategy.partition_key_range("api") == ("api-0", "api-:")
+
+
+@pytest.mark.asyncio
+async def test_iter_logs_streams_partitions_page_by_page():
+    """
+    Test that iter_logs walks every partition in pages, projects the requested
+    columns and stops fetching when the caller stops early.
+    """
+    storage = PagedTableStorage(
+        {
+            "svc-2026101715": [{"RowKey": "3"}],
+            "svc-2026101716": [{"RowKey": "1"}, {"RowKey": "2"}],
+        },
+        TimeBucketPartitionStrategy(bucket="hour"),
+    )
+    query = {
+        "logger_name": "svc",
+        "start_time": datetime(2026, 10, 17, 15, 0),
+        "end_time": datetime(2026, 10, 17, 16, 59),
+    }
+
+    logs = [log async for log in storage.iter_logs(page_size=1, **query)]
+    assert [log["RowKey"] for log in logs] == ["1", "2", "3"]
+    assert len(storage.queries) == 3
+
+    storage.queries.clear()
+    logs = [
+        log
+        async for log in storage.iter_logs(
+            page_size=1, limit=1, prefetch=False, select=["RowKey", "Metadata"], **query
+        )
+    ]
+    assert [log["RowKey"] for log in logs] == ["1"]
+    assert len(storage.queries) == 1
+    assert storage.selects[-1][:3] == ["RowKey", "Metadata", "MetadataEncoding"]
+
+    with pytest.raises(ValueError, match="Limit must be positive"):
+        async for _ in storage.iter_logs(limit=0):
+            pass
@@ -0,0 +1,74 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from masterzdran_azure_tablestorage_logging.keys import row_key_range
+from masterzdran_azure_tablestorage_logging.query import (
+    Field,
+    TimeRange,
+    compile_filters,
+    literal,
+)
+
+
+def test_literals_are_typed_and_escaped():
+    """
+    Test OData literal formatting, including quote escaping and booleans.
+    """
+    assert literal("O'Brien") == "'O''Brien'"
+    assert literal(True) == "true"
+    assert literal(42) == "42"
+    assert literal(2**40) == f"{2**40}L"
+    assert literal(1.5) == "1.5"
+    assert (
+        literal(datetime(2026, 10, 17, 15, 0, tzinfo=timezone.utc))
+        == "datetime'2026-10-17T15:00:00Z'"
+    )
+    with pytest.raises(ValueError, match="Invalid filter value type"):
+        literal(object())
+    for value in (float("nan"), float("inf"), float("-inf")):
+        with pytest.raises(ValueError, match="finite"):
+            literal(value)
+
+
+def test_dictionary_filters():
+    """
+    Test that dictionary filters compile to escaped equality and IN predicates.
+    """
+    assert (
+        compile_filters({"LoggerName": "it's", "Flag": False})
+        == "LoggerName eq 'it''s' and Flag eq false"
+    )
+    assert compile_filters({"LogLevel": ["ERROR", "CRITICAL"]}) == (
+        "((LogLevel eq 'ERROR') or (LogLevel eq 'CRITICAL'))"
+    )
+    assert compile_filters(None) is None
+    with pytest.raises(ValueError, match="Invalid field name"):
+        compile_filters({"LogLevel eq 'x' or 1": 1})
+
+
+def test_predicates_compile_to_odata():
+    """
+    Test composing predicates with &, | and ~, prefix ranges and time ranges.
+    """
+    predicate = Field("LogLevel").in_(["ERROR", "CRITICAL"]) & ~Field(
+        "TraceId"
+    ).startswith("ab")
+    assert predicate.compile() == (
+        "((LogLevel eq 'ERROR') or (LogLevel eq 'CRITICAL')) and "
+        "not (TraceId ge 'ab' and TraceId lt 'ac')"
+    )
+    assert compile_filters(Field("A").eq(1) | Field("B").eq(2)) == (
+        "((A eq 1) or (B eq 2))"
+    )
+
+    start, end = datetime(2026, 10, 17, 15), datetime(2026, 10, 17, 16)
+    time_range = Field("Timestamp").between(start, end)
+    lower, upper = row_key_range(start, end, True)
+    assert isinstance(time_range, TimeRange)
+    assert time_range.compile() == f"RowKey ge '{lower}' and RowKey lt '{upper}'"
+    assert Field("Message").between("a", "b").compile() == (
+        "Message ge 'a' and Message le 'b'"
+    )
+    with pytest.raises(ValueError, match="Start time must not be after end time"):
+        Field("Timestamp").between(end, start)
@@ -0,0 +1,241 @@
+import asyncio
+from typing import Any, Dict, List, Optional, Tuple
+from unittest.mock import MagicMock, patch
+
+import pytest
+from azure.core.exceptions import (
+    HttpResponseError,
+    ResourceExistsError,
+    ServiceRequestError,
+)
+from azure.data.tables import TableClient
+
+from masterzdran_azure_tablestorage_logging import DiskSpool, SpoolingStorage
+from masterzdran_azure_tablestorage_logging.exceptions import (
+    CircuitOpenError,
+    StorageError,
+)
+from masterzdran_azure_tablestorage_logging.interfaces import StorageInterface
+from masterzdran_azure_tablestorage_logging.resilience import (
+    CircuitBreaker,
+    Resilience,
+    RetryPolicy,
+    is_retryable,
+)
+from masterzdran_azure_tablestorage_logging.storage import AzureTableStorage
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class ListStorage(StorageInterface):
+    """
+    In-memory StorageInterface collecting the entries it receives.
+    """
+
+    def __init__(self):
+        self.entries: List[Tuple[str, str, Dict[str, Any]]] = []
+
+    async def store_log(self, partition_key: str, row_key: str, data: dict) -> None:
+        self.entries.append((partition_key, row_key, data))
+
+    async def get_logs(
+        self,
+        page_size: int = 50,
+        continuation_token: Optional[str] = None,
+        order_by: str = "Timestamp",
+        ascending: bool = False,
+        filters: Optional[Dict[str, Any]] = None,
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        return [], None
+
+    async def get_log_entry(
+        self, partition_key: str, row_key: str
+    ) -> Optional[Dict[str, Any]]:
+        return None
+
+
+def _http_error(status: int) -> HttpResponseError:
+    error = HttpResponseError(message=f"status {status}")
+    error.status_code = status
+    return error
+
+
+def _storage(resilience: Resilience) -> Tuple[AzureTableStorage, MagicMock]:
+    client = MagicMock(spec=TableClient)
+    service = MagicMock()
+    service.get_table_client.return_value = client
+    with patch(
+        "masterzdran_azure_tablestorage_logging.storage.TableServiceClient.from_connection_string",
+        return_value=service,
+    ):
+        storage = AzureTableStorage(
+            connection_string="UseDevelopmentStorage=true",
+            table_name="logs",
+            resilience=resilience,
+        )
+    return storage, client
+
+
+def test_is_retryable_classifies_transient_errors():
+    """
+    Test that throttling, server errors and connection failures are retryable,
+    including when chained, and client errors are not.
+    """
+    assert is_retryable(_http_error(503))
+    assert is_retryable(_http_error(429))
+    assert is_retryable(ServiceRequestError("connection reset"))
+    assert is_retryable(TimeoutError())
+    try:
+        raise StorageError("Failed to store log") from _http_error(500)
+    except StorageError as e:
+        assert is_retryable(e)
+    assert not is_retryable(_http_error(409))
+    assert not is_retryable(ValueError("bad"))
+
+
+@pytest.mark.asyncio
+async def test_store_log_retries_throttled_writes():
+    """
+    Test that a throttled write is retried until it succeeds.
+    """
+    resilience = Resilience(retry=RetryPolicy(max_attempts=3, base_delay=0.001))
+    storage, client = _storage(resilience)
+    client.create_entity.side_effect = [_http_error(503), _http_error(429), None]
+
+    await storage.store_log("service", "00001", {"Message": "hello"})
+
+    assert client.create_entity.call_count == 3
+    assert resilience.retried_calls == 2
+
+    client.create_entity.side_effect = _http_error(400)
+    with pytest.raises(StorageError, match="Failed to store log"):
+        await storage.store_log("service", "00002", {"Message": "bad"})
+    assert client.create_entity.call_count == 4
+
+
+@pytest.mark.asyncio
+async def test_open_circuit_fails_fast_or_uses_fallback():
+    """
+    Test that repeated failures open the circuit, which then refuses calls or
+    diverts writes to the fallback, and closes again after a successful trial.
+    """
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10, clock=clock)
+    resilience = Resilience(
+        retry=RetryPolicy(max_attempts=1, base_delay=0.001), breaker=breaker
+    )
+    storage, client = _storage(resilience)
+    client.create_entity.side_effect = _http_error(503)
+
+    for _ in range(2):
+        with pytest.raises(StorageError):
+            await storage.store_log("service", "00001", {"Message": "hello"})
+    assert breaker.state == CircuitBreaker.OPEN
+
+    with pytest.raises(CircuitOpenError):
+        await storage.store_log("service", "00002", {"Message": "hello"})
+    assert client.create_entity.call_count == 2
+
+    fallback = ListStorage()
+    resilience.fallback = fallback
+    await storage.store_logs([("service", "00003", {"Message": "diverted"})])
+    assert fallback.entries == [("service", "00003", {"Message": "diverted"})]
+
+    clock.now = 11
+    client.create_entity.side_effect = None
+    await storage.store_log("service", "00004", {"Message": "trial"})
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+@pytest.mark.asyncio
+async def test_cancelled_trial_call_releases_the_circuit():
+    """
+    Test that cancelling the half-open trial call lets the next call through.
+    """
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10, clock=clock)
+    resilience = Resilience(
+        retry=RetryPolicy(max_attempts=1, base_delay=0.001), breaker=breaker
+    )
+
+    async def fail():
+        raise _http_error(503)
+
+    with pytest.raises(HttpResponseError):
+        await resilience.call(fail)
+    clock.now = 11
+    started = asyncio.Event()
+
+    async def hang():
+        started.set()
+        await asyncio.sleep(3600)
+
+    trial = asyncio.ensure_future(resilience.call(hang))
+    await started.wait()
+    trial.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await trial
+
+    async def succeed():
+        return "ok"
+
+    assert await resilience.call(succeed) == "ok"
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+@pytest.mark.asyncio
+async def test_retried_write_that_already_landed_succeeds():
+    """
+    Test that a 409 on the retry of a write counts as success, and a 409 on the
+    first attempt does not.
+    """
+    resilience = Resilience(retry=RetryPolicy(max_attempts=3, base_delay=0.001))
+    storage, client = _storage(resilience)
+    client.create_entity.side_effect = [TimeoutError(), ResourceExistsError("exists")]
+    await storage.store_log("service", "00001", {"Message": "hello"})
+
+    conflict = _http_error(409)
+    conflict.error_code = "EntityAlreadyExists"
+    client.submit_transaction.side_effect = [_http_error(503), conflict]
+    await storage.store_logs([("service", "00002", {"Message": "batched"})])
+    assert client.submit_transaction.call_count == 2
+
+    client.create_entity.side_effect = ResourceExistsError("exists")
+    with pytest.raises(StorageError):
+        await storage.store_log("service", "00003", {"Message": "duplicate"})
+
+
+@pytest.mark.asyncio
+async def test_fallback_wrapping_the_storage_is_not_reentered(tmp_path):
+    """
+    Test that a spool around the protected storage, configured as its fallback,
+    spools each write once instead of looping back into the storage.
+    """
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10, clock=clock)
+    resilience = Resilience(
+        retry=RetryPolicy(max_attempts=1, base_delay=0.001), breaker=breaker
+    )
+    storage, client = _storage(resilience)
+    spooling = SpoolingStorage(storage, DiskSpool(str(tmp_path)))
+    resilience.fallback = spooling
+    client.create_entity.side_effect = _http_error(503)
+
+    await spooling.store_log("service", "00001", {"Message": "spooled"})
+    await spooling.store_logs([("service", "00002", {"Message": "spooled"})])
+    assert breaker.state == CircuitBreaker.OPEN
+    assert spooling.stats()["spooled_entries"] == 2
+    with pytest.raises(CircuitOpenError):
+        await storage.store_log("service", "00003", {"Message": "direct"})
+
+    clock.now = 11
+    client.create_entity.side_effect = None
+    await spooling.replay()
+    assert spooling.stats()["replayed_entries"] == 2
+    await spooling.aclose()
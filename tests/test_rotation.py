@@ -0,0 +1,181 @@
+from datetime import datetime
+
+import pytest
+
+from masterzdran_azure_tablestorage_logging import (
+    InMemoryTableService,
+    InMemoryTableStorage,
+    RotatingTableStorage,
+)
+from masterzdran_azure_tablestorage_logging.keys import row_key_for, row_key_time
+from masterzdran_azure_tablestorage_logging.paging import encode_token as token_of
+
+
+class Clock:
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def make_storage(services, clock, **kwargs):
+    return RotatingTableStorage(
+        list(services),
+        storage_factory=lambda connection_string, table_name: InMemoryTableStorage(
+            table_name, service=services[connection_string]
+        ),
+        clock=clock,
+        **kwargs,
+    )
+
+
+def entry(logger_name, timestamp, message):
+    return (
+        logger_name,
+        row_key_for(timestamp) + "node",
+        {"LoggerName": logger_name, "LogLevel": "INFO", "Message": message},
+    )
+
+
+def test_row_key_time():
+    """
+    Test reading the time back from tick RowKeys.
+    """
+    timestamp = datetime(2026, 10, 17, 12, 30, 1, 250)
+    assert row_key_time(row_key_for(timestamp) + "abc") == timestamp
+    assert row_key_time(row_key_for(timestamp, False), False) == timestamp
+    assert row_key_time("custom-key") is None
+    assert row_key_time("9" * 19) is None
+
+
+def test_invalid_arguments():
+    """
+    Test argument validation.
+    """
+    with pytest.raises(ValueError, match="Connection strings"):
+        RotatingTableStorage([])
+    with pytest.raises(ValueError, match="Table prefix"):
+        RotatingTableStorage(["a"], table_prefix="1logs")
+    with pytest.raises(ValueError, match="Invalid period"):
+        RotatingTableStorage(["a"], period="week")
+    with pytest.raises(ValueError, match="Retention"):
+        RotatingTableStorage(["a"], retention=0)
+
+
+@pytest.mark.asyncio
+async def test_routes_writes_and_queries_by_period_and_shard():
+    """
+    Test that entries land in the tables of their month and logger shard, and
+    that queries only read the overlapping tables.
+    """
+    services = {"a": InMemoryTableService(), "b": InMemoryTableService()}
+    clock = Clock(datetime(2026, 10, 17))
+    storage = make_storage(services, clock)
+    loggers = ["api", "worker", "billing", "auth"]
+    shards = {name: "ab"[storage.shard(name)] for name in loggers}
+    assert len(set(shards.values())) == 2
+
+    await storage.store_logs(
+        [
+            entry(name, datetime(2026, month, 5, hour), f"{name} {month} {hour}")
+            for name in loggers
+            for month in (8, 9, 10)
+            for hour in (1, 2)
+        ]
+    )
+    await storage.store_log(*entry("api", datetime(2026, 10, 6), "api latest"))
+
+    for name, shard in shards.items():
+        assert {"logs202608", "logs202609", "logs202610"} <= set(services[shard].tables)
+    logs, token = await storage.get_logs(page_size=2, logger_name="api")
+    assert [log["Message"] for log in logs] == ["api latest", "api 10 2"]
+    rest, token = await storage.get_logs(
+        page_size=10, logger_name="api", continuation_token=token
+    )
+    assert token is None
+    assert [log["Message"] for log in rest] == [
+        "api 10 1",
+        "api 9 2",
+        "api 9 1",
+        "api 8 2",
+        "api 8 1",
+    ]
+
+    everything, token = await storage.get_logs(page_size=100)
+    assert len(everything) == 25 and token is None
+
+    requests = {shard: service.requests for shard, service in services.items()}
+    september, token = await storage.get_logs(
+        logger_name="worker",
+        start_time=datetime(2026, 9, 1),
+        end_time=datetime(2026, 9, 30),
+        as_entries=True,
+    )
+    assert [log.message for log in september] == ["worker 9 2", "worker 9 1"]
+    other = "b" if shards["worker"] == "a" else "a"
+    assert services[other].requests == requests[other]
+    assert services[shards["worker"]].requests == requests[shards["worker"]] + 1
+
+    partition_key, row_key, _ = entry("auth", datetime(2026, 9, 5, 1), "")
+    found = await storage.get_log_entry(partition_key, row_key)
+    assert found["Message"] == "auth 9 1"
+    assert await storage.get_log_entry(partition_key, "custom") is None
+    await storage.aclose()
+
+
+@pytest.mark.asyncio
+async def test_continuation_survives_new_tables():
+    """
+    Test that a continuation token resumes in the table it stopped in after a
+    newer table was created.
+    """
+    service = InMemoryTableService()
+    clock = Clock(datetime(2026, 10, 17))
+    storage = make_storage({"a": service}, clock)
+    for month in (9, 10):
+        for day in (1, 2, 3):
+            await storage.store_log(
+                *entry("api", datetime(2026, month, day), f"{month}-{day}")
+            )
+    logs, token = await storage.get_logs(page_size=2, logger_name="api")
+    assert [log["Message"] for log in logs] == ["10-3", "10-2"]
+
+    clock.now = datetime(2026, 11, 1)
+    await storage.store_log(*entry("api", datetime(2026, 11, 1), "11-1"))
+    rest, token = await storage.get_logs(
+        page_size=10, logger_name="api", continuation_token=token
+    )
+    assert token is None
+    assert [log["Message"] for log in rest] == ["10-1", "9-3", "9-2", "9-1"]
+    with pytest.raises(ValueError, match="Invalid continuation token"):
+        await storage.get_logs(continuation_token=token_of({"r": 0, "c": None}))
+    await storage.aclose()
+
+
+@pytest.mark.asyncio
+async def test_retention_drops_whole_tables():
+    """
+    Test that rolling over to a new month drops the tables past the retention.
+    """
+    service = InMemoryTableService()
+    clock = Clock(datetime(2026, 9, 30))
+    storage = make_storage({"a": service}, clock)
+    for month in (7, 8, 9):
+        await storage.store_log(*entry("api", datetime(2026, month, 1), "m"))
+    assert set(service.tables) == {"logs202607", "logs202608", "logs202609"}
+
+    storage = make_storage({"a": service}, clock, retention=2)
+    await storage.store_log(*entry("api", datetime(2026, 9, 2), "m"))
+    assert set(service.tables) == {"logs202608", "logs202609"}
+
+    clock.now = datetime(2026, 10, 1)
+    await storage.store_log(*entry("api", datetime(2026, 10, 1), "m"))
+    assert set(service.tables) == {"logs202609", "logs202610"}
+    assert await storage.drop_expired(datetime(2026, 12, 1)) == [
+        "logs202609",
+        "logs202610",
+    ]
+    logs, _ = await storage.get_logs()
+    assert logs == []
+    await storage.aclose()
@@ -0,0 +1,130 @@
+import pytest
+
+from masterzdran_azure_tablestorage_logging import (
+    AzureLogger,
+    InMemoryTableStorage,
+    LogLevel,
+    Metrics,
+    Sampler,
+)
+from masterzdran_azure_tablestorage_logging.sampling import SUPPRESSED_KEY
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def kept(sampler, calls, message="m %d", level=LogLevel.WARNING):
+    return [sampler.check("svc", level, message) for _ in range(calls)]
+
+
+def test_ratio_keeps_evenly_spread_calls():
+    """
+    Test that a ratio keeps every n-th call and reports the suppressed ones.
+    """
+    sampler = Sampler(ratio=0.25)
+    assert kept(sampler, 9) == [0, None, None, None, 3, None, None, None, 3]
+    assert sampler.stats() == {"keys": 1, "suppressed": 6}
+
+
+def test_first_then_every_per_interval():
+    """
+    Test "first N per interval, then 1 in M".
+    """
+    clock = Clock()
+    sampler = Sampler(first=2, then_every=3, interval=10, clock=clock)
+    assert kept(sampler, 8) == [0, 0, None, None, 2, None, None, 2]
+    clock.now = 10
+    assert kept(sampler, 3) == [0, 0, None]
+
+    only_first = Sampler(first=1)
+    assert kept(only_first, 3) == [0, None, None]
+
+
+def test_token_bucket_and_keys():
+    """
+    Test the token bucket, and that keys separate loggers, levels and templates.
+    """
+    clock = Clock()
+    sampler = Sampler(rate=2, burst=2, clock=clock)
+    assert kept(sampler, 3) == [0, 0, None]
+    assert kept(sampler, 1, message="other") == [0]
+    assert kept(sampler, 1, level=LogLevel.INFO) == [0]
+    clock.now = 0.5
+    assert kept(sampler, 2) == [1, None]
+    assert kept(sampler, 5, level=LogLevel.ERROR) == [0] * 5
+
+    first = lambda: "built"  # noqa: E731
+    second = lambda: "built"  # noqa: E731
+    assert Sampler.template_key(first) is not Sampler.template_key(second)
+    messages = [lambda: "same" for _ in range(2)]
+    assert Sampler.template_key(messages[0]) is Sampler.template_key(messages[1])
+
+    bounded = Sampler(rate=1, max_keys=2, clock=clock)
+    for index in range(3):
+        bounded.check("svc", LogLevel.INFO, f"m{index}")
+    assert bounded.stats()["keys"] == 2
+
+    # A hot key survives a stream of new keys; the cold one is evicted.
+    lru = Sampler(rate=1, max_keys=2, clock=clock)
+    assert kept(lru, 1, message="hot") == [0]
+    for index in range(3):
+        assert kept(lru, 1, message="hot") == [None]
+        assert kept(lru, 1, message=f"cold {index}") == [0]
+    assert lru.stats()["keys"] == 2
+
+
+def test_invalid_arguments():
+    """
+    Test argument validation.
+    """
+    with pytest.raises(ValueError, match="Ratio"):
+        Sampler(ratio=0)
+    with pytest.raises(ValueError, match="Rate"):
+        Sampler(rate=-1)
+    with pytest.raises(ValueError, match="Burst"):
+        Sampler(rate=1, burst=0.5)
+
+
+@pytest.mark.asyncio
+async def test_logger_folds_suppressed_counts_into_metadata():
+    """
+    Test that suppressed calls are neither formatted nor stored, and that the
+    next kept entry carries their count.
+    """
+    storage = InMemoryTableStorage()
+    metrics = Metrics()
+    logger = AzureLogger(
+        storage, "svc", sampler=Sampler(first=1, then_every=4), metrics=metrics
+    )
+    formatted = []
+
+    def build():
+        formatted.append(1)
+        return "built"
+
+    for index in range(9):
+        await logger.warning("retrying %d", args=(index,), metadata={"i": index})
+        await logger.info(build)
+    await logger.error("failed")
+
+    logs, _ = await storage.get_logs(page_size=100, as_entries=True)
+    warnings = [entry for entry in logs if entry.level == "WARNING"]
+    assert [entry.message for entry in reversed(warnings)] == [
+        "retrying 0",
+        "retrying 4",
+        "retrying 8",
+    ]
+    assert [entry.metadata for entry in reversed(warnings)] == [
+        {"i": 0},
+        {"i": 4, SUPPRESSED_KEY: 3},
+        {"i": 8, SUPPRESSED_KEY: 3},
+    ]
+    assert len(formatted) == 3
+    assert sum(entry.level == "ERROR" for entry in logs) == 1
+    counters = metrics.stats()["counters"]["suppressed_entries_total"]
+    assert counters == {"level=WARNING": 6, "level=INFO": 6}
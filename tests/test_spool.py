@@ -0,0 +1,199 @@
+import asyncio
+import os
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+import pytest
+from azure.core.exceptions import ResourceExistsError
+
+from masterzdran_azure_tablestorage_logging.interfaces import StorageInterface
+from masterzdran_azure_tablestorage_logging.spool import DiskSpool, SpoolingStorage
+
+
+class FlakyStorage(StorageInterface):
+    """
+    In-memory StorageInterface that fails while `failing` is set.
+    """
+
+    def __init__(self):
+        self.entries: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self.failing = False
+        self.closed = False
+
+    async def store_log(self, partition_key: str, row_key: str, data: dict) -> None:
+        if self.failing:
+            raise Exception("Failed to store log: service unavailable")
+        if (partition_key, row_key) in self.entries:
+            raise Exception("Failed to store log: exists") from ResourceExistsError()
+        self.entries[(partition_key, row_key)] = data
+
+    async def store_logs(self, entries):
+        if self.failing:
+            raise Exception("Failed to store logs: service unavailable")
+        if any((pk, rk) in self.entries for pk, rk, _ in entries):
+            raise Exception("Failed to store logs: exists")
+        for partition_key, row_key, data in entries:
+            self.entries[(partition_key, row_key)] = data
+
+    async def aclose(self):
+        self.closed = True
+
+    async def get_logs(
+        self,
+        page_size: int = 50,
+        continuation_token: Optional[str] = None,
+        order_by: str = "Timestamp",
+        ascending: bool = False,
+        filters: Optional[Dict[str, Any]] = None,
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        return [], None
+
+    async def get_log_entry(
+        self, partition_key: str, row_key: str
+    ) -> Optional[Dict[str, Any]]:
+        return self.entries.get((partition_key, row_key))
+
+
+def _entry(i: int) -> Tuple[str, str, Dict[str, Any]]:
+    return ("service", f"{i:05d}", {"LogLevel": "INFO", "Message": f"message {i}"})
+
+
+def test_spool_resumes_after_restart(tmp_path):
+    """
+    Test that committed entries are not read again after reopening the spool,
+    and that a torn frame at the end of a segment is skipped.
+    """
+    spool = DiskSpool(str(tmp_path), segment_bytes=200, fsync_every=2)
+    assert spool.append([_entry(i) for i in range(5)])
+    assert spool.append([_entry(5)])
+
+    batch, position = spool.read_batch(2)
+    assert [rk for _, rk, _ in batch] == ["00000", "00001"]
+    spool.commit(position)
+    spool.close()
+
+    segments = sorted(n for n in os.listdir(tmp_path) if n.endswith(".seg"))
+    with open(os.path.join(tmp_path, segments[-1]), "ab") as segment_file:
+        segment_file.write(b"\x00\x00\x00\x10torn")
+
+    spool = DiskSpool(str(tmp_path))
+    batch, position = spool.read_batch(100)
+    assert [rk for _, rk, _ in batch] == ["00002", "00003", "00004", "00005"]
+    assert spool.corrupt_frames == 1
+    spool.commit(position)
+    assert not spool
+    assert spool.size == 0
+
+
+def test_spool_refuses_entries_over_budget(tmp_path):
+    """
+    Test that appends exceeding max_bytes are refused whole.
+    """
+    spool = DiskSpool(str(tmp_path), max_bytes=150, segment_bytes=100)
+
+    assert spool.append([_entry(0)])
+    assert not spool.append([_entry(1), _entry(2), _entry(3)])
+    assert spool.read_batch(10)[0] == [tuple(_entry(0))]
+
+    with pytest.raises(ValueError):
+        DiskSpool(str(tmp_path), max_bytes=100, segment_bytes=200)
+
+
+def test_spool_ignores_files_not_named_like_segments(tmp_path):
+    """
+    Test that reopening a spool skips files whose names are not segment numbers.
+    """
+    spool = DiskSpool(str(tmp_path))
+    assert spool.append([_entry(0)])
+    spool.close()
+    for name in ("backup.seg", "-1.seg", ".seg", "notes.txt"):
+        with open(os.path.join(tmp_path, name), "wb") as other_file:
+            other_file.write(b"not a segment")
+
+    spool = DiskSpool(str(tmp_path))
+    batch, position = spool.read_batch(10)
+    assert batch == [tuple(_entry(0))]
+    spool.commit(position)
+    assert not spool
+    assert os.path.exists(os.path.join(tmp_path, "backup.seg"))
+
+
+@pytest.mark.asyncio
+async def test_spooling_storage_writes_the_spool_off_the_event_loop(tmp_path):
+    """
+    Test that spool appends and syncs run outside the event loop thread.
+    """
+    inner = FlakyStorage()
+    inner.failing = True
+    spool = DiskSpool(str(tmp_path))
+    storage = SpoolingStorage(inner, spool)
+    threads = []
+
+    def record(method):
+        def wrapper(*args):
+            threads.append(threading.get_ident())
+            return method(*args)
+
+        return wrapper
+
+    spool.append = record(spool.append)
+    spool.sync = record(spool.sync)
+    await storage.store_log(*_entry(0))
+    await storage.flush()
+
+    assert len(threads) == 2
+    assert threading.get_ident() not in threads
+    await storage.aclose()
+
+
+@pytest.mark.asyncio
+async def test_spooling_storage_replays_after_outage(tmp_path):
+    """
+    Test that entries failing during an outage are spooled and replayed once the
+    storage recovers, skipping entries that were already stored.
+    """
+    inner = FlakyStorage()
+    storage = SpoolingStorage(
+        inner, DiskSpool(str(tmp_path)), replay_interval=0.01, max_batch_size=2
+    )
+
+    inner.failing = True
+    for i in range(3):
+        await storage.store_log(*_entry(i))
+    await storage.store_logs([_entry(3), _entry(4)])
+    assert storage.stats()["spooled_entries"] == 5
+    assert not inner.entries
+
+    # Simulate an entry stored before a crash lost the spool cursor.
+    inner.failing = False
+    inner.entries[("service", "00001")] = _entry(1)[2]
+    for _ in range(100):
+        if not storage.spool:
+            break
+        await asyncio.sleep(0.01)
+
+    assert sorted(rk for _, rk in inner.entries) == [f"{i:05d}" for i in range(5)]
+    assert storage.stats()["replayed_entries"] == 5
+
+    await storage.aclose()
+    assert inner.closed
+
+
+@pytest.mark.asyncio
+async def test_spooling_storage_raises_when_spool_is_full(tmp_path):
+    """
+    Test that the storage error surfaces when the spool has no room.
+    """
+    inner = FlakyStorage()
+    inner.failing = True
+    storage = SpoolingStorage(
+        inner, DiskSpool(str(tmp_path), max_bytes=60, segment_bytes=60)
+    )
+
+    with pytest.raises(Exception, match="service unavailable"):
+        await storage.store_logs([_entry(0), _entry(1)])
+    assert storage.stats()["rejected_entries"] == 2
+
+    await storage.aclose()
+    with pytest.raises(ValueError, match="Storage is closed"):
+        await storage.store_log(*_entry(2))
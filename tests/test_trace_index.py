@@ -0,0 +1,185 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+from azure.core.exceptions import ResourceNotFoundError
+
+from masterzdran_azure_tablestorage_logging import AzureTableStorage
+from masterzdran_azure_tablestorage_logging.keys import is_valid_key
+from masterzdran_azure_tablestorage_logging.models import LogEntry
+
+CONNECTION_STRING = (
+    "DefaultEndpointsProtocol=https;AccountName=devstoreaccount1;AccountKey=key;"
+)
+
+
+class FakePages:
+    """
+    Stand-in for the page iterator returned by ItemPaged.by_page.
+    """
+
+    def __init__(self, entities):
+        self._pages = iter([entities])
+        self.continuation_token = None
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return iter(next(self._pages))
+
+
+class FakeTable:
+    """
+    In-memory table client recording transactions and serving queries by
+    PartitionKey.
+    """
+
+    def __init__(self):
+        self.entities = {}
+        self.transactions = []
+
+    def create_entity(self, entity):
+        self.entities[(entity["PartitionKey"], entity["RowKey"])] = dict(entity)
+
+    def submit_transaction(self, operations):
+        self.transactions.append(operations)
+        for _, entity in operations:
+            self.create_entity(entity)
+
+    def get_entity(self, partition_key, row_key):
+        try:
+            return dict(self.entities[(partition_key, row_key)])
+        except KeyError:
+            raise ResourceNotFoundError("not found")
+
+    def query_entities(self, query_filter, results_per_page, select):
+        partition_key = query_filter.split("'")[1]
+        entities = [
+            {field: entity.get(field) for field in select}
+            for key, entity in sorted(self.entities.items())
+            if key[0] == partition_key
+        ]
+        pages = MagicMock()
+        pages.by_page.return_value = FakePages(entities)
+        return pages
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def indexed_storage():
+    """
+    Fixture for AzureTableStorage with a trace index on in-memory tables.
+    """
+    tables = {"logs": FakeTable(), "logsTraceIndex": FakeTable()}
+    service = MagicMock()
+    service.get_table_client.side_effect = lambda table_name: tables[table_name]
+    with patch(
+        "masterzdran_azure_tablestorage_logging.storage.TableServiceClient.from_connection_string",
+        return_value=service,
+    ):
+        storage = AzureTableStorage(CONNECTION_STRING, "logs", trace_index=True)
+    return storage, service, tables
+
+
+def entry(row_key, trace_id, message="m"):
+    return LogEntry(
+        "svc",
+        row_key,
+        "INFO",
+        message,
+        timestamp="2026-10-17T15:00:00",
+        trace_id=trace_id,
+        logger_name="svc",
+        location="",
+        metadata={},
+    )
+
+
+def test_is_valid_key():
+    """
+    Test the key characters Azure Tables rejects.
+    """
+    assert is_valid_key("checkout-42")
+    for value in ("", "a/b", "a\\b", "a#b", "a?b", "a\tb", "x" * 513):
+        assert not is_valid_key(value)
+
+
+@pytest.mark.asyncio
+async def test_writes_maintain_trace_index(indexed_storage):
+    """
+    Test that store_logs batches index pointers per TraceId and store_log
+    indexes single entries.
+    """
+    storage, service, tables = indexed_storage
+    service.create_table.assert_any_call("logsTraceIndex")
+
+    await storage.store_logs(
+        [
+            ("svc", "002", entry("002", "t1")),
+            ("svc", "003", entry("003", "t2")),
+            ("svc", "004", entry("004", "t1")),
+            ("svc", "005", entry("005", None)),
+            ("svc", "006", entry("006", "bad/id")),
+        ]
+    )
+    await storage.store_log("svc", "001", entry("001", "t1"))
+
+    index = tables["logsTraceIndex"]
+    assert sorted(len(operations) for operations in index.transactions) == [1, 1, 2]
+    assert {op for operations in index.transactions for op, _ in operations} == {
+        "upsert"
+    }
+    assert index.entities[("t1", "002_svc")] == {
+        "PartitionKey": "t1",
+        "RowKey": "002_svc",
+        "LogPartitionKey": "svc",
+        "LogRowKey": "002",
+    }
+    assert {key[0] for key in index.entities} == {"t1", "t2"}
+
+
+@pytest.mark.asyncio
+async def test_get_logs_by_trace_reads_index(indexed_storage):
+    """
+    Test that get_logs_by_trace follows the index pointers in time order and
+    skips pointers whose entry is missing.
+    """
+    storage, _, tables = indexed_storage
+    await storage.store_logs(
+        [
+            ("svc", "002", entry("002", "t1", "second")),
+            ("svc", "001", entry("001", "t1", "first")),
+            ("svc", "003", entry("003", "t2")),
+        ]
+    )
+    del tables["logs"].entities[("svc", "002")]
+    tables["logs"].query_entities = MagicMock(side_effect=AssertionError("scan"))
+
+    logs = await storage.get_logs_by_trace("t1")
+    entries = await storage.get_logs_by_trace("t1", as_entries=True)
+
+    assert [log["Message"] for log in logs] == ["first"]
+    assert entries[0].message == "first"
+    with pytest.raises(ValueError, match="Max concurrency"):
+        await storage.get_logs_by_trace("t1", max_concurrency=0)
+
+
+@pytest.mark.asyncio
+async def test_get_logs_by_trace_without_index_scans(indexed_storage):
+    """
+    Test that without an index the trace is read with a TraceId filter.
+    """
+    storage, _, tables = indexed_storage
+    storage.trace_index = False
+    tables["logs"].query_entities = MagicMock()
+    tables["logs"].query_entities.return_value.by_page.return_value = FakePages(
+        [{"PartitionKey": "svc", "RowKey": "001", "Message": "m", "TraceId": "t1"}]
+    )
+
+    logs = await storage.get_logs_by_trace("t1")
+
+    assert [log["RowKey"] for log in logs] == ["001"]
+    query_filter = tables["logs"].query_entities.call_args.kwargs["query_filter"]
+    assert "TraceId eq 't1'" in query_filter